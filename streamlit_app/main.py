@@ -17,6 +17,7 @@ import streamlit as st
 from pathlib import Path
 import sys
 import os
+import importlib.util
 from datetime import datetime
 
 # Add parent directory to path for imports
@@ -24,6 +25,9 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from streamlit_app.page_loader import PageLoader
 
+# Scripts of the transcription tool, whose models are loaded at startup
+TRANSCRIPTION_SCRIPTS = Path(__file__).parent.parent / "tools" / "transkription" / "scripts"
+
 def initialize_session_state():
     """Initialize session state variables for maintaining app state."""
     if 'selected_tool' not in st.session_state:
@@ -31,6 +35,25 @@ def initialize_session_state():
     if 'page_loader' not in st.session_state:
         st.session_state.page_loader = PageLoader()
 
+def load_prewarm_module():
+    """
+    Load the model pre-warming module of the transcription tool.
+    
+    Returns:
+        module or None: The prewarm module, None if the tool is missing or broken
+    """
+    prewarm_path = TRANSCRIPTION_SCRIPTS / "prewarm.py"
+    if not prewarm_path.exists():
+        return None
+    try:
+        spec = importlib.util.spec_from_file_location("prewarm", prewarm_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except Exception as e:
+        print(f"Warning: Could not load prewarm module: {e}")
+        return None
+
 def render_sidebar():
     """
     Render the sidebar with tool selection and system options.
@@ -169,6 +192,31 @@ def render_health_check():
                 st.success(f"? {var}: {value}")
             else:
                 st.warning(f"?? {var}: {value}")
+        
+        # Check pre-warmed transcription models
+        st.subheader("? Transkriptionsmodelle")
+        prewarm = load_prewarm_module()
+        if prewarm is None:
+            st.info("Transkriptions-Tool nicht installiert")
+            return
+        try:
+            status = prewarm.readiness()
+        except Exception as e:
+            st.error(f"Status nicht verfuegbar: {str(e)}")
+            return
+        if not status['models']:
+            st.info("Kein Vorladen konfiguriert (TRANSCRIBE_PREWARM_MODELS)")
+        elif not status['workers']:
+            st.warning(f"Kein Worker aktiv, vorzuladen: {', '.join(status['models'])}")
+        for worker in status['workers']:
+            models = ', '.join(worker['models']) or "keine"
+            if worker['uss_mb'] is not None:
+                # Unique memory; weights shared with a fork server are not counted
+                models += f" (eigener Speicher {worker['uss_mb']:.0f} MB)"
+            if worker['warmed']:
+                st.success(f"{worker['id']}: bereit, geladen: {models}")
+            else:
+                st.warning(f"{worker['id']}: laedt Modelle ({', '.join(status['models'])})...")
 
 def render_logs():
     """Render system logs viewer with filtering and download options."""
@@ -0,0 +1,1694 @@
+"""
+Unit tests for the transkription tool scripts
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Scripts import their sibling modules by name, like ui.py loads them
+scripts_dir = Path(__file__).parent.parent / "tools" / "transkription" / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+from model_pool import ModelPool, estimate_model_mb, estimate_load_mb
+from chunking import find_silence_boundaries, merge_results, offset_segments
+from batch import with_retry, summarize_batch, read_url_file, build_parser
+from transcript_cache import TranscriptCache
+from streaming import format_segment_line, read_segment_lines, iter_stream_segments, iter_pcm_blocks
+from audio import read_float32, read_float32_blocks
+from vad import detect_speech, map_segments, vad_report, frame_features
+from backends import FasterWhisperModel, get_backend, quantize_int8, convert_bf16
+from benchmark import word_error_rate
+from model_pool import measure_model_mb
+from resources import ResourceAllocator, read_cgroup_quota, cpu_features
+from model_select import select_model, record_rtf, load_profile, resolve_model
+from downloads import download_options, BandwidthMeter
+from jobs import JobQueue
+from progress import ProgressTracker, format_event
+from segment_store import write_segments, read_table, read_metadata, open_archive
+from search_index import SearchIndex
+from batching import BatchScheduler, split_windows, tokens_to_segments
+from admission import estimate_job_mb, plan_admission, read_process_memory, PROCESS_BASE_MB
+from prewarm import warm_models, readiness
+
+SAMPLE_RATE = 16000
+
+
+def make_speech_audio(seconds, silences, seed=0):
+    """Create noise 'speech' with silent gaps at (start, end) second spans"""
+    rng = np.random.default_rng(seed)
+    audio = (rng.standard_normal(seconds * SAMPLE_RATE) * 0.1).astype(np.float32)
+    for start, end in silences:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+class FakeModel:
+    """Stand-in for a loaded model"""
+    
+    def __init__(self, name):
+        self.name = name
+
+
+def fake_loader(model_name, device, **options):
+    return FakeModel(model_name)
+
+
+class TestModelPool:
+    """Test cases for the process-wide model pool"""
+    
+    def test_hit_and_miss_counts(self):
+        """Test that repeated requests are served from the pool"""
+        pool = ModelPool(budget_mb=10000)
+        
+        first = pool.get("tiny", "cpu", loader=fake_loader)
+        second = pool.get("tiny", "cpu", loader=fake_loader)
+        
+        assert first is second
+        stats = pool.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['loaded'] == 1
+    
+    def test_key_includes_device_and_options(self):
+        """Test that device and options select separate pool entries"""
+        pool = ModelPool(budget_mb=10000)
+        
+        cpu = pool.get("tiny", "cpu", loader=fake_loader)
+        cuda = pool.get("tiny", "cuda", loader=fake_loader)
+        quantized = pool.get("tiny", "cpu", loader=fake_loader, compute_type="int8")
+        
+        assert cpu is not cuda
+        assert cpu is not quantized
+        assert pool.stats()['misses'] == 3
+    
+    def test_lru_eviction_over_budget(self):
+        """Test that the least recently used model is evicted first"""
+        # Room for one loaded copy next to another one being loaded
+        budget = estimate_model_mb("tiny") + estimate_load_mb("tiny") + 1
+        pool = ModelPool(budget_mb=budget)
+        
+        pool.get("tiny", "cpu", loader=fake_loader)
+        pool.get("tiny", "cuda", loader=fake_loader)
+        pool.get("tiny", "cpu", loader=fake_loader)  # refresh cpu entry
+        pool.get("tiny", "mps", loader=fake_loader)
+        
+        assert pool.contains("tiny", "cpu")
+        assert not pool.contains("tiny", "cuda")
+        assert pool.contains("tiny", "mps")
+        assert pool.stats()['evictions'] == 1
+        assert pool.stats()['used_mb'] <= budget
+    
+    def test_eviction_makes_room_for_the_load_peak(self):
+        """Test that a model is evicted when only the loaded size, not the load peak, would fit"""
+        pool = ModelPool(budget_mb=estimate_model_mb("tiny") * 2 + 1)
+        
+        pool.get("tiny", "cpu", loader=fake_loader)
+        pool.get("tiny", "cuda", loader=fake_loader)
+        
+        assert not pool.contains("tiny", "cpu")
+        assert pool.contains("tiny", "cuda")
+    
+    def test_oversized_model_is_still_served(self):
+        """Test that a model larger than the budget is loaded alone"""
+        pool = ModelPool(budget_mb=1)
+        
+        pool.get("tiny", "cpu", loader=fake_loader)
+        model = pool.get("base", "cpu", loader=fake_loader)
+        
+        assert model.name == "base"
+        assert [m['model_name'] for m in pool.loaded_models()] == ["base"]
+    
+    def test_acquire_is_exclusive(self):
+        """Test that a pooled model is never used by two jobs at once"""
+        import threading
+        import time
+        
+        pool = ModelPool(budget_mb=10000)
+        active = []
+        overlaps = []
+        
+        def job():
+            with pool.acquire("tiny", "cpu", loader=fake_loader) as model:
+                active.append(model)
+                overlaps.append(len(active))
+                time.sleep(0.01)
+                active.remove(model)
+        
+        threads = [threading.Thread(target=job) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert overlaps == [1, 1, 1, 1]
+        assert pool.stats()['misses'] == 1
+    
+    def test_failed_load_releases_key_lock(self):
+        """Test that a loader error leaves no per-model lock behind"""
+        pool = ModelPool(budget_mb=10000)
+        
+        def broken_loader(model_name, device, **options):
+            raise RuntimeError("download failed")
+        
+        with pytest.raises(RuntimeError):
+            pool.get("tiny", "cpu", loader=broken_loader)
+        
+        assert pool._key_locks == {}
+        assert not pool.contains("tiny", "cpu")
+        assert pool.get("tiny", "cpu", loader=fake_loader).name == "tiny"
+    
+    def test_explicit_evict(self):
+        """Test explicit eviction by model name"""
+        pool = ModelPool(budget_mb=10000)
+        pool.get("tiny", "cpu", loader=fake_loader)
+        pool.get("base", "cpu", loader=fake_loader)
+        
+        assert pool.evict("tiny") == 1
+        assert not pool.contains("tiny", "cpu")
+        assert pool.contains("base", "cpu")
+
+
+
+class TestChunking:
+    """Test cases for silence-aware chunking"""
+    
+    def test_short_audio_is_not_split(self):
+        """Test that audio shorter than a chunk stays whole"""
+        audio = make_speech_audio(5, [])
+        assert find_silence_boundaries(audio, target_chunk_s=10, search_window_s=2) == [0, len(audio)]
+    
+    def test_cuts_land_in_silence(self):
+        """Test that cuts are placed inside the silent gaps"""
+        silences = [(9.0, 10.5), (21.0, 22.0)]
+        audio = make_speech_audio(32, silences)
+        
+        boundaries = find_silence_boundaries(audio, target_chunk_s=10, search_window_s=3)
+        
+        assert boundaries[0] == 0
+        assert boundaries[-1] == len(audio)
+        assert len(boundaries) == 4
+        for cut, (start, end) in zip(boundaries[1:-1], silences):
+            assert start * SAMPLE_RATE <= cut <= end * SAMPLE_RATE
+    
+    def test_merge_offsets_timestamps(self):
+        """Test that chunk segments are stitched on the original timeline"""
+        first = {'segments': offset_segments([{'start': 0.0, 'end': 2.0, 'text': ' Hallo'}], 0.0), 'language': 'de'}
+        second = {'segments': offset_segments([{'start': 1.0, 'end': 3.0, 'text': ' Welt'}], 300.0), 'language': 'de'}
+        
+        result = merge_results([first, second], 'de')
+        
+        assert result['text'] == ' Hallo Welt'
+        assert result['segments'][1]['start'] == 301.0
+        assert result['segments'][1]['end'] == 303.0
+        assert [seg['id'] for seg in result['segments']] == [0, 1]
+        assert result['language'] == 'de'
+    
+    def test_default_workers_fit_into_memory(self, monkeypatch):
+        """Test that the memory, not only the cores, limits the chunk workers"""
+        import admission
+        from chunking import memory_worker_limit
+        
+        worker_mb = estimate_job_mb("medium", duration_s=300)
+        monkeypatch.setattr(admission, "read_available_memory", lambda: None)
+        monkeypatch.setenv("MAX_MEMORY_MB", str(worker_mb * 2.5))
+        
+        assert memory_worker_limit("medium") == 2
+        monkeypatch.setenv("MAX_MEMORY_MB", "100")
+        assert memory_worker_limit("medium") == 1
+
+
+
+class WindowRecorder:
+    """Fake model that records the windows it is asked to transcribe"""
+    
+    def __init__(self):
+        self.windows = []
+        self.prompts = []
+    
+    def transcribe(self, audio, language=None, initial_prompt=None, **options):
+        self.windows.append(len(audio))
+        self.prompts.append(initial_prompt)
+        seconds = len(audio) / SAMPLE_RATE
+        text = f" Fenster {len(self.windows)}"
+        return {'text': text, 'segments': [{'start': 0.0, 'end': seconds, 'text': text}], 'language': 'de'}
+
+
+class TestStreaming:
+    """Test cases for incremental segment output"""
+    
+    def test_blocks_are_decoded_in_silence_cut_windows(self):
+        """Test that streamed blocks are stitched onto one timeline"""
+        audio = make_speech_audio(70, [(28.0, 29.0), (57.0, 58.0)])
+        blocks = [audio[i:i + 5 * SAMPLE_RATE] for i in range(0, len(audio), 5 * SAMPLE_RATE)]
+        model = WindowRecorder()
+        
+        segments = list(iter_stream_segments(model, blocks, 'de', window_s=30))
+        
+        assert sum(model.windows) == len(audio)
+        assert 28.0 <= segments[1]['start'] <= 29.0
+        assert segments[-1]['end'] == pytest.approx(70.0)
+        assert model.prompts[0] is None
+        assert model.prompts[1] == "Fenster 1"
+        assert [seg['id'] for seg in segments] == list(range(len(segments)))
+    
+    def test_pcm_blocks_from_pipe(self):
+        """Test that s16le PCM is read into float32 blocks"""
+        import io
+        samples = (np.arange(-8000, 8000, dtype=np.int16) * 2)
+        stream = io.BytesIO(samples.tobytes())
+        
+        blocks = list(iter_pcm_blocks(stream, block_s=0.25))
+        audio = np.concatenate(blocks)
+        
+        assert audio.dtype == np.float32
+        assert len(audio) == len(samples)
+        assert audio[0] == pytest.approx(-16000 / 32768.0)
+    
+    def test_pcm_reader_stops_at_queue_limit(self):
+        """Test that a slow consumer throttles the reader instead of buffering everything"""
+        import io
+        import time
+        
+        class CountingStream(io.BytesIO):
+            reads = 0
+            
+            def read(self, size=-1):
+                self.reads += 1
+                return super().read(size)
+        
+        stream = CountingStream(np.zeros(100 * 4000, dtype=np.int16).tobytes())
+        blocks = iter_pcm_blocks(stream, block_s=0.25, max_blocks=3)
+        
+        next(blocks)
+        time.sleep(0.2)
+        assert stream.reads <= 5
+        blocks.close()
+    
+    def test_segment_lines_round_trip(self, tmp_path):
+        """Test that JSON lines written so far can be read back"""
+        lines_file = tmp_path / "segments.jsonl"
+        segments = [
+            {'start': 0.0, 'end': 1.5, 'text': ' Grüß Gott', 'tokens': [1, 2]},
+            {'start': 1.5, 'end': 3.0, 'text': ' zusammen'},
+        ]
+        with open(lines_file, 'w', encoding='utf-8') as f:
+            for segment in segments:
+                f.write(format_segment_line(segment))
+        
+        assert read_segment_lines(lines_file) == [
+            {'start': 0.0, 'end': 1.5, 'text': ' Grüß Gott'},
+            {'start': 1.5, 'end': 3.0, 'text': ' zusammen'},
+        ]
+    
+    def test_partial_last_line_is_skipped(self, tmp_path):
+        """Test that a line still being written is ignored"""
+        lines_file = tmp_path / "segments.jsonl"
+        lines_file.write_text(
+            format_segment_line({'start': 0.0, 'end': 1.0, 'text': ' Hallo'}) + '{"start": 1.0, "en',
+            encoding='utf-8'
+        )
+        
+        assert len(read_segment_lines(lines_file)) == 1
+        assert read_segment_lines(tmp_path / "missing.jsonl") == []
+    
+    def test_live_lines_are_removed_after_save(self, tmp_path):
+        """Test that only the final segment file is kept, not the live .jsonl"""
+        import transcribe
+        segments = [{'start': 0.0, 'end': 1.0, 'text': ' Hallo'}]
+        stream = transcribe.save_segment_stream(iter(segments), tmp_path, 'de')
+        
+        next(stream)
+        assert len(list(tmp_path.glob("segments_*.jsonl"))) == 1
+        transcript = transcribe.run_stream(stream)
+        
+        assert Path(transcript).read_text(encoding='utf-8') == ' Hallo'
+        assert list(tmp_path.glob("segments_*.jsonl")) == []
+        assert len(list(tmp_path.glob("segments_*"))) == 1
+
+
+
+class TestAudioBuffer:
+    """Tests for the in-memory float32 audio buffer"""
+
+    @pytest.mark.parametrize("expected_samples", [0, 1000, 50000])
+    def test_read_float32_round_trip(self, expected_samples):
+        import io
+
+        audio = make_speech_audio(3, [(1, 2)])
+        # A trailing partial sample is dropped
+        buffer = read_float32(io.BytesIO(audio.tobytes() + b'\x00\x01'), expected_samples)
+
+        assert buffer.dtype == np.float32
+        assert buffer.flags.c_contiguous and buffer.flags.writeable
+        np.testing.assert_array_equal(buffer, audio)
+
+    def test_buffer_is_not_copied(self):
+        import io
+
+        buffer = read_float32(io.BytesIO(np.ones(100, dtype=np.float32).tobytes()))
+
+        assert isinstance(buffer.base.obj, bytearray)
+
+    def test_read_float32_blocks_from_short_reads(self):
+        import io
+
+        class TrickleStream(io.BytesIO):
+            """Pipe that returns at most 7 bytes per read, splitting samples"""
+
+            def readinto(self, target):
+                return super().readinto(memoryview(target)[:7])
+
+        audio = make_speech_audio(1, [])
+        blocks = list(read_float32_blocks(TrickleStream(audio.tobytes() + b'\x00\x01'), 6000))
+
+        assert [len(block) for block in blocks] == [6000, 6000, 4000]
+        # Blocks stay valid after later reads
+        np.testing.assert_array_equal(np.concatenate(blocks), audio)
+
+    @pytest.mark.parametrize("decode", ["decode_audio", "iter_audio_blocks"])
+    def test_verbose_ffmpeg_does_not_block(self, monkeypatch, decode):
+        import threading
+        import audio as audio_module
+
+        # 1 MB of warnings before the samples, far more than a pipe buffer holds
+        script = (
+            "import sys; sys.stderr.write('w' * (1 << 20)); sys.stderr.flush(); "
+            "sys.stdout.buffer.write(b'\\x00' * 4 * 16000)"
+        )
+        monkeypatch.setattr(audio_module, 'ffmpeg_decode_command', lambda *args: [sys.executable, '-c', script])
+        samples = []
+
+        def run():
+            decoded = getattr(audio_module, decode)("x.wav")
+            samples.append(len(decoded) if decode == "decode_audio" else sum(len(block) for block in decoded))
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+
+        assert not thread.is_alive()
+        assert samples == [16000]
+
+    def test_ffmpeg_errors_are_reported(self, monkeypatch):
+        import audio as audio_module
+
+        script = "import sys; sys.stderr.write('Invalid data found'); sys.exit(1)"
+        monkeypatch.setattr(audio_module, 'ffmpeg_decode_command', lambda *args: [sys.executable, '-c', script])
+
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            audio_module.decode_audio("x.wav")
+
+    def test_windowed_transcription_never_decodes_whole_file(self, tmp_path, monkeypatch):
+        from contextlib import nullcontext
+        import transcribe
+
+        audio = make_speech_audio(70, [(28.0, 29.0), (57.0, 58.0)])
+        model = WindowRecorder()
+        monkeypatch.setattr(transcribe, 'decode_audio', lambda *args, **kwargs: pytest.fail("decoded whole"))
+        monkeypatch.setattr(
+            transcribe, 'iter_audio_blocks',
+            lambda path: (audio[i:i + 5 * SAMPLE_RATE] for i in range(0, len(audio), 5 * SAMPLE_RATE))
+        )
+        monkeypatch.setattr(transcribe, 'use_whisper_model', lambda *args: nullcontext(model))
+        runs = []
+        monkeypatch.setattr(transcribe, 'record_rtf', lambda model_name, audio_s, *args: runs.append(audio_s))
+
+        (tmp_path / "long.wav").write_bytes(b'')
+
+        path = transcribe.transcribe_with_whisper(
+            str(tmp_path / "long.wav"), "base", "de", output_dir=tmp_path, audio=None, windowed=True,
+            duration_s=70, vad=True
+        )
+
+        assert sum(model.windows) == len(audio)
+        assert max(model.windows) <= 40 * SAMPLE_RATE
+        assert Path(path).read_text(encoding='utf-8') == " Fenster 1 Fenster 2 Fenster 3"
+        assert runs == [pytest.approx(70)]
+
+
+def make_voiced_audio(seconds, f0=140.0):
+    """Create a harmonic, syllable-modulated signal that looks like voiced speech"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(2, 20))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    return (0.1 * signal * envelope).astype(np.float32)
+
+
+class TestVad:
+    """Tests for the voice-activity pre-pass"""
+
+    def test_silence_and_noise_are_dropped(self):
+        rng = np.random.default_rng(0)
+        audio = np.concatenate([
+            make_voiced_audio(5),
+            np.zeros(10 * SAMPLE_RATE, dtype=np.float32),
+            make_voiced_audio(4),
+            (rng.standard_normal(6 * SAMPLE_RATE) * 0.1).astype(np.float32),
+            make_voiced_audio(3),
+        ])
+
+        regions = detect_speech(audio)
+
+        assert len(regions) == 3
+        starts = [start / SAMPLE_RATE for start, _ in regions]
+        assert starts[1] == pytest.approx(15, abs=0.5)
+        assert starts[2] == pytest.approx(25, abs=0.5)
+        report = vad_report(len(audio), regions)
+        assert report['skipped_seconds'] == pytest.approx(16, abs=1.5)
+
+    def test_features_do_not_depend_on_the_block_size(self):
+        rng = np.random.default_rng(1)
+        audio = np.concatenate([
+            make_voiced_audio(2),
+            (rng.standard_normal(SAMPLE_RATE) * 0.1).astype(np.float32),
+        ])
+
+        whole = frame_features(audio, block_frames=len(audio))
+        blocked = frame_features(audio, block_frames=7)
+
+        assert len(blocked['energy_db']) == len(audio) // int(SAMPLE_RATE * 0.03)
+        for name in whole:
+            np.testing.assert_allclose(blocked[name], whole[name], rtol=1e-5)
+
+    def test_segments_map_back_to_original_timeline(self):
+        regions = [(0, 2 * SAMPLE_RATE), (10 * SAMPLE_RATE, 14 * SAMPLE_RATE)]
+        segments = [
+            {'start': 0.5, 'end': 2.0, 'text': 'a'},
+            {'start': 2.0, 'end': 5.0, 'text': 'b'},
+        ]
+
+        mapped = map_segments(segments, regions)
+
+        assert (mapped[0]['start'], mapped[0]['end']) == (0.5, 2.0)
+        assert (mapped[1]['start'], mapped[1]['end']) == (10.0, 13.0)
+        assert segments[1]['start'] == 2.0
+
+
+class FakeFasterSegment:
+    """Stand-in for a faster_whisper Segment"""
+
+    def __init__(self, start, end, text):
+        self.id = 0
+        self.seek = 0
+        self.start = start
+        self.end = end
+        self.text = text
+        self.tokens = [1, 2]
+        self.temperature = 0.0
+        self.avg_logprob = -0.2
+        self.compression_ratio = 1.1
+        self.no_speech_prob = 0.01
+        self.words = None
+
+
+class FakeFasterModel:
+    """Stand-in for faster_whisper.WhisperModel"""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        segments = (seg for seg in [FakeFasterSegment(0.0, 2.5, " Hallo"), FakeFasterSegment(2.5, 4.0, " Welt")])
+        return segments, type('Info', (), {'language': 'de'})()
+
+
+class TestBackends:
+    """Tests for the inference backend adapters"""
+
+    def test_faster_whisper_result_matches_whisper_shape(self):
+        fake = FakeFasterModel()
+        model = FasterWhisperModel(fake)
+
+        result = model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), language=None,
+                                  fp16=False, verbose=None, initial_prompt="Vorher")
+
+        assert result['text'] == " Hallo Welt"
+        assert result['language'] == 'de'
+        assert [seg['id'] for seg in result['segments']] == [0, 1]
+        assert set(result['segments'][0]) >= {'start', 'end', 'text', 'tokens', 'avg_logprob', 'no_speech_prob'}
+        # whisper-only options are not passed on
+        assert 'fp16' not in fake.calls[0]
+        assert fake.calls[0]['initial_prompt'] == "Vorher"
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError):
+            get_backend("nope")
+
+
+def make_tiny_whisper():
+    """Build a randomly initialized Whisper model with tiny dimensions"""
+    whisper = pytest.importorskip("whisper")
+    dims = whisper.model.ModelDimensions(
+        n_mels=80, n_audio_ctx=1500, n_audio_state=64, n_audio_head=2, n_audio_layer=2,
+        n_vocab=51865, n_text_ctx=448, n_text_state=64, n_text_head=2, n_text_layer=2
+    )
+    model = whisper.model.Whisper(dims).eval()
+    # The decoder's positional embedding is allocated uninitialized
+    model.decoder.positional_embedding.data.normal_(0, 0.02)
+    return model
+
+
+class TestCompression:
+    """Tests for the int8 and bf16 weight formats"""
+
+    @pytest.mark.parametrize("convert", [quantize_int8, convert_bf16])
+    def test_compressed_model_is_smaller_and_runs(self, convert):
+        import torch
+
+        model = make_tiny_whisper()
+        mel = torch.randn(1, 80, 3000)
+        tokens = torch.tensor([[50258, 50261]])
+        before = measure_model_mb(model)
+
+        model = convert(model)
+        with torch.no_grad():
+            logits = model(mel, tokens)
+
+        assert measure_model_mb(model) < before
+        assert logits.shape == (1, 2, 51865)
+        assert torch.isfinite(logits).all()
+
+    @pytest.mark.parametrize("precision,convert", [("int8", quantize_int8), ("bf16", convert_bf16)])
+    def test_load_converts_checkpoint_directly(self, tmp_path, precision, convert):
+        """Test that loading from an fp16 checkpoint matches converting the fp32 model"""
+        import copy
+        import dataclasses
+        import torch
+
+        model = make_tiny_whisper().half()
+        checkpoint = tmp_path / "tiny.pt"
+        torch.save({'dims': dataclasses.asdict(model.dims), 'model_state_dict': model.state_dict()}, checkpoint)
+        expected = convert(copy.deepcopy(model).float())
+
+        loaded = get_backend("whisper").load(str(checkpoint), "cpu", precision=precision)
+        mel = torch.randn(1, 80, 3000)
+        tokens = torch.tensor([[50258, 50261]])
+        with torch.no_grad():
+            assert torch.equal(loaded(mel, tokens), expected(mel, tokens))
+
+        tensors = list(loaded.parameters()) + list(loaded.buffers())
+        assert not any(tensor.is_meta for tensor in tensors)
+        assert measure_model_mb(loaded) == pytest.approx(measure_model_mb(expected))
+
+    def test_load_falls_back_without_private_lookup(self, tmp_path, monkeypatch):
+        """Test that whisper versions without the private checkpoint lookup load and convert in fp32"""
+        import dataclasses
+        import torch
+        import whisper
+
+        model = make_tiny_whisper()
+        checkpoint = tmp_path / "tiny.pt"
+        torch.save({'dims': dataclasses.asdict(model.dims), 'model_state_dict': model.state_dict()}, checkpoint)
+        monkeypatch.delattr(whisper, "_ALIGNMENT_HEADS")
+
+        loaded = get_backend("whisper").load(str(checkpoint), "cpu", precision="bf16")
+        mel = torch.randn(1, 80, 3000)
+        tokens = torch.tensor([[50258, 50261]])
+        with torch.no_grad():
+            assert torch.equal(loaded(mel, tokens), convert_bf16(model)(mel, tokens))
+
+    def test_word_error_rate(self):
+        assert word_error_rate("Das ist ein Test.", "das ist ein test") == 0.0
+        assert word_error_rate("das ist ein test", "das ist kein test") == 0.25
+        assert word_error_rate("das ist ein test", "das ein test heute") == 0.5
+
+
+def leased_threads():
+    """Torch threads inside a default lease of the process allocator, as a job sees them"""
+    from resources import get_allocator, current_threads
+    with get_allocator().lease() as lease, lease.limits():
+        return current_threads()
+
+
+class TestResources:
+    """Test cases for CPU detection and thread leases"""
+    
+    def test_cgroup_v2_quota(self, tmp_path):
+        """Test that cpu.max is read as cores and 'max' means no limit"""
+        (tmp_path / "cpu.max").write_text("150000 100000\n")
+        assert read_cgroup_quota(str(tmp_path)) == pytest.approx(1.5)
+        
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert read_cgroup_quota(str(tmp_path)) is None
+    
+    def test_cgroup_v1_quota(self, tmp_path):
+        """Test the cfs quota files of cgroup v1"""
+        cpu_dir = tmp_path / "cpu"
+        cpu_dir.mkdir()
+        (cpu_dir / "cpu.cfs_quota_us").write_text("200000\n")
+        (cpu_dir / "cpu.cfs_period_us").write_text("100000\n")
+        
+        assert read_cgroup_quota(str(tmp_path)) == pytest.approx(2.0)
+    
+    def test_cpu_features(self, tmp_path):
+        """Test that only inference-relevant flags are reported"""
+        cpuinfo = tmp_path / "cpuinfo"
+        cpuinfo.write_text("processor\t: 0\nflags\t\t: fpu sse2 avx2 fma avx512_vnni ht\n")
+        
+        assert cpu_features(str(cpuinfo)) == {'avx2', 'fma', 'avx512_vnni'}
+    
+    def test_equal_share_per_job(self):
+        """Test that each job gets cores / max_jobs threads"""
+        allocator = ResourceAllocator(total_cores=8, max_jobs=2, oversubscription=1.0, pin=False)
+        
+        first = allocator.acquire()
+        second = allocator.acquire()
+        
+        assert first.threads == second.threads == 4
+        assert allocator.stats()['granted'] == 8
+    
+    def test_budget_is_bounded(self):
+        """Test that a job waits while all threads are granted"""
+        allocator = ResourceAllocator(total_cores=4, max_jobs=2, oversubscription=1.0, pin=False)
+        
+        with allocator.lease(threads=4):
+            with pytest.raises(TimeoutError):
+                allocator.acquire(timeout=0.05)
+        
+        assert allocator.stats()['granted'] == 0
+        with allocator.lease() as lease:
+            assert lease.threads == 2
+    
+    def test_partial_grant(self):
+        """Test that a job asking for all cores starts with the free share"""
+        allocator = ResourceAllocator(total_cores=8, max_jobs=4, oversubscription=1.0, pin=False)
+        
+        with allocator.lease(threads=6):
+            with allocator.lease(threads=8) as lease:
+                assert lease.threads == 2
+                assert lease.worker_threads(4) == 1
+    
+    def test_lease_limits_are_restored(self):
+        """Test that a lease limits the threads only while its block runs"""
+        torch = pytest.importorskip("torch")
+        allocator = ResourceAllocator(total_cores=8, max_jobs=8, oversubscription=1.0, pin=False)
+        before = torch.get_num_threads()
+        torch.set_num_threads(3)
+        try:
+            with allocator.lease(threads=1) as lease, lease.limits():
+                assert torch.get_num_threads() == 1
+            
+            assert torch.get_num_threads() == 3
+        finally:
+            torch.set_num_threads(before)
+    
+    def test_overlapping_limits_restore_when_the_last_exits(self):
+        """Test that overlapping blocks keep the largest limit and restore only after the last one"""
+        torch = pytest.importorskip("torch")
+        from resources import thread_limits
+        before = torch.get_num_threads()
+        torch.set_num_threads(3)
+        try:
+            first = thread_limits(1)
+            second = thread_limits(2)
+            first.__enter__()
+            assert torch.get_num_threads() == 1
+            second.__enter__()
+            assert torch.get_num_threads() == 2
+            # The first block exits while the second still runs
+            first.__exit__(None, None, None)
+            assert torch.get_num_threads() == 2
+            second.__exit__(None, None, None)
+            assert torch.get_num_threads() == 3
+        finally:
+            torch.set_num_threads(before)
+    
+    def test_worker_leases_get_the_given_threads(self, monkeypatch):
+        """Test that a job in a spawned worker runs on the threads the parent gave that worker"""
+        pytest.importorskip("torch")
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from chunking import _init_worker
+        monkeypatch.setenv('TRANSCRIBE_MAX_JOBS', '4')
+        
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(3, None)
+        ) as executor:
+            assert executor.submit(leased_threads).result(timeout=120) == 3
+
+
+class TestModelSelect:
+    """Test cases for the deadline-aware auto model"""
+    
+    PROFILE = {
+        'whisper:default:cpu': {
+            'tiny': {'core_rtf': 0.2}, 'base': {'core_rtf': 0.4}, 'small': {'core_rtf': 1.6},
+            'medium': {'core_rtf': 4.0}, 'large': {'core_rtf': 8.0},
+        }
+    }
+    
+    def test_most_accurate_model_within_budget(self):
+        """Test that the largest model finishing in time is chosen"""
+        # 10 min video on 4 threads: small ~240s, medium ~600s
+        selection = select_model(600, budget_s=300, threads=4, profile=self.PROFILE)
+        
+        assert selection['model'] == 'small'
+        assert selection['fits']
+        assert selection['estimate_seconds'] == pytest.approx(240)
+    
+    def test_smaller_model_under_load(self):
+        """Test that fewer free threads lead to a smaller model"""
+        idle = select_model(600, budget_s=300, threads=4, profile=self.PROFILE)
+        busy = select_model(600, budget_s=300, threads=1, profile=self.PROFILE)
+        
+        assert busy['model'] == 'base'
+        assert busy['estimate_seconds'] > idle['estimate_seconds'] / 4
+    
+    def test_fastest_model_when_nothing_fits(self):
+        """Test the fallback when even tiny misses the budget"""
+        selection = select_model(36000, budget_s=60, threads=1, profile=self.PROFILE)
+        
+        assert selection['model'] == 'tiny'
+        assert not selection['fits']
+    
+    def test_record_rtf_per_thread(self, tmp_path):
+        """Test that measurements are normalized per thread and averaged"""
+        path = tmp_path / "rtf_profile.json"
+        
+        record_rtf('base', 100, 10, threads=4, path=path)
+        entry = record_rtf('base', 100, 20, threads=4, path=path)
+        
+        assert entry['runs'] == 2
+        assert entry['core_rtf'] == pytest.approx(0.7 * 0.4 + 0.3 * 0.8)
+        assert load_profile(path)['whisper:default:cpu']['base'] == entry
+    
+    def test_record_rtf_cleans_up_failed_writes(self, tmp_path, monkeypatch):
+        """Test that each write has its own temporary file, removed when it cannot replace the profile"""
+        import model_select
+        path = tmp_path / "rtf_profile.json"
+        record_rtf('base', 100, 10, path=path)
+        
+        def failing_replace(src, dst):
+            raise OSError("read-only")
+        monkeypatch.setattr(model_select.os, 'replace', failing_replace)
+        record_rtf('base', 100, 20, path=path)
+        
+        assert [p.name for p in tmp_path.iterdir()] == ["rtf_profile.json"]
+        assert load_profile(path)['whisper:default:cpu']['base']['runs'] == 1
+    
+    def test_resolve_keeps_explicit_model(self):
+        """Test that only auto is replaced"""
+        assert resolve_model('medium', 3600) == 'medium'
+
+
+class TestBatch:
+    """Test cases for batch transcription helpers"""
+    
+    def test_read_url_file_skips_comments(self, tmp_path):
+        """Test that blank lines and comments are ignored"""
+        url_file = tmp_path / "urls.txt"
+        url_file.write_text("# Vorlesungen\nhttps://youtu.be/a\n\n  https://youtu.be/b  \n", encoding='utf-8')
+        
+        assert read_url_file(str(url_file)) == ["https://youtu.be/a", "https://youtu.be/b"]
+    
+    def test_parser_offers_all_backends(self):
+        """Test that the CLI parser builds and accepts every registered backend"""
+        from backends import BACKENDS
+        parser = build_parser()
+        
+        for name in BACKENDS:
+            args = parser.parse_args(["urls.txt", "--backend", name])
+            assert args.backend == name
+        with pytest.raises(SystemExit):
+            parser.parse_args(["urls.txt", "--backend", "unknown"])
+    
+    def test_retry_until_result(self, monkeypatch):
+        """Test that failures and empty results are retried"""
+        monkeypatch.setattr("batch.time.sleep", lambda seconds: None)
+        outcomes = [RuntimeError("timeout"), None, "transcript.txt"]
+        
+        def flaky():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        
+        assert with_retry(flaky, retries=3, backoff_s=0.1, label="test") == "transcript.txt"
+    
+    def test_retry_gives_up(self, monkeypatch):
+        """Test that the last error is raised after all attempts"""
+        monkeypatch.setattr("batch.time.sleep", lambda seconds: None)
+        
+        with pytest.raises(RuntimeError, match="3 attempts"):
+            with_retry(lambda: None, retries=2, label="test")
+    
+    def test_throughput_summary(self):
+        """Test videos/hour and audio-hours/hour"""
+        items = [
+            {'url': 'a', 'status': 'done', 'video_info': {'duration': 3600}},
+            {'url': 'b', 'status': 'done', 'video_info': {'duration': 1800}},
+            {'url': 'c', 'status': 'failed', 'error': 'gone'},
+        ]
+        
+        report = summarize_batch(items, wall_seconds=1800)
+        
+        assert report['done'] == 2
+        assert report['failed'] == 1
+        assert report['videos_per_hour'] == pytest.approx(4.0)
+        assert report['audio_hours_per_hour'] == pytest.approx(3.0)
+        assert 'video_info' not in report['items'][0]
+
+
+
+class TestDownloads:
+    """Test cases for download options and bandwidth measurement"""
+    
+    def test_aria2c_connections(self):
+        """Test that aria2c gets one connection per unit of concurrency"""
+        options = download_options(concurrency=6, use_aria2c=True)
+        
+        assert options['external_downloader'] == {'http': 'aria2c'}
+        assert '-x6' in options['external_downloader_args']['aria2c']
+        assert 'external_downloader' not in download_options(concurrency=6, use_aria2c=False)
+    
+    def test_resumed_bytes_are_not_counted(self, monkeypatch):
+        """Test that bytes already on disk do not count toward bandwidth"""
+        clock = iter([100.0, 102.0])
+        monkeypatch.setattr("downloads.time.time", lambda: next(clock))
+        meter = BandwidthMeter()
+        
+        meter({'status': 'downloading', 'filename': 'a.webm.part', 'downloaded_bytes': 4_000_000})
+        meter({'status': 'downloading', 'filename': 'a.webm.part', 'downloaded_bytes': 6_500_000})
+        report = meter.report()
+        
+        assert report['bytes'] == 2_500_000
+        assert report['resumed_bytes'] == 4_000_000
+        assert report['mbit_per_s'] == pytest.approx(10.0)
+    
+    def test_external_downloader_report(self, monkeypatch):
+        """Test that a single 'finished' report of aria2c counts in full"""
+        monkeypatch.setattr("downloads.time.time", lambda: 50.0)
+        meter = BandwidthMeter()
+        
+        meter({'status': 'finished', 'filename': 'a.webm', 'downloaded_bytes': 1_000_000, 'elapsed': 4.0})
+        
+        assert meter.report()['bytes'] == 1_000_000
+        assert meter.report()['seconds'] == pytest.approx(4.0)
+
+
+class TestTranscriptCache:
+    """Test cases for the content-addressed transcript cache"""
+    
+    @pytest.fixture
+    def transcript_file(self, tmp_path):
+        path = tmp_path / "raw" / "transcript_20250101_120000.txt"
+        path.parent.mkdir()
+        path.write_text("Hallo Welt", encoding='utf-8')
+        return path
+    
+    def test_put_and_get(self, tmp_path, transcript_file):
+        """Test that stored artifacts are returned from the cache directory"""
+        cache = TranscriptCache(tmp_path / "cache")
+        cache.put("dQw4w9WgXcQ", "base", "de", {'transcript': str(transcript_file)}, {'title': 'Test'})
+        transcript_file.unlink()
+        
+        entry = cache.get("dQw4w9WgXcQ", "base", "de")
+        
+        assert Path(entry['artifacts']['transcript']).read_text(encoding='utf-8') == "Hallo Welt"
+        assert entry['video_info'] == {'title': 'Test'}
+    
+    def test_key_includes_model_and_language(self, tmp_path, transcript_file):
+        """Test that other models or languages miss"""
+        cache = TranscriptCache(tmp_path / "cache")
+        cache.put("dQw4w9WgXcQ", "base", "de", {'transcript': str(transcript_file)})
+        
+        assert cache.get("dQw4w9WgXcQ", "small", "de") is None
+        assert cache.get("dQw4w9WgXcQ", "base", "en") is None
+        assert cache.get("other", "base", "de") is None
+    
+    def test_concurrent_hits(self, tmp_path, transcript_file):
+        """Test that parallel lookups of one entry all hit and leave no temp files"""
+        import threading
+        cache = TranscriptCache(tmp_path / "cache")
+        entry = cache.put("a", "base", "de", {'transcript': str(transcript_file)})
+        hits = []
+        
+        def lookup():
+            for _ in range(20):
+                hits.append(cache.get("a", "base", "de") is not None)
+        
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        entry_dir = Path(entry['artifacts']['transcript']).parent
+        assert hits == [True] * 80
+        assert sorted(path.name for path in entry_dir.iterdir()) == ["manifest.json", transcript_file.name]
+    
+    def test_hit_survives_failed_access_update(self, tmp_path, transcript_file, monkeypatch):
+        """Test that a manifest that cannot be rewritten still serves the hit"""
+        cache = TranscriptCache(tmp_path / "cache")
+        cache.put("a", "base", "de", {'transcript': str(transcript_file)})
+        
+        def read_only(entry_dir, manifest):
+            raise PermissionError("read-only file system")
+        
+        monkeypatch.setattr(cache, "_write_manifest", read_only)
+        
+        assert cache.get("a", "base", "de") is not None
+    
+    def test_invalidate(self, tmp_path, transcript_file):
+        """Test explicit invalidation by video ID"""
+        cache = TranscriptCache(tmp_path / "cache")
+        cache.put("a", "base", "de", {'transcript': str(transcript_file)})
+        cache.put("a", "small", "de", {'transcript': str(transcript_file)})
+        cache.put("b", "base", "de", {'transcript': str(transcript_file)})
+        
+        assert cache.invalidate(video_id="a") == 2
+        assert [m['video_id'] for m in cache.entries()] == ["b"]
+    
+    def test_evict_least_recently_used(self, tmp_path, transcript_file, monkeypatch):
+        """Test that eviction drops the least recently accessed entries"""
+        cache = TranscriptCache(tmp_path / "cache")
+        clock = iter(range(100, 200))
+        monkeypatch.setattr("transcript_cache.time.time", lambda: next(clock))
+        for video_id in ["a", "b", "c"]:
+            cache.put(video_id, "base", "de", {'transcript': str(transcript_file)})
+        cache.get("a", "base", "de")
+        
+        assert cache.evict(max_entries=2) == 1
+        assert sorted(m['video_id'] for m in cache.entries()) == ["a", "c"]
+
+
+class TestJobQueue:
+    """Test cases for the persistent job queue and its workers"""
+    
+    def test_submit_deduplicates_pending_jobs(self, tmp_path):
+        """Test that the same URL and options are queued only once while pending"""
+        queue = JobQueue(tmp_path / "jobs.db")
+        
+        first = queue.submit("https://youtu.be/abc123", {'model': 'base'})
+        
+        assert queue.submit("https://youtu.be/abc123", {'model': 'base'}) == first
+        assert queue.submit("https://youtu.be/abc123", {'model': 'small'}) != first
+        queue.complete(queue.claim("w1")['id'], {'transcript': 't.txt'})
+        assert queue.submit("https://youtu.be/abc123", {'model': 'base'}) != first
+    
+    def test_claim_oldest_and_survive_reopen(self, tmp_path):
+        """Test that jobs are claimed in order and persist across connections"""
+        JobQueue(tmp_path / "jobs.db").submit("https://youtu.be/a")
+        JobQueue(tmp_path / "jobs.db").submit("https://youtu.be/b")
+        queue = JobQueue(tmp_path / "jobs.db")
+        
+        job = queue.claim("w1")
+        queue.add_segment(job['id'], 0, {'start': 0.0, 'end': 1.5, 'text': ' Hallo'})
+        
+        assert job['url'] == "https://youtu.be/a"
+        assert queue.get(job['id'])['status'] == 'running'
+        assert [s['text'] for s in queue.segments(job['id'])] == [' Hallo']
+        assert queue.claim("w2")['url'] == "https://youtu.be/b"
+        assert queue.claim("w3") is None
+    
+    def test_requeue_stale_jobs(self, tmp_path, monkeypatch):
+        """Test that jobs of silent workers are queued again until attempts run out"""
+        queue = JobQueue(tmp_path / "jobs.db")
+        job_id = queue.submit("https://youtu.be/a")
+        clock = [1000.0]
+        monkeypatch.setattr("jobs.time.time", lambda: clock[0])
+        
+        for attempt in range(2):
+            queue.claim("w1")
+            clock[0] += 600
+            assert queue.requeue_stale(stale_seconds=300, max_attempts=2) == (1 if attempt == 0 else 0)
+        
+        assert queue.get(job_id)['status'] == 'failed'
+        assert queue.get(job_id)['attempts'] == 2
+    
+    def test_worker_runs_and_fails_jobs(self, tmp_path, monkeypatch):
+        """Test that a worker stores results and errors and stops on an empty queue"""
+        import worker
+        queue = JobQueue(tmp_path / "jobs.db")
+        good = queue.submit("https://youtu.be/good")
+        bad = queue.submit("https://youtu.be/bad")
+        
+        def fake_run_job(queue, job):
+            if job['url'].endswith("bad"):
+                raise RuntimeError("Download failed")
+            return {'transcript': 't.txt', 'markdown': 't.md'}
+        monkeypatch.setattr(worker, 'run_job', fake_run_job)
+        
+        assert worker.work("w1", once=True, queue=queue) == 2
+        assert queue.get(good)['result'] == {'transcript': 't.txt', 'markdown': 't.md'}
+        assert queue.get(bad)['error'] == "Download failed"
+        assert queue.live_workers() == []
+    
+    def test_publish_draft(self, tmp_path):
+        """Test that a draft is kept with a running job and cleared when it is claimed again"""
+        queue = JobQueue(tmp_path / "jobs.db")
+        job_id = queue.submit("https://youtu.be/a", {'model': 'medium', 'draft_model': 'tiny'})
+        queue.claim("w1")
+        
+        queue.publish_draft(job_id, {'transcript': 't.txt', 'model': 'tiny'})
+        
+        assert queue.get(job_id)['draft'] == {'transcript': 't.txt', 'model': 'tiny'}
+        queue.release(job_id)
+        queue.claim("w2")
+        assert queue.get(job_id)['draft'] is None
+    
+    def test_split_cores(self):
+        """Test that worker processes get disjoint, nearly equal core slices"""
+        from worker import split_cores
+        
+        assert split_cores([0, 1, 2, 3, 4], 2) == [[0, 1, 2], [3, 4]]
+        assert split_cores([0], 2) == [[], []]
+
+
+class TestProgress:
+    """Test cases for progress events"""
+    
+    def test_download_events(self):
+        """Test that yt-dlp hooks give bytes, speed and a download fraction"""
+        events = []
+        progress = ProgressTracker(sinks=[events.append], min_interval_s=0)
+        meter = BandwidthMeter()
+        meter.reset(progress.download)
+        progress.stage("downloading")
+        
+        meter({'status': 'downloading', 'filename': 'a.webm.part', 'downloaded_bytes': 2_000_000,
+               'total_bytes': 8_000_000, 'speed': 1_000_000, 'eta': 6})
+        
+        assert events[-1]['fraction'] == pytest.approx(0.25)
+        assert events[-1]['download_speed'] == 1_000_000
+        assert events[-1]['eta_seconds'] == 6
+        assert "2.0 MB of 8.0 MB" in format_event(events[-1])
+    
+    def test_rtf_and_eta_from_segments(self, monkeypatch):
+        """Test that decoded segments give the real-time factor and remaining time"""
+        clock = [100.0]
+        monkeypatch.setattr("progress.time.time", lambda: clock[0])
+        events = []
+        progress = ProgressTracker(duration_s=600, sinks=[events.append], min_interval_s=0)
+        progress.stage("transcribing")
+        
+        clock[0] = 130.0
+        list(progress.track([{'start': 0.0, 'end': 60.0, 'text': ' Hallo'}]))
+        
+        assert events[-1]['rtf'] == pytest.approx(0.5)
+        assert events[-1]['eta_seconds'] == pytest.approx(270.0)
+        assert events[-1]['fraction'] == pytest.approx(0.1)
+    
+    def test_events_are_stored_with_the_job(self, tmp_path):
+        """Test that the job queue sink keeps the latest event for the UI"""
+        queue = JobQueue(tmp_path / "jobs.db")
+        job_id = queue.submit("https://youtu.be/a")
+        queue.claim("w1")
+        progress = ProgressTracker(duration_s=100, sinks=[queue.progress_sink(job_id)])
+        
+        progress.stage("transcribing", "Audio wird transkribiert...")
+        
+        job = queue.get(job_id)
+        assert job['stage'] == "transcribing"
+        assert job['progress']['duration'] == 100
+
+
+class TestSegmentStore:
+    """Test cases for columnar segment files"""
+    
+    SEGMENTS = [
+        {'start': 0.0, 'end': 2.5, 'text': ' Hallo zusammen.', 'avg_logprob': -0.1},
+        {'start': 2.5, 'end': 5.0, 'text': ' Willkommen.', 'avg_logprob': -0.5},
+    ]
+    
+    def test_roundtrip_with_confidence(self, tmp_path):
+        """Test that columns, confidence and file metadata survive a mapped read"""
+        path = write_segments(tmp_path / "segments_1.arrow", self.SEGMENTS, {'language': 'de'})
+        
+        table = read_table(path, ['text', 'confidence'])
+        
+        assert table.column('text').to_pylist() == [' Hallo zusammen.', ' Willkommen.']
+        assert table.column('confidence').to_pylist()[0] == pytest.approx(0.905, abs=1e-3)
+        assert read_metadata(path) == {'language': 'de'}
+    
+    def test_srt_from_columnar_and_json(self, tmp_path):
+        """Test that SRT export reads columnar files and older segments JSON alike"""
+        import json
+        from postprocess import create_srt_output
+        arrow_path = write_segments(tmp_path / "segments_1.arrow", self.SEGMENTS)
+        json_path = tmp_path / "segments_2.json"
+        json_path.write_text(json.dumps({'segments': self.SEGMENTS}), encoding='utf-8')
+        
+        srt_arrow = Path(create_srt_output(str(arrow_path), tmp_path / "a")).read_text(encoding='utf-8')
+        srt_json = Path(create_srt_output(str(json_path), tmp_path / "b")).read_text(encoding='utf-8')
+        
+        assert srt_arrow == srt_json
+        assert "00:00:02,500 --> 00:00:05,000\nWillkommen." in srt_arrow
+    
+    def test_archive_scan(self, tmp_path):
+        """Test that one column can be scanned across all files of an archive"""
+        (tmp_path / "a").mkdir()
+        write_segments(tmp_path / "a" / "segments_1.arrow", self.SEGMENTS[:1])
+        write_segments(tmp_path / "segments_2.arrow", self.SEGMENTS)
+        
+        table = open_archive(tmp_path).to_table(columns=['end'])
+        
+        assert sorted(table.column('end').to_pylist()) == [2.5, 2.5, 5.0]
+
+
+class TestSearchIndex:
+    """Test cases for the full-text search index"""
+    
+    @pytest.fixture
+    def archive(self, tmp_path):
+        raw = tmp_path / "raw"
+        raw.mkdir()
+        write_segments(raw / "segments_20250101_120000.arrow", [
+            {'start': 0.0, 'end': 2.5, 'text': ' Willkommen zur Vorlesung.'},
+            {'start': 62.25, 'end': 65.0, 'text': ' Die Fourier-Transformation zerlegt Signale.'},
+        ])
+        cache = TranscriptCache(tmp_path / "cache")
+        cache.put("abc123", "base", "de", {'segments': str(raw / "segments_20250101_120000.arrow")},
+                  {'title': 'Signale 1'})
+        return raw, cache
+    
+    def test_search_returns_video_and_timestamp(self, tmp_path, archive):
+        """Test that hits carry the video, segment text and start in milliseconds"""
+        raw, cache = archive
+        index = SearchIndex(tmp_path / "search.db")
+        index.update([raw], cache)
+        
+        hits = index.search("fourier signale")
+        
+        assert len(hits) == 1
+        assert hits[0]['video_id'] == "abc123"
+        assert hits[0]['title'] == "Signale 1"
+        assert (hits[0]['start_ms'], hits[0]['end_ms']) == (62250, 65000)
+        assert index.search('"Signale zerlegt"') == []
+        assert len(index.search("Vorles*")) == 1
+    
+    def test_update_is_incremental(self, tmp_path, archive):
+        """Test that unchanged files are skipped and deleted files are dropped"""
+        raw, cache = archive
+        index = SearchIndex(tmp_path / "search.db")
+        
+        assert index.update([raw], cache)['added'] == 1
+        assert index.update([raw], cache) == {'added': 0, 'removed': 0, 'unchanged': 1}
+        (raw / "segments_20250101_120000.arrow").unlink()
+        assert index.update([raw], cache)['removed'] == 1
+        assert index.search("Vorlesung") == []
+    
+    def test_markdown_paragraphs(self, tmp_path):
+        """Test that Markdown transcripts are indexed by paragraph with their video ID"""
+        fixed = tmp_path / "fixed"
+        fixed.mkdir()
+        (fixed / "Signale_20250101_120000.md").write_text(
+            "# Signale 1\n\n---\n**Video ID:** abc123\n---\n\n## Inhalt\n\n"
+            "Erster Absatz ueber Filter.\n\nZweiter Absatz.\n\n---\n## Statistiken\n\n- **Woerter:** 6\n",
+            encoding='utf-8'
+        )
+        index = SearchIndex(tmp_path / "search.db")
+        index.update([fixed], TranscriptCache(tmp_path / "cache"))
+        
+        hits = index.search("Filter")
+        
+        assert [(h['video_id'], h['title'], h['start_ms']) for h in hits] == [("abc123", "Signale 1", None)]
+        assert index.search("Woerter") == []
+
+
+class TestTwoPass:
+    """Test cases for the draft-then-refine mode"""
+    
+    def fake_passes(self, monkeypatch, refined_text):
+        """Replace decoding and both model passes; returns the list of decoded paths"""
+        import transcribe
+        shared = np.zeros(16000, dtype=np.float32)
+        decoded = []
+        
+        def fake_decode(path):
+            decoded.append(path)
+            return shared
+        
+        def fake_stream(audio_path, model_name, language, output_dir, device=None, audio=None, **kwargs):
+            segment = {'start': 0.0, 'end': 1.0, 'text': ' Entwurf'}
+            yield segment
+            result = {'text': segment['text'], 'segments': [segment], 'language': language}
+            return transcribe.save_transcription(result, Path(output_dir), language, "20240101_000000")
+        
+        def fake_whisper(audio_path, model_name, language, output_dir, device=None, audio=None, **kwargs):
+            # Both passes get the audio decoded once
+            assert audio is shared
+            if refined_text is None:
+                return None
+            segment = {'start': 0.0, 'end': 1.0, 'text': refined_text}
+            result = {'text': refined_text, 'segments': [segment], 'language': language}
+            return transcribe.save_transcription(result, Path(output_dir), language, "20240101_000001")
+        
+        monkeypatch.setattr(transcribe, 'decode_audio', fake_decode)
+        monkeypatch.setattr(transcribe, 'transcribe_with_whisper_stream', fake_stream)
+        monkeypatch.setattr(transcribe, 'transcribe_with_whisper', fake_whisper)
+        return decoded
+    
+    def test_refined_transcript_replaces_draft(self, tmp_path, monkeypatch):
+        """Test that the draft is published first and replaced in place by the refinement"""
+        import transcribe
+        from segment_store import load_segments
+        decoded = self.fake_passes(monkeypatch, " Endfassung")
+        drafts = []
+        
+        path = transcribe.transcribe_two_pass(
+            "a.wav", "medium", "de", "tiny", output_dir=tmp_path,
+            on_draft=lambda draft: drafts.append(Path(draft).read_text(encoding='utf-8'))
+        )
+        
+        assert decoded == ["a.wav"]
+        assert drafts == [" Entwurf"]
+        assert Path(path).read_text(encoding='utf-8') == " Endfassung"
+        assert [s['text'] for s in load_segments(transcribe.segments_path_for(path))] == [" Endfassung"]
+        assert list(tmp_path.glob(".refine_*")) == []
+    
+    def test_failed_refinement_keeps_draft(self, tmp_path, monkeypatch):
+        """Test that a failed refinement is reported and leaves the draft untouched"""
+        import transcribe
+        self.fake_passes(monkeypatch, None)
+        drafts = []
+        
+        assert transcribe.transcribe_two_pass(
+            "a.wav", "medium", "de", "tiny", output_dir=tmp_path, on_draft=drafts.append
+        ) is None
+        assert Path(drafts[0]).read_text(encoding='utf-8') == " Entwurf"
+
+
+class TestBatching:
+    """Test cases for batched decoding across jobs"""
+    
+    def test_windows_fit_the_encoder(self):
+        """Test that windows cover the audio and are at most 30 seconds long"""
+        audio = np.random.default_rng(0).standard_normal(16000 * 95).astype(np.float32) * 0.1
+        audio[16000 * 27:16000 * 28] = 0.0  # a pause inside the cut search range
+        
+        windows = split_windows(audio)
+        
+        assert windows[0] == (0, windows[1][0])
+        assert windows[-1][1] == len(audio)
+        assert all(end - start <= 16000 * 30 for start, end in windows)
+        assert 16000 * 27 <= windows[0][1] <= 16000 * 28
+        assert split_windows(np.zeros(0, dtype=np.float32)) == []
+    
+    def test_tokens_to_segments(self):
+        """Test that timestamp tokens delimit segments within a window"""
+        begin = 1000
+        tokens = [begin, 1, 2, begin + 120, begin + 120, 3, begin + 250, 4]
+        
+        def words(ids):
+            return "".join(f" w{i}" for i in ids)
+        
+        segments, consumed = tokens_to_segments(tokens, begin, words, 8.0)
+        
+        # The unfinished segment after <|2.40|> is decoded again from there
+        assert segments == [{'start': 0.0, 'end': 2.4, 'text': ' w1 w2'}]
+        assert consumed == pytest.approx(2.4)
+        
+        # A single timestamp at the end closes the last segment
+        segments, consumed = tokens_to_segments(tokens[:-1], begin, words, 8.0)
+        assert segments[-1] == {'start': 2.4, 'end': 5.0, 'text': ' w3'}
+        assert consumed == 8.0
+        
+        # Without a pair of timestamps the whole window is one segment
+        segments, consumed = tokens_to_segments([begin, 1, begin + 300], begin, words, 8.0)
+        assert segments == [{'start': 0.0, 'end': 6.0, 'text': ' w1'}]
+        assert consumed == 8.0
+    
+    def test_fallback_thresholds(self):
+        """Test that repetitive or unlikely windows are decoded again, silence is not"""
+        from types import SimpleNamespace
+        from batching import needs_fallback
+        
+        def decoded(compression_ratio=1.5, avg_logprob=-0.3, no_speech_prob=0.1):
+            return SimpleNamespace(
+                compression_ratio=compression_ratio, avg_logprob=avg_logprob, no_speech_prob=no_speech_prob
+            )
+        
+        assert not needs_fallback(decoded())
+        assert needs_fallback(decoded(compression_ratio=3.0))
+        assert needs_fallback(decoded(avg_logprob=-1.5))
+        assert not needs_fallback(decoded(avg_logprob=-1.5, no_speech_prob=0.9))
+    
+    def test_scheduler_decodes_rest_of_window_again(self):
+        """Test that the audio after the last complete segment is queued again"""
+        from contextlib import nullcontext
+        calls = []
+        
+        def fake_decode(model, windows, language):
+            calls.append([len(w) / SAMPLE_RATE for w in windows])
+            # Every call finishes at most 12 s of a window
+            return [
+                {'segments': [{'start': 0.0, 'end': min(12.0, len(w) / SAMPLE_RATE), 'text': " x"}],
+                 'consumed': min(12.0, len(w) / SAMPLE_RATE)}
+                for w in windows
+            ]
+        
+        batches = []
+        scheduler = BatchScheduler(
+            lambda: nullcontext(None), batch_size=4, max_wait_s=0.0, decode=fake_decode,
+            on_batch=lambda audio_s, decode_s: batches.append(audio_s)
+        )
+        progress = []
+        
+        result = scheduler.transcribe(np.ones(16000 * 20, dtype=np.float32), "de", on_window=progress.append)
+        
+        assert calls == [[20.0], [8.0]]
+        assert batches == [20.0, 8.0]
+        assert [(s['start'], s['end']) for s in result['segments']] == [(0.0, 12.0), (12.0, 20.0)]
+        assert sum(progress) == pytest.approx(20.0)
+    
+    def test_scheduler_fails_jobs_on_missing_results(self):
+        """Test that a decoder returning fewer results than windows fails the jobs instead of dropping windows"""
+        from contextlib import nullcontext
+        
+        def short_decode(model, windows, language):
+            return [{'segments': []}] * (len(windows) - 1)
+        
+        scheduler = BatchScheduler(lambda: nullcontext(None), batch_size=4, max_wait_s=0.0, decode=short_decode)
+        
+        with pytest.raises(RuntimeError, match="1 results for 2 windows"):
+            scheduler.submit(np.ones(16000 * 50, dtype=np.float32), "de").result(timeout=10)
+    
+    def test_scheduler_batches_windows_of_several_jobs(self):
+        """Test that windows of concurrent jobs share calls and results return to their job"""
+        from contextlib import nullcontext
+        calls = []
+        
+        def fake_decode(model, windows, language):
+            calls.append(len(windows))
+            # Each window is filled with its job number
+            return [{'segments': [{'start': 0.0, 'end': 1.0, 'text': f" job{int(w[0])}"}]} for w in windows]
+        
+        scheduler = BatchScheduler(lambda: nullcontext(None), batch_size=4, max_wait_s=0.2, decode=fake_decode)
+        jobs = [np.full(16000 * 50, float(job), dtype=np.float32) for job in range(3)]
+        
+        results = [future.result(timeout=10) for future in [scheduler.submit(audio, "de") for audio in jobs]]
+        
+        for job, result in enumerate(results):
+            assert [s['text'] for s in result['segments']] == [f" job{job}"] * 2
+            assert result['segments'][1]['start'] == pytest.approx(27.0, abs=3.0)
+        assert sum(calls) == 6
+        assert max(calls) == 4
+    
+    def test_batched_matches_sequential_on_speech(self):
+        """Test that batched decoding transcribes real speech like transcribe() does
+        
+        Needs a speech recording (TRANSCRIBE_TEST_AUDIO, language in
+        TRANSCRIBE_TEST_LANGUAGE, default de) and the tiny model.
+        """
+        import os
+        from contextlib import nullcontext
+        audio_path = os.getenv('TRANSCRIBE_TEST_AUDIO')
+        if not audio_path:
+            pytest.skip("TRANSCRIBE_TEST_AUDIO is not set")
+        whisper = pytest.importorskip("whisper")
+        language = os.getenv('TRANSCRIBE_TEST_LANGUAGE', 'de')
+        model = whisper.load_model("tiny", device="cpu")
+        audio = whisper.load_audio(audio_path)
+        
+        # Batched windows are decoded without the previous text as prompt
+        sequential = model.transcribe(audio, language=language, fp16=False, condition_on_previous_text=False)
+        batched = BatchScheduler(lambda: nullcontext(model), batch_size=4).transcribe(audio, language)
+        
+        assert word_error_rate(sequential['text'], batched['text']) <= 0.15
+        assert batched['segments'][-1]['end'] == pytest.approx(sequential['segments'][-1]['end'], abs=3.0)
+
+
+class TestAdmission:
+    """Test cases for memory-aware admission control"""
+    
+    def test_plan_waits_or_downgrades(self):
+        """Test that a job runs if it fits, else waits or takes a smaller model"""
+        options = {'duration_s': 600}
+        small = estimate_job_mb('small', **options)
+        base = estimate_job_mb('base', **options)
+        
+        assert plan_admission('small', small * 2, small, **options)['action'] == 'run'
+        waiting = plan_admission('small', small * 2, base, policy='wait', **options)
+        assert (waiting['action'], waiting['model']) == ('wait', 'small')
+        downgraded = plan_admission('small', small * 2, base, policy='downgrade', **options)
+        assert (downgraded['action'], downgraded['model'], downgraded['downgraded']) == ('run', 'base', True)
+    
+    def test_plan_rejects_or_downgrades_models_that_never_fit(self):
+        """Test that a model larger than the budget is replaced, and nothing fitting rejects"""
+        options = {'duration_s': 600}
+        base = estimate_job_mb('base', **options)
+        
+        plan = plan_admission('large', base, base, policy='wait', **options)
+        
+        assert (plan['action'], plan['model']) == ('run', 'base')
+        assert plan_admission('large', 10, 10, **options)['action'] == 'reject'
+        assert estimate_job_mb('base', duration_s=3600) > estimate_job_mb('base', duration_s=3600, pipelined=True)
+    
+    def test_load_peak_counts_until_the_model_is_loaded(self):
+        """Test that a model not yet in the pool is budgeted with its load peak"""
+        fp32_peak = estimate_load_mb('small', 4)
+        
+        assert estimate_job_mb('small', duration_s=0) == pytest.approx(PROCESS_BASE_MB + fp32_peak)
+        assert estimate_job_mb('small', duration_s=0, loaded_models=['small']) < PROCESS_BASE_MB + fp32_peak
+        
+        plan = plan_admission('small', 10_000, 10_000, loaded_models=['small'], duration_s=0)
+        assert plan['memory_mb'] == estimate_job_mb('small', duration_s=0, loaded_models=['small'])
+    
+    def test_reservations_share_one_budget(self, tmp_path):
+        """Test that workers reserve memory against the budget of all workers together"""
+        queue = JobQueue(tmp_path / "jobs.db")
+        queue.worker_alive("w1", 1)
+        queue.worker_alive("w2", 2)
+        
+        assert queue.reserve_memory("w1", 600, 1000)
+        assert not queue.reserve_memory("w2", 600, 1000)
+        queue.set_memory("w1", 300)
+        assert queue.reserve_memory("w2", 600, 1000)
+        assert queue.reserved_mb() == 900
+
+
+class TestPrewarm:
+    """Test cases for model pre-warming and the readiness check"""
+    
+    def test_warm_models_skips_and_survives_failures(self):
+        """Test that models are loaded in order, skipped if they do not fit and failures only warn"""
+        loaded = []
+        
+        def fake_load(model):
+            if model == "broken":
+                raise RuntimeError("no weights")
+            loaded.append(model)
+        
+        result = warm_models(["base", "large", "broken", "tiny"], fits=lambda m: m != "large", load=fake_load)
+        
+        assert loaded == ["base", "tiny"]
+        assert list(result) == ["base", "tiny"]
+    
+    def test_readiness_waits_for_live_workers(self, tmp_path):
+        """Test that readiness needs every live worker to have warmed up"""
+        queue = JobQueue(tmp_path / "jobs.db")
+        
+        assert readiness(queue, models=[])['ready']
+        assert not readiness(queue, models=["base"])['ready']
+        queue.worker_alive("w1", 1)
+        assert not readiness(queue, models=["base"])['ready']
+        queue.set_models("w1", ["base"])
+        queue.mark_warm("w1")
+        status = readiness(queue, models=["base"])
+        assert status['ready']
+        assert status['workers'][0]['models'] == ["base"]
+    
+    def test_readiness_without_models_skips_the_queue(self, tmp_path, monkeypatch):
+        """Test that readiness without models to pre-warm neither opens nor creates the job queue"""
+        db_path = tmp_path / "readonly" / "jobs.db"
+        monkeypatch.setenv('TRANSCRIBE_JOBS_DB', str(db_path))
+        monkeypatch.setenv('TRANSCRIBE_PREWARM_MODELS', '')
+        
+        assert readiness() == {'ready': True, 'models': [], 'workers': []}
+        assert not db_path.parent.exists()
+    
+    def test_worker_warms_before_first_job(self, tmp_path, monkeypatch):
+        """Test that a worker loads its models and reports warm before it takes jobs"""
+        import prewarm
+        import worker
+        queue = JobQueue(tmp_path / "jobs.db")
+        queue.submit("https://youtu.be/a")
+        calls = []
+        monkeypatch.setattr(prewarm, 'warm_models', lambda models, fits: calls.append(list(models)))
+        
+        def fake_run_job(queue, job):
+            calls.append(readiness(queue, models=["base"])['ready'])
+            return {}
+        monkeypatch.setattr(worker, 'run_job', fake_run_job)
+        
+        assert worker.work("w1", once=True, queue=queue, prewarm=["base"]) == 1
+        assert calls == [["base"], True]
+
+
+class TestForkServer:
+    """Test cases for workers forked from one process that holds the models"""
+    
+    def test_read_process_memory(self, tmp_path):
+        """Test that USS counts only private pages from smaps_rollup"""
+        proc = tmp_path / "42"
+        proc.mkdir()
+        (proc / "smaps_rollup").write_text(
+            "55d0-7ffd ---p 00000000 00:00 0    [rollup]\n"
+            "Rss:              409600 kB\n"
+            "Pss:              215040 kB\n"
+            "Shared_Clean:     307200 kB\n"
+            "Private_Clean:     10240 kB\n"
+            "Private_Dirty:     92160 kB\n"
+        )
+        
+        usage = read_process_memory(42, proc_root=str(tmp_path))
+        
+        assert usage == {'rss_mb': 400.0, 'pss_mb': 210.0, 'uss_mb': 100.0}
+        assert read_process_memory(43, proc_root=str(tmp_path)) is None
+    
+    def test_shared_weights_are_counted_once(self):
+        """Test that inherited models are kept on release and not reserved again"""
+        pool = ModelPool(budget_mb=10_000)
+        pool.get("base", loader=lambda name, device, **options: object())
+        pool.mark_shared()
+        pool.get("tiny", loader=lambda name, device, **options: object())
+        
+        assert pool.evict(keep_shared=True) == 1
+        assert [m['model_name'] for m in pool.loaded_models()] == ["base"]
+        assert pool.stats()['shared_mb'] == pool.stats()['used_mb']
+        
+        shared = estimate_job_mb('medium', duration_s=600, shared=True)
+        assert shared < estimate_job_mb('medium', duration_s=600) - 1000
+        plan = plan_admission('medium', shared * 2, shared, shared_models=['medium'], duration_s=600)
+        assert (plan['action'], plan['model']) == ('run', 'medium')
+    
+    def test_forked_workers_run_jobs_with_inherited_models(self, tmp_path, monkeypatch):
+        """Test that forked workers take jobs and see the server's models as shared"""
+        import gc
+        import prewarm
+        import worker
+        from model_pool import get_model_pool
+        queue = JobQueue(tmp_path / "jobs.db")
+        job_ids = [queue.submit(f"https://youtu.be/{name}") for name in "ab"]
+        monkeypatch.setenv('TRANSCRIBE_JOBS_DB', str(tmp_path / "jobs.db"))
+        monkeypatch.setattr(worker.signal, 'signal', lambda *args: None)
+        monkeypatch.setattr(worker, 'memory_budget_mb', lambda: None)
+        get_model_pool().clear()
+        monkeypatch.setattr(prewarm, 'warm_models', lambda models, fits: [
+            get_model_pool().get(model, loader=lambda name, device, **options: object()) for model in models
+        ])
+        
+        def fake_run_job(queue, job):
+            return {'shared': [m['model_name'] for m in get_model_pool().loaded_models() if m['shared']]}
+        monkeypatch.setattr(worker, 'run_job', fake_run_job)
+        
+        try:
+            worker.run_fork_server(workers=2, poll_s=0.1, once=True, models=["base"])
+        finally:
+            get_model_pool().clear()
+            gc.unfreeze()
+        
+        assert [queue.get(job_id)['result'] for job_id in job_ids] == [{'shared': ["base"]}] * 2
+        assert queue.live_workers() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
+
+
+class TestAudioDownload:
+    """Tests for the download modes of download_youtube_audio"""
+
+    @pytest.fixture
+    def fake_ydl(self, monkeypatch):
+        import transcribe
+
+        calls = []
+
+        class FakeYoutubeDL:
+            def __init__(self, opts):
+                self.opts = opts
+                calls.append(opts)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def extract_info(self, url, download=False):
+                ext = 'webm' if not self.opts['postprocessors'] else self.opts['postprocessors'][0]['preferredcodec']
+                path = Path(self.opts['outtmpl'].replace('%(id)s', 'abc123').replace('%(ext)s', ext))
+                path.write_bytes(b'audio')
+                for hook in self.opts.get('progress_hooks', []):
+                    hook({'status': 'downloading', 'filename': str(path), 'downloaded_bytes': 0})
+                    hook({'status': 'finished', 'filename': str(path), 'downloaded_bytes': 5})
+                return {
+                    'id': 'abc123', 'title': 'Vorlesung 1', 'duration': 95, 'uploader': 'MINT',
+                    'requested_downloads': [{'filepath': str(path)}],
+                }
+
+        monkeypatch.setattr(transcribe, 'YTDLP_AVAILABLE', True)
+        monkeypatch.setattr(transcribe, 'yt_dlp', type('yt_dlp', (), {'YoutubeDL': FakeYoutubeDL}), raising=False)
+        return calls
+
+    def test_native_mode_skips_reencode(self, tmp_path, fake_ydl):
+        import transcribe
+
+        path = transcribe.download_youtube_audio("https://youtu.be/x", tmp_path)
+
+        assert path.endswith('.webm')
+        assert fake_ydl[0]['postprocessors'] == []
+
+    def test_archive_mode_uses_compact_opus(self, tmp_path, fake_ydl):
+        import transcribe
+
+        path = transcribe.download_youtube_audio("https://youtu.be/x", tmp_path, audio_format="archive")
+
+        assert path.endswith('.opus')
+        postprocessor = fake_ydl[0]['postprocessors'][0]
+        assert int(postprocessor['preferredquality']) < 192
+
+    def test_unknown_mode_is_rejected(self, tmp_path, fake_ydl):
+        import transcribe
+
+        with pytest.raises(ValueError):
+            transcribe.download_youtube_audio("https://youtu.be/x", tmp_path, audio_format="flac")
+
+    def test_single_extraction_with_sidecar(self, tmp_path, fake_ydl):
+        """Test that metadata comes with the download and is stored next to the audio"""
+        import transcribe
+        from postprocess import load_video_info
+
+        fetched = transcribe.fetch_youtube_audio("https://youtu.be/abc123", tmp_path)
+        again = transcribe.fetch_youtube_audio("https://youtu.be/abc123", tmp_path)
+
+        assert Path(fetched['audio']).name == 'abc123.webm'
+        assert fetched['video_info']['title'] == 'Vorlesung 1'
+        assert load_video_info('abc123', tmp_path) == fetched['video_info']
+        # Both downloads ran on one reused session, each measured on its own
+        assert len(fake_ydl) == 1
+        assert fetched['download']['bytes'] == again['download']['bytes'] == 5
+
+    def test_resumable_parallel_options(self, tmp_path, fake_ydl):
+        """Test that downloads keep .part files and fetch fragments in parallel"""
+        import transcribe
+
+        transcribe.fetch_youtube_audio("https://youtu.be/abc123", tmp_path, concurrency=8)
+
+        opts = fake_ydl[0]
+        assert opts['continuedl'] and not opts['nopart']
+        assert opts['concurrent_fragment_downloads'] == 8
+
+    def test_markdown_reads_sidecar(self, tmp_path, monkeypatch):
+        """Test that create_markdown_output takes the metadata from the sidecar"""
+        import postprocess
+
+        monkeypatch.setattr(postprocess, 'AUDIO_DIR', tmp_path)
+        postprocess.save_video_info({'id': 'abc123', 'title': 'Vorlesung 1', 'duration': 95})
+        transcript = tmp_path / "transcript.txt"
+        transcript.write_text("Hallo zusammen.", encoding='utf-8')
+
+        md_path = postprocess.create_markdown_output(str(transcript), "https://youtu.be/abc123")
+
+        content = Path(md_path).read_text(encoding='utf-8')
+        assert content.startswith("# Vorlesung 1")
+        assert "**Dauer:** 01:35" in content
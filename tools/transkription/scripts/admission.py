@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Admission control: estimated peak memory of jobs against MAX_MEMORY_MB
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any, Sequence
+
+from model_pool import estimate_model_mb, estimate_load_mb, PRECISION_BYTES
+from model_select import MODEL_ORDER
+
+# Python, torch and the worker itself, held by every worker process
+PROCESS_BASE_MB = 350
+
+# Activations, KV cache and mel buffers on top of the weights
+RUNTIME_OVERHEAD = 0.3
+
+# Copies of the decoded audio that exist at once (decoded samples, VAD
+# speech, padded windows); float32 at 16 kHz is 62.5 KB per second
+AUDIO_COPIES = 3
+AUDIO_MB_PER_SECOND = 16000 * 4 / (1024 * 1024)
+
+# Without MAX_MEMORY_MB, this share of the container limit is the budget
+CGROUP_BUDGET_SHARE = 0.9
+
+# What happens to a job that does not fit into the free memory right now:
+#   wait      - it waits until running jobs finish (larger models only if they
+#               can never fit are downgraded)
+#   downgrade - it runs at once with the largest model that fits
+ADMISSION_POLICIES = ('wait', 'downgrade')
+DEFAULT_POLICY = 'wait'
+
+
+def read_cgroup_memory_limit(cgroup_root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """
+    Read the container memory limit in MB
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        Limit in MB or None if there is no limit
+    """
+    root = Path(cgroup_root)
+    for path in (root / "memory.max", root / "memory" / "memory.limit_in_bytes"):
+        if path.exists():
+            try:
+                value = path.read_text().strip()
+            except OSError:
+                return None
+            # cgroup v1 reports "no limit" as a number close to 2^63
+            if value == "max" or not value.isdigit() or int(value) >= 2 ** 60:
+                return None
+            return int(value) / (1024 * 1024)
+    return None
+
+
+def read_available_memory(proc_root: str = "/proc") -> Optional[float]:
+    """
+    Read the memory the kernel can hand out without swapping (MemAvailable)
+
+    Args:
+        proc_root: Mount point of procfs
+
+    Returns:
+        Available memory in MB or None if procfs does not report it
+    """
+    try:
+        with open(Path(proc_root) / "meminfo", 'r') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                parts = value.split()
+                if name == 'MemAvailable' and parts and parts[0].isdigit():
+                    return int(parts[0]) / 1024  # kB
+    except OSError:
+        return None
+    return None
+
+
+def read_process_memory(pid: Optional[int] = None, proc_root: str = "/proc") -> Optional[Dict[str, float]]:
+    """
+    Read the resident memory of a process, split into shared and unique pages
+
+    RSS counts pages shared with other processes (e.g. model weights a
+    fork server handed down copy-on-write) in every process. USS counts
+    only the pages no other process maps, the memory freed if this process
+    exits; PSS splits shared pages evenly between the processes.
+
+    Args:
+        pid: Process ID (default: the calling process)
+        proc_root: Mount point of procfs
+
+    Returns:
+        Dict with 'rss_mb', 'pss_mb' and 'uss_mb', None if procfs has no
+        smaps_rollup (not Linux, or a kernel before 4.14)
+    """
+    path = Path(proc_root) / (str(pid) if pid else "self") / "smaps_rollup"
+    fields = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                parts = value.split()
+                if parts and parts[0].isdigit():
+                    fields[name] = int(parts[0]) / 1024  # kB
+    except OSError:
+        return None
+    if 'Rss' not in fields:
+        return None
+    return {
+        'rss_mb': fields['Rss'],
+        'pss_mb': fields.get('Pss', fields['Rss']),
+        'uss_mb': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
+
+
+def memory_budget_mb() -> Optional[float]:
+    """
+    Return the memory all transcriptions together may use
+
+    Returns:
+        MAX_MEMORY_MB, else a share of the container limit, None for no limit
+    """
+    value = os.getenv('MAX_MEMORY_MB')
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            print(f"Warning: Invalid MAX_MEMORY_MB: {value}")
+    limit = read_cgroup_memory_limit()
+    return limit * CGROUP_BUDGET_SHARE if limit else None
+
+
+def admission_policy() -> str:
+    """Return TRANSCRIBE_ADMISSION (wait or downgrade)"""
+    policy = os.getenv('TRANSCRIBE_ADMISSION', DEFAULT_POLICY)
+    if policy not in ADMISSION_POLICIES:
+        print(f"Warning: Unknown admission policy {policy}, using {DEFAULT_POLICY}")
+        return DEFAULT_POLICY
+    return policy
+
+
+def estimate_job_mb(
+    model_name: str,
+    duration_s: Optional[float] = None,
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    chunked: bool = False,
+    workers: Optional[int] = None,
+    pipelined: bool = False,
+    windowed: bool = False,
+    draft_model: Optional[str] = None,
+    shared: bool = False,
+    loaded_models: Sequence[str] = ()
+) -> float:
+    """
+    Estimate the peak memory of a transcription process
+
+    A model that is not loaded yet counts with the larger of its load peak
+    (checkpoint plus weights, see estimate_load_mb()) and its weights plus
+    runtime buffers.
+
+    Args:
+        model_name: Whisper model
+        duration_s: Audio duration in seconds (None: one hour)
+        backend: Inference backend
+        precision: Weight format, None for the backend default
+        chunked: Chunks run in worker processes that each load the model
+        workers: Chunk worker processes (default: all usable cores)
+        pipelined: The audio is decoded as it streams and never held whole
+        windowed: The downloaded file is decoded window by window, never held whole
+        draft_model: Model of a two-pass draft, kept loaded next to model_name
+        shared: The weights of model_name are already in memory, shared from a
+            fork server; only its runtime buffers count
+        loaded_models: Models already in this process's pool (no load peak)
+
+    Returns:
+        Estimated peak in MB, including the process itself
+    """
+    if precision is None:
+        # faster-whisper loads int8 by default, openai-whisper fp32
+        precision = 'int8' if backend == "faster-whisper" else 'fp32'
+    bytes_per_param = PRECISION_BYTES.get(precision, 4)
+
+    def model_peak(model: str, loaded: bool) -> float:
+        running_mb = estimate_model_mb(model, bytes_per_param) * (1 + RUNTIME_OVERHEAD)
+        if loaded:
+            return running_mb
+        return max(estimate_load_mb(model, bytes_per_param), running_mb)
+
+    model_mb = model_peak(model_name, shared or model_name in loaded_models)
+    if draft_model and draft_model != model_name:
+        model_mb += model_peak(draft_model, draft_model in loaded_models)
+
+    if chunked:
+        if workers is None:
+            from resources import detect_cpu_count
+            workers = detect_cpu_count()
+        # Chunk processes are spawned and load their own copy
+        model_mb += (model_peak(model_name, False) + PROCESS_BASE_MB) * max(0, workers - 1)
+
+    if shared:
+        model_mb -= estimate_model_mb(model_name, bytes_per_param)
+
+    audio_mb = 0.0
+    if not (pipelined or windowed):
+        audio_mb = (duration_s if duration_s is not None else 3600) * AUDIO_MB_PER_SECOND * AUDIO_COPIES
+    return PROCESS_BASE_MB + model_mb + audio_mb
+
+
+def plan_admission(
+    model_name: str,
+    budget_mb: float,
+    free_mb: float,
+    policy: str = DEFAULT_POLICY,
+    shared_models: Sequence[str] = (),
+    loaded_models: Sequence[str] = (),
+    **estimate_options
+) -> Dict[str, Any]:
+    """
+    Decide whether a job runs now, waits or runs with a smaller model
+
+    Args:
+        model_name: Requested model
+        budget_mb: Memory of all transcriptions together
+        free_mb: Budget not reserved by other workers
+        policy: 'wait' or 'downgrade' (see ADMISSION_POLICIES)
+        shared_models: Models whose weights a fork server already holds
+        loaded_models: Models already loaded by the process that runs the job
+        **estimate_options: duration_s, backend, precision, ... for estimate_job_mb()
+
+    Returns:
+        Dict with 'action' ('run', 'wait' or 'reject'), 'model' (requested or
+        downgraded), 'memory_mb' and 'downgraded'
+    """
+    def estimate(model: str) -> float:
+        return estimate_job_mb(
+            model, shared=model in shared_models, loaded_models=loaded_models, **estimate_options
+        )
+
+    def plan(action: str, model: str) -> Dict[str, Any]:
+        return {
+            'action': action,
+            'model': model,
+            'memory_mb': estimate(model),
+            'downgraded': model != model_name,
+        }
+
+    candidates = [model_name]
+    if model_name in MODEL_ORDER:
+        candidates += list(reversed(MODEL_ORDER[:MODEL_ORDER.index(model_name)]))
+
+    fits_free = [model for model in candidates if estimate(model) <= free_mb]
+    fits_budget = [model for model in candidates if estimate(model) <= budget_mb]
+
+    if not fits_budget:
+        return plan('reject', candidates[-1])
+    if fits_free and (fits_free[0] == fits_budget[0] or policy == 'downgrade'):
+        return plan('run', fits_free[0])
+    # Only models that can never fit are given up; the rest waits for memory
+    return plan('wait', fits_budget[0])
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Decode audio once into an in-memory float32 buffer, or window by window
+"""
+
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional, BinaryIO, Union, Iterator, List
+
+import numpy as np
+
+from chunking import SAMPLE_RATE
+
+# Bytes requested from the pipe per read
+READ_BYTES = 1 << 20
+
+# Block length of windowed decoding; small blocks keep the carried-over
+# remainder of a window short
+DEFAULT_BLOCK_SECONDS = 5.0
+
+
+def read_float32(stream: BinaryIO, expected_samples: int = 0) -> np.ndarray:
+    """
+    Read raw f32le samples from a stream into one contiguous array
+
+    ffmpeg's output is read straight into a preallocated bytearray which the
+    returned array wraps without copying.
+
+    Args:
+        stream: Binary stream with f32le samples
+        expected_samples: Expected number of samples, used to reserve memory
+
+    Returns:
+        Writable float32 array backed by the read buffer
+    """
+    # Slack past the expected size lets EOF be seen without growing
+    buffer = bytearray(expected_samples * 4 + READ_BYTES)
+    size = 0
+
+    while True:
+        if size == len(buffer):
+            # Grow geometrically; no view may be exported while resizing
+            buffer.extend(bytes(len(buffer)))
+        with memoryview(buffer) as view, view[size:] as target:
+            read = stream.readinto(target)
+        if not read:
+            break
+        size += read
+
+    del buffer[size - size % 4:]
+    return np.frombuffer(buffer, dtype=np.float32)
+
+
+def read_float32_blocks(stream: BinaryIO, block_samples: int) -> Iterator[np.ndarray]:
+    """
+    Read raw f32le samples from a stream in blocks of a fixed size
+
+    Each block is read straight into its own array, which stays valid after
+    the next block is read. Only the last block may be shorter.
+
+    Args:
+        stream: Binary stream with f32le samples
+        block_samples: Samples per block
+
+    Yields:
+        Float32 arrays of block_samples samples
+    """
+    while True:
+        block = np.empty(block_samples, dtype=np.float32)
+        size = 0
+        with memoryview(block).cast('B') as view:
+            while size < len(view):
+                read = stream.readinto(view[size:])
+                if not read:
+                    break
+                size += read
+        # A truncated stream may end inside a sample
+        samples = size // 4
+        if samples:
+            yield block[:samples]
+        if size < block.nbytes:
+            return
+
+
+def ffmpeg_decode_command(source: Union[str, Path], sample_rate: int = SAMPLE_RATE) -> List[str]:
+    """Return the ffmpeg command that writes mono f32le samples of a file to stdout"""
+    return [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-threads', '0',
+        '-i', str(source),
+        '-map', '0:a:0', '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'
+    ]
+
+
+def _ffmpeg_error(stderr: BinaryIO) -> str:
+    """Return ffmpeg's messages from the temporary file that received its stderr"""
+    stderr.seek(0)
+    return stderr.read().decode(errors='replace').strip()
+
+
+def decode_audio(
+    source: Union[str, Path],
+    sample_rate: int = SAMPLE_RATE,
+    duration_s: Optional[float] = None
+) -> np.ndarray:
+    """
+    Decode an audio or video file to mono float32 samples with one ffmpeg run
+
+    ffmpeg writes f32le straight into the returned buffer, so there is no
+    int16 intermediate and no temporary file. Pass the result to
+    model.transcribe() and any later processing step of the same job instead
+    of the file path, which would make Whisper start ffmpeg again.
+
+    Args:
+        source: Path to the media file
+        sample_rate: Target sample rate
+        duration_s: Known duration (e.g. from video info) to reserve memory
+
+    Returns:
+        Contiguous mono float32 audio
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    cmd = ffmpeg_decode_command(source, sample_rate)
+    expected = int(duration_s * sample_rate) if duration_s else 0
+
+    # stderr goes to a file: a pipe read only after stdout could fill up
+    # with warnings and block ffmpeg while this waits for its samples
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        except FileNotFoundError as e:
+            raise RuntimeError("ffmpeg is required but not installed") from e
+
+        with process:
+            audio = read_float32(process.stdout, expected)
+            process.wait()
+
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to decode audio: {_ffmpeg_error(stderr)}")
+
+    return audio
+
+
+def iter_audio_blocks(
+    source: Union[str, Path],
+    block_s: float = DEFAULT_BLOCK_SECONDS,
+    sample_rate: int = SAMPLE_RATE
+) -> Iterator[np.ndarray]:
+    """
+    Decode an audio or video file to mono float32 blocks without holding it whole
+
+    ffmpeg's output is read only as fast as the blocks are consumed; when
+    the pipe is full, ffmpeg waits. Memory stays at a few blocks however
+    long the file is (decode_audio() needs 230 MB per hour of audio).
+
+    Args:
+        source: Path to the media file
+        block_s: Block length in seconds
+        sample_rate: Target sample rate
+
+    Yields:
+        Mono float32 audio blocks
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    # stderr goes to a file, see decode_audio()
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(
+                ffmpeg_decode_command(source, sample_rate), stdout=subprocess.PIPE, stderr=stderr
+            )
+        except FileNotFoundError as e:
+            raise RuntimeError("ffmpeg is required but not installed") from e
+
+        with process:
+            finished = False
+            try:
+                yield from read_float32_blocks(process.stdout, int(block_s * sample_rate))
+                finished = True
+            finally:
+                # The consumer stopped early (error or closed generator)
+                if not finished:
+                    process.kill()
+            process.wait()
+
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to decode audio: {_ffmpeg_error(stderr)}")
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Inference backends that all return Whisper-shaped transcription results
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from model_pool import estimate_model_mb
+
+# Try to import optional dependencies
+try:
+    import whisper
+    WHISPER_AVAILABLE = True
+except ImportError:
+    WHISPER_AVAILABLE = False
+
+try:
+    import faster_whisper
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+DEFAULT_BACKEND = os.getenv('WHISPER_BACKEND', 'whisper')
+
+# Weight formats; None keeps the backend's default (fp32 for whisper,
+# int8 for faster-whisper on CPU)
+PRECISIONS = ('fp32', 'int8', 'bf16')
+DEFAULT_PRECISION = os.getenv('WHISPER_PRECISION') or None
+
+# faster-whisper compute types for each precision
+COMPUTE_TYPES = {'fp32': 'float32', 'int8': 'int8', 'bf16': 'bfloat16'}
+
+# Options of whisper's transcribe() that have no counterpart elsewhere
+WHISPER_ONLY_OPTIONS = ('fp16', 'verbose')
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds like whisper's verbose output (mm:ss.mmm)"""
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    prefix = f"{hours:02d}:" if hours else ""
+    return f"{prefix}{minutes:02d}:{seconds:06.3f}"
+
+
+def quantize_int8(model: Any) -> Any:
+    """
+    Apply dynamic int8 quantization to all linear layers of a Whisper model
+
+    Weights are stored as int8 and activations are quantized per batch at
+    run time. Embeddings, convolutions and layer norms stay fp32.
+
+    Args:
+        model: Whisper model on CPU
+
+    Returns:
+        Quantized model (modified in place)
+    """
+    import torch
+
+    # quantize_dynamic only accepts plain nn.Linear; whisper's subclass only
+    # adds a dtype cast that fp32 input does not need
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            if type(module) is not torch.nn.Linear:
+                module.__class__ = torch.nn.Linear
+            # The bias is kept as is, so it must match the fp32 activations
+            # (fp16 checkpoints loaded by load_converted)
+            if module.bias is not None and module.bias.dtype != torch.float32:
+                module.bias = torch.nn.Parameter(module.bias.detach().float(), requires_grad=False)
+
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def convert_bf16(model: Any) -> Any:
+    """
+    Store the linear, convolution and embedding weights of a Whisper model in bf16
+
+    whisper's Linear and Conv1d cast their weights to the input dtype, so the
+    model still runs on fp32 activations; layer norms stay fp32.
+
+    Args:
+        model: Whisper model on CPU
+
+    Returns:
+        Converted model (modified in place)
+    """
+    import torch
+
+    for module in model.modules():
+        if isinstance(module, (torch.nn.Linear, torch.nn.Conv1d, torch.nn.Embedding)):
+            module.to(torch.bfloat16)
+    return model
+
+
+def _checkpoint_file(model_name: str, download_root: Optional[str] = None):
+    """
+    Resolve a model name or checkpoint path like whisper.load_model() does
+
+    Returns:
+        (path, alignment heads or None), None if this whisper version lacks
+        the lookup of the official checkpoints
+    """
+    if download_root is None:
+        default = os.path.join(os.path.expanduser("~"), ".cache")
+        download_root = os.path.join(os.getenv("XDG_CACHE_HOME", default), "whisper")
+    # _MODELS, _download and _ALIGNMENT_HEADS are private to whisper
+    if not all(hasattr(whisper, name) for name in ('_MODELS', '_download', '_ALIGNMENT_HEADS')):
+        return None
+    if model_name in whisper._MODELS:
+        path = whisper._download(whisper._MODELS[model_name], download_root, False)
+        return path, whisper._ALIGNMENT_HEADS[model_name]
+    if os.path.isfile(model_name):
+        return model_name, None
+    raise RuntimeError(f"Model {model_name} not found; available models = {whisper.available_models()}")
+
+
+def materialize_weights(model: Any, precision: str) -> Any:
+    """
+    Copy every float tensor of a model into memory it owns, one module at a time
+
+    Linear, convolution and embedding weights become bf16 for precision
+    'bf16'; everything else (and all tensors for 'int8', whose linear layers
+    are quantized beforehand) becomes fp32.
+
+    Args:
+        model: Whisper model whose tensors may still point into a mapped checkpoint
+        precision: 'int8' or 'bf16'
+
+    Returns:
+        The model (modified in place)
+    """
+    import torch
+
+    for module in model.modules():
+        weights = precision == 'bf16' and isinstance(module, (torch.nn.Linear, torch.nn.Conv1d, torch.nn.Embedding))
+        dtype = torch.bfloat16 if weights else torch.float32
+        for tensors in (module._parameters, module._buffers):
+            for name, tensor in tensors.items():
+                if tensor is None or not tensor.is_floating_point():
+                    continue
+                owned = tensor.detach().to(dtype, copy=True)
+                if isinstance(tensor, torch.nn.Parameter):
+                    owned = torch.nn.Parameter(owned, requires_grad=False)
+                tensors[name] = owned
+    return model
+
+
+def empty_whisper(dims: Any) -> Any:
+    """
+    Build a Whisper model whose parameters take no memory yet
+
+    The encoder and decoder are created on the meta device; the buffers
+    that are not in a checkpoint (decoder mask, alignment heads) are
+    computed on the CPU as Whisper.__init__ does, since its sparse
+    alignment heads cannot be built on the meta device.
+
+    Args:
+        dims: ModelDimensions of the checkpoint
+
+    Returns:
+        Whisper model for load_state_dict(assign=True)
+    """
+    import numpy as np
+    import torch
+    from whisper.model import AudioEncoder, TextDecoder, Whisper
+
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(
+            dims.n_mels, dims.n_audio_ctx, dims.n_audio_state, dims.n_audio_head, dims.n_audio_layer
+        )
+        model.decoder = TextDecoder(
+            dims.n_vocab, dims.n_text_ctx, dims.n_text_state, dims.n_text_head, dims.n_text_layer
+        )
+
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+    all_heads[dims.n_text_layer // 2:] = True
+    model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+    return model
+
+
+def load_converted(model_name: str, precision: str, download_root: Optional[str] = None) -> Any:
+    """
+    Load a Whisper checkpoint straight into int8 or bf16 weights
+
+    whisper.load_model() builds the model in fp32 and copies the checkpoint
+    into it, so converting afterwards holds the fp32 model and the converted
+    one at once. Here the parameters start on the meta device (no memory),
+    the checkpoint is memory-mapped and every layer is converted from the
+    mapped file on its own: the peak is the converted model plus one layer
+    in fp32. Whisper versions this does not fit (private checkpoint lookup
+    missing, or tensors left on the meta device) are loaded with
+    whisper.load_model() and converted afterwards.
+
+    Args:
+        model_name: Official model name or path to a checkpoint
+        precision: 'int8' or 'bf16'
+        download_root: Checkpoint directory (default: whisper's cache)
+
+    Returns:
+        Converted Whisper model on CPU
+    """
+    import itertools
+    import torch
+    from whisper.model import ModelDimensions
+
+    checkpoint_file = _checkpoint_file(model_name, download_root)
+    model = None
+    if checkpoint_file is not None:
+        path, alignment_heads = checkpoint_file
+        checkpoint = torch.load(path, map_location="cpu", weights_only=True, mmap=True)
+        model = empty_whisper(ModelDimensions(**checkpoint["dims"]))
+        model.load_state_dict(checkpoint.pop("model_state_dict"), assign=True)
+        if alignment_heads is not None:
+            model.set_alignment_heads(alignment_heads)
+        if any(tensor.is_meta for tensor in itertools.chain(model.parameters(), model.buffers())):
+            model = None
+
+    if model is None:
+        print(f"Warning: Cannot convert {model_name} while loading with this whisper version, "
+              f"loading it in fp32 first")
+        model = whisper.load_model(model_name, device="cpu", download_root=download_root)
+        return quantize_int8(model) if precision == 'int8' else convert_bf16(model)
+
+    if precision == 'int8':
+        quantize_int8(model)
+    return materialize_weights(model, precision)
+
+
+class WhisperBackend:
+    """openai-whisper on PyTorch, the reference engine"""
+
+    name = "whisper"
+    description = "OpenAI Whisper (PyTorch)"
+
+    def available(self) -> bool:
+        return WHISPER_AVAILABLE
+
+    def load(self, model_name: str, device: str = "cpu", precision: Optional[str] = None, **options) -> Any:
+        if precision in (None, 'fp32'):
+            return whisper.load_model(model_name, device=device, **options)
+
+        if device != "cpu":
+            raise ValueError(f"Precision {precision} is only supported on CPU")
+
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (available: {', '.join(PRECISIONS)})")
+        return load_converted(model_name, precision, options.get('download_root'))
+
+
+class FasterWhisperModel:
+    """
+    Adapter giving a faster-whisper model whisper's transcribe() interface
+
+    Streaming, chunking and the pool only rely on model.transcribe(), so the
+    adapter lets them run on CTranslate2 unchanged.
+    """
+
+    def __init__(self, model: Any, model_size_mb: Optional[float] = None):
+        self.model = model
+        self.model_size_mb = model_size_mb
+
+    def transcribe(
+        self,
+        audio: Any,
+        language: Optional[str] = None,
+        initial_prompt: Optional[str] = None,
+        verbose: Optional[bool] = None,
+        **options
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio and return a result shaped like whisper's
+
+        Args:
+            audio: File path or mono float32 audio at 16 kHz
+            language: Language code, None to detect it
+            initial_prompt: Text to condition the first window on
+            verbose: Print every segment like whisper does when True
+            **options: Decoding options; whisper-only ones are ignored
+
+        Returns:
+            Dict with 'text', 'segments' and 'language'
+        """
+        for key in WHISPER_ONLY_OPTIONS:
+            options.pop(key, None)
+        if isinstance(audio, Path):
+            audio = str(audio)
+
+        segments_iter, info = self.model.transcribe(
+            audio, language=language, initial_prompt=initial_prompt, **options
+        )
+
+        segments = []
+        for segment in segments_iter:
+            seg = convert_segment(segment, len(segments))
+            if verbose:
+                print(f"[{format_timestamp(seg['start'])} --> {format_timestamp(seg['end'])}] {seg['text']}")
+            segments.append(seg)
+
+        return {
+            'text': ''.join(seg['text'] for seg in segments),
+            'segments': segments,
+            'language': language or info.language,
+        }
+
+
+def convert_segment(segment: Any, segment_id: int) -> Dict[str, Any]:
+    """
+    Convert a faster-whisper segment into whisper's segment dict
+
+    Args:
+        segment: faster_whisper Segment
+        segment_id: Index of the segment in the result
+
+    Returns:
+        Segment dict with whisper's fields (and 'words' if present)
+    """
+    seg = {
+        'id': segment_id,
+        'seek': getattr(segment, 'seek', 0),
+        'start': float(segment.start),
+        'end': float(segment.end),
+        'text': segment.text,
+        'tokens': list(getattr(segment, 'tokens', None) or []),
+        'temperature': getattr(segment, 'temperature', 0.0),
+        'avg_logprob': getattr(segment, 'avg_logprob', 0.0),
+        'compression_ratio': getattr(segment, 'compression_ratio', 0.0),
+        'no_speech_prob': getattr(segment, 'no_speech_prob', 0.0),
+    }
+    words = getattr(segment, 'words', None)
+    if words:
+        seg['words'] = [
+            {
+                'word': word.word,
+                'start': float(word.start),
+                'end': float(word.end),
+                'probability': float(word.probability),
+            }
+            for word in words
+        ]
+    return seg
+
+
+class FasterWhisperBackend:
+    """CTranslate2 via faster-whisper, int8 on CPU"""
+
+    name = "faster-whisper"
+    description = "faster-whisper (CTranslate2 int8)"
+
+    def available(self) -> bool:
+        return FASTER_WHISPER_AVAILABLE
+
+    def load(self, model_name: str, device: str = "cpu", precision: Optional[str] = None, **options) -> Any:
+        if precision is not None and precision not in COMPUTE_TYPES:
+            raise ValueError(f"Unknown precision: {precision} (available: {', '.join(PRECISIONS)})")
+        default_type = COMPUTE_TYPES.get(precision) or ("int8" if device == "cpu" else "float16")
+        compute_type = options.pop('compute_type', default_type)
+        cpu_threads = options.pop('cpu_threads', _torch_threads())
+
+        model = faster_whisper.WhisperModel(
+            model_name,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            **options
+        )
+
+        # int8 weights take one byte per parameter
+        if compute_type.startswith('int8'):
+            bytes_per_param = 1
+        elif compute_type == 'float32':
+            bytes_per_param = 4
+        else:
+            bytes_per_param = 2
+        return FasterWhisperModel(model, estimate_model_mb(model_name, bytes_per_param))
+
+
+def _torch_threads() -> int:
+    """Use the thread count the worker set for torch (0 lets CTranslate2 decide)"""
+    try:
+        import torch
+        return torch.get_num_threads()
+    except ImportError:
+        return 0
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend(), FasterWhisperBackend())
+}
+
+
+def register_backend(backend: Any):
+    """
+    Add an inference backend
+
+    A backend needs name, description, available() and
+    load(model_name, device, **options) returning an object whose
+    transcribe(audio, language=..., initial_prompt=..., verbose=..., **options)
+    returns a whisper-shaped result.
+
+    Args:
+        backend: Backend instance
+    """
+    BACKENDS[backend.name] = backend
+
+
+def available_backends() -> List[str]:
+    """Return the names of the installed backends, default first"""
+    names = [name for name, backend in BACKENDS.items() if backend.available()]
+    names.sort(key=lambda name: name != DEFAULT_BACKEND)
+    return names
+
+
+def get_backend(name: str) -> Any:
+    """
+    Look up an installed backend by name
+
+    Args:
+        name: Backend name
+
+    Returns:
+        Backend instance
+
+    Raises:
+        ValueError: If the backend is unknown
+        ImportError: If the backend's package is not installed
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name} (available: {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]
+    if not backend.available():
+        raise ImportError(f"Backend {name} is not installed")
+    return backend
+
+
+def load_model(model_name: str, device: str = "cpu", backend: str = DEFAULT_BACKEND, **options) -> Any:
+    """
+    Load a model with the given backend; used as the model pool loader
+
+    Args:
+        model_name: Model to load
+        device: Device the model is placed on
+        backend: Backend name
+        **options: Backend-specific load options
+
+    Returns:
+        Model with a whisper-compatible transcribe()
+    """
+    return get_backend(backend).load(model_name, device, **options)
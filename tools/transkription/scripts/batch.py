@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Batch and playlist transcription with separate download and inference pools
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+# Sibling modules must be importable when this file is run as a script
+SCRIPTS_DIR = Path(__file__).parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import transcribe  # noqa: E402
+from chunking import _init_worker  # noqa: E402
+from resources import get_allocator  # noqa: E402
+from admission import memory_budget_mb, plan_admission  # noqa: E402
+from backends import BACKENDS  # noqa: E402
+
+
+def read_url_file(path: str) -> List[str]:
+    """
+    Read URLs from a text file, one per line
+
+    Empty lines and lines starting with # are skipped.
+
+    Args:
+        path: Path to the URL file
+
+    Returns:
+        List of URLs
+    """
+    urls = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                urls.append(line)
+    return urls
+
+
+def expand_playlist(url: str) -> List[str]:
+    """
+    Expand a playlist URL into its video URLs
+
+    Args:
+        url: Playlist or video URL
+
+    Returns:
+        Video URLs; a plain video URL is returned unchanged
+    """
+    if not transcribe.YTDLP_AVAILABLE or 'list=' not in url:
+        return [url]
+
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+    }
+
+    try:
+        with transcribe.yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        print(f"Error expanding playlist {url}: {e}")
+        return []
+
+    entries = info.get('entries') or []
+    urls = []
+    for entry in entries:
+        if not entry:
+            continue
+        video_url = entry.get('url') or entry.get('webpage_url')
+        if not video_url and entry.get('id'):
+            video_url = f"https://www.youtube.com/watch?v={entry['id']}"
+        if video_url:
+            urls.append(video_url)
+
+    print(f"Playlist {info.get('title', url)}: {len(urls)} videos")
+    return urls or [url]
+
+
+def with_retry(
+    func: Callable[[], Any],
+    retries: int = 3,
+    backoff_s: float = 5.0,
+    label: str = ""
+) -> Any:
+    """
+    Call func until it returns a result, backing off exponentially
+
+    A call fails when it raises or returns None.
+
+    Args:
+        func: Function without arguments
+        retries: Retries after the first attempt
+        backoff_s: Delay before the first retry, doubled each time
+        label: Description used in log messages
+
+    Returns:
+        The first result that is not None
+
+    Raises:
+        RuntimeError: If all attempts failed
+    """
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            result = func()
+            if result is not None:
+                return result
+            last_error = "no result"
+        except Exception as e:
+            last_error = str(e)
+
+        if attempt < retries:
+            # Jitter keeps parallel retries from hitting the server together
+            delay = backoff_s * (2 ** attempt) * random.uniform(0.8, 1.2)
+            print(f"Retry {attempt + 1}/{retries} for {label} in {delay:.0f}s ({last_error})")
+            time.sleep(delay)
+
+    raise RuntimeError(f"{label} failed after {retries + 1} attempts: {last_error}")
+
+
+def _transcribe_item(
+    audio_path: str,
+    model_name: str,
+    language: str,
+    backend: str,
+    precision: Optional[str]
+) -> Optional[str]:
+    """Transcribe one downloaded file in an inference worker process"""
+    return transcribe.transcribe_with_whisper(
+        audio_path, model_name, language, backend=backend, precision=precision
+    )
+
+
+def run_batch(
+    urls: List[str],
+    model_name: str = "base",
+    language: str = "de",
+    download_workers: int = 2,
+    inference_workers: int = 1,
+    retries: int = 3,
+    backoff_s: float = 5.0,
+    keep_audio: bool = False,
+    backend: str = transcribe.DEFAULT_BACKEND,
+    precision: Optional[str] = transcribe.DEFAULT_PRECISION,
+    download_concurrency: Optional[int] = None,
+    batched: bool = False
+) -> Dict[str, Any]:
+    """
+    Transcribe many videos, overlapping downloads with inference
+
+    Downloads run on a thread pool (network-bound), transcriptions on a
+    process pool (CPU-bound) where every worker keeps its model loaded.
+    The inference workers split one thread lease from the resource allocator.
+    At most download_workers + inference_workers downloaded files wait for
+    transcription at any time, so downloads cannot fill the disk.
+
+    In batched mode there is no process pool: inference_workers videos are
+    transcribed at once in this process and their 30 s windows are decoded
+    together in batched model calls (see batching.py).
+
+    Args:
+        urls: Video or playlist URLs
+        model_name: Whisper model to use
+        language: Language code for transcription
+        download_workers: Parallel downloads
+        inference_workers: Parallel transcription processes
+        retries: Retries per download and per transcription
+        backoff_s: Delay before the first retry, doubled each time
+        keep_audio: Whether to keep the audio files
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        download_concurrency: Parallel fragments/connections per download
+        batched: Share batched model calls between the videos being transcribed
+
+    Returns:
+        Summary report with per-item results and throughput
+
+    Raises:
+        RuntimeError: If not even the smallest model fits MAX_MEMORY_MB
+    """
+    budget_mb = memory_budget_mb()
+    if budget_mb and not batched:
+        # Durations are unknown before the downloads, so an hour per video is assumed
+        plan = plan_admission(model_name, budget_mb, budget_mb, backend=backend, precision=precision)
+        if plan['action'] == 'reject':
+            raise RuntimeError(f"Not enough memory: {plan['model']} needs about {plan['memory_mb']:.0f} MB")
+        if plan['downgraded']:
+            print(f"Not enough memory for {model_name}, using {plan['model']}")
+            model_name = plan['model']
+        fitting = max(1, int(budget_mb // plan['memory_mb']))
+        if inference_workers > fitting:
+            print(f"Memory budget {budget_mb:.0f} MB allows {fitting} transcription processes")
+            inference_workers = fitting
+
+    video_urls = []
+    for url in urls:
+        video_urls.extend(expand_playlist(url))
+
+    items = [{'url': url, 'status': 'pending'} for url in video_urls]
+    slots = threading.BoundedSemaphore(download_workers + inference_workers)
+    audio_format = "archive" if keep_audio else "native"
+    allocator = get_allocator()
+    start = time.time()
+
+    with ExitStack() as stack:
+        inference_pool = None
+        if batched:
+            # The scheduler takes its own thread lease while a batch runs
+            print(f"Batch: {len(items)} videos, {download_workers} downloads, "
+                  f"{inference_workers} transcriptions in shared batches")
+        else:
+            lease = stack.enter_context(
+                allocator.lease(threads=allocator.total_cores, min_threads=inference_workers)
+            )
+            threads = lease.worker_threads(inference_workers)
+            print(f"Batch: {len(items)} videos, {download_workers} downloads, "
+                  f"{inference_workers} transcriptions ({threads} threads each)")
+
+            context = multiprocessing.get_context("spawn")
+            inference_pool = stack.enter_context(ProcessPoolExecutor(
+                max_workers=inference_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(threads, lease.worker_cores())
+            ))
+        download_pool = stack.enter_context(ThreadPoolExecutor(max_workers=download_workers))
+
+        def download(item):
+            slots.acquire()
+            try:
+                download_start = time.time()
+                # One extraction yields the audio and its metadata; a retry
+                # resumes the partial file of the failed attempt
+                fetched = with_retry(
+                    lambda: transcribe.fetch_youtube_audio(
+                        item['url'], audio_format=audio_format, concurrency=download_concurrency
+                    ),
+                    retries, backoff_s, f"download {item['url']}"
+                )
+                item['audio'] = fetched['audio']
+                item['video_info'] = fetched['video_info']
+                item['download'] = fetched['download']
+                item['download_seconds'] = time.time() - download_start
+            except Exception:
+                slots.release()
+                raise
+
+        def transcribe_item(item):
+            # Runs on a dispatch thread that only waits on the process pool
+            # or, in batched mode, on the batch scheduler
+            def attempt():
+                if batched:
+                    return transcribe.transcribe_with_whisper(
+                        item['audio'], model_name, language, backend=backend, precision=precision,
+                        batched=True
+                    )
+                return inference_pool.submit(
+                    _transcribe_item, item['audio'], model_name, language, backend, precision
+                ).result()
+
+            try:
+                inference_start = time.time()
+                item['transcript'] = with_retry(attempt, retries, backoff_s, f"transcription {item['url']}")
+                item['inference_seconds'] = time.time() - inference_start
+                item['status'] = 'done'
+                transcribe.cache_transcription(
+                    item['url'], model_name, language, item['transcript'], item.get('video_info'),
+                    backend=backend, precision=precision
+                )
+                print(f"Done: {item['url']}")
+            except Exception as e:
+                item['status'] = 'failed'
+                item['error'] = str(e)
+                print(f"Failed: {item['url']}: {e}")
+            finally:
+                slots.release()
+                if not keep_audio and item.get('audio'):
+                    try:
+                        os.remove(item['audio'])
+                    except OSError as e:
+                        print(f"Warning: Could not remove audio file: {e}")
+
+        with ThreadPoolExecutor(max_workers=inference_workers) as dispatch_pool:
+            downloads = {}
+            for item in items:
+                cached = transcribe.get_cached_transcription(
+                    item['url'], model_name, language, backend=backend, precision=precision
+                )
+                if cached:
+                    item.update(status='done', cached=True, transcript=cached['transcript'],
+                                video_info=cached.get('video_info') or {})
+                    continue
+                downloads[download_pool.submit(download, item)] = item
+            transcriptions = []
+
+            # Hand every finished download to inference right away, so both
+            # pools stay busy at the same time
+            for future in as_completed(downloads):
+                item = downloads[future]
+                error = future.exception()
+                if error is not None:
+                    item['status'] = 'failed'
+                    item['error'] = str(error)
+                    print(f"Failed: {item['url']}: {error}")
+                    continue
+                transcriptions.append(dispatch_pool.submit(transcribe_item, item))
+
+            for future in transcriptions:
+                future.result()
+
+    return summarize_batch(items, time.time() - start)
+
+
+def summarize_batch(items: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """
+    Build the throughput report of a batch run
+
+    Args:
+        items: Per-item results
+        wall_seconds: Wall-clock duration of the batch
+
+    Returns:
+        Report dict
+    """
+    done = [item for item in items if item.get('status') == 'done']
+    audio_seconds = sum((item.get('video_info') or {}).get('duration') or 0 for item in done)
+    wall_hours = wall_seconds / 3600 if wall_seconds > 0 else 0
+    downloads = [item['download'] for item in items if item.get('download')]
+    download_bytes = sum(download['bytes'] for download in downloads)
+    download_seconds = sum(download['seconds'] for download in downloads)
+
+    return {
+        'videos': len(items),
+        'done': len(done),
+        'failed': len(items) - len(done),
+        'wall_seconds': wall_seconds,
+        'audio_seconds': audio_seconds,
+        'videos_per_hour': len(done) / wall_hours if wall_hours else 0.0,
+        'audio_hours_per_hour': (audio_seconds / 3600) / wall_hours if wall_hours else 0.0,
+        'download_bytes': download_bytes,
+        # Average bandwidth of a single download while it was running
+        'download_mbit_per_s': download_bytes * 8 / download_seconds / 1e6 if download_seconds else 0.0,
+        'items': [
+            {key: value for key, value in item.items() if key != 'video_info'}
+            for item in items
+        ],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the batch CLI"""
+    parser = argparse.ArgumentParser(
+        description="Transcribe a list of YouTube videos or playlists"
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help="URL file (one URL per line), video URL or playlist URL")
+    parser.add_argument('--model', default="base", help="Whisper model (default: base)")
+    parser.add_argument('--language', default="de", help="Language code (default: de)")
+    parser.add_argument('--backend', default=transcribe.DEFAULT_BACKEND,
+                        choices=sorted(BACKENDS),
+                        help=f"Inference engine (default: {transcribe.DEFAULT_BACKEND})")
+    parser.add_argument('--precision', default=transcribe.DEFAULT_PRECISION,
+                        choices=transcribe.PRECISIONS,
+                        help="Weight format (default: backend default)")
+    parser.add_argument('--download-workers', type=int, default=2,
+                        help="Parallel downloads (default: 2)")
+    parser.add_argument('--download-concurrency', type=int,
+                        help="Parallel fragments/connections per download (default: DOWNLOAD_CONCURRENCY or 4)")
+    parser.add_argument('--inference-workers', type=int, default=1,
+                        help="Parallel transcription processes (default: 1)")
+    parser.add_argument('--batched', action='store_true',
+                        help="Decode the windows of --inference-workers videos together in one process")
+    parser.add_argument('--retries', type=int, default=3,
+                        help="Retries per download and transcription (default: 3)")
+    parser.add_argument('--backoff', type=float, default=5.0,
+                        help="Seconds before the first retry, doubled each time (default: 5)")
+    parser.add_argument('--keep-audio', action='store_true', help="Keep downloaded audio files")
+    parser.add_argument('--report', help="Write the JSON report to this file")
+    return parser
+
+
+def main():
+    """Main function for CLI usage"""
+    args = build_parser().parse_args()
+
+    if not transcribe.YTDLP_AVAILABLE:
+        print("Error: yt-dlp is not installed. Run: pip install yt-dlp")
+        sys.exit(1)
+
+    if args.model == transcribe.AUTO_MODEL:
+        print("Error: The auto model needs a latency budget per video; choose a model for batches")
+        sys.exit(1)
+
+    try:
+        transcribe.get_backend(args.backend)
+    except ImportError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    urls = []
+    for value in args.inputs:
+        if Path(value).is_file():
+            urls.extend(read_url_file(value))
+        else:
+            urls.append(value)
+
+    try:
+        report = run_batch(
+            urls,
+            model_name=args.model,
+            language=args.language,
+            download_workers=args.download_workers,
+            inference_workers=args.inference_workers,
+            retries=args.retries,
+            backoff_s=args.backoff,
+            keep_audio=args.keep_audio,
+            backend=args.backend,
+            precision=args.precision,
+            download_concurrency=args.download_concurrency,
+            batched=args.batched
+        )
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    report_path = args.report
+    if report_path is None:
+        report_dir = Path(__file__).parent.parent / "data" / "raw"
+        report_dir.mkdir(parents=True, exist_ok=True)
+        report_path = report_dir / f"batch_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\nBatch completed: {report['done']}/{report['videos']} videos "
+          f"({report['failed']} failed) in {report['wall_seconds'] / 60:.1f} min")
+    print(f"Throughput: {report['videos_per_hour']:.1f} videos/hour, "
+          f"{report['audio_hours_per_hour']:.2f} audio-hours/hour, "
+          f"downloads {report['download_mbit_per_s']:.1f} Mbit/s")
+    print(f"Report: {report_path}")
+
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
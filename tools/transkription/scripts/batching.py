@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Batched inference: 30-second windows of several transcriptions in one model call
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Tuple, Callable, ContextManager
+
+import numpy as np
+
+from chunking import SAMPLE_RATE, find_silence_boundaries
+
+# Whisper's encoder always sees 30 s; windows are cut at a silence within
+# the last WINDOW_SEARCH_SECONDS so words are not split between windows
+WINDOW_SECONDS = 30
+WINDOW_SEARCH_SECONDS = 3
+
+# Windows per encoder/decoder call, and how long the dispatcher waits for
+# more windows before running a partial batch
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_S = 0.05
+
+# Seconds per timestamp token; a shorter rest of a window is not decoded again
+TIMESTAMP_RESOLUTION = 0.02
+MIN_SEEK_SAMPLES = int(TIMESTAMP_RESOLUTION * SAMPLE_RATE)
+
+# Windows whisper would treat as silence (same thresholds as transcribe())
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+# Temperature fallback of transcribe(): windows whose text is too repetitive
+# (compression ratio) or too unlikely (logprob) are decoded again, sampling
+# best_of candidates at the next temperature
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+BEST_OF = 5
+
+
+def split_windows(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    Cut audio into windows of at most WINDOW_SECONDS, preferably at silences
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+
+    Returns:
+        List of (start, end) sample positions
+    """
+    if len(audio) == 0:
+        return []
+    cuts = find_silence_boundaries(
+        audio, sample_rate, WINDOW_SECONDS - WINDOW_SEARCH_SECONDS, WINDOW_SEARCH_SECONDS
+    )
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def tokens_to_segments(
+    tokens: List[int],
+    timestamp_begin: int,
+    decode: Callable[[List[int]], str],
+    duration: float
+) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Split the tokens of one window into segments the way transcribe() does
+
+    Two consecutive timestamp tokens close one segment and open the next.
+    Text after the last closed segment is dropped unless the window ends
+    with a single timestamp: like transcribe(), the caller decodes the rest
+    of the window again, starting at the last timestamp.
+
+    Args:
+        tokens: Decoded tokens without the start-of-transcript sequence
+        timestamp_begin: ID of the first timestamp token (<|0.00|>)
+        decode: Turns text tokens into a string
+        duration: Window length in seconds
+
+    Returns:
+        Segment dicts with start, end (relative to the window) and text, and
+        the seconds of the window they cover (the seek for the next window)
+    """
+    def seconds(token: int) -> float:
+        return (token - timestamp_begin) * TIMESTAMP_RESOLUTION
+
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+    single_timestamp_ending = is_timestamp[-2:] == [False, True]
+    slices = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+
+    if not slices:
+        # No segment boundary: the whole window is one segment
+        text_tokens = [token for token in tokens if token < timestamp_begin]
+        timestamps = [token for token in tokens if token >= timestamp_begin]
+        end = duration
+        if timestamps and timestamps[-1] != timestamp_begin:
+            end = seconds(timestamps[-1])
+        segments = [{'start': 0.0, 'end': end, 'text': decode(text_tokens)}] if text_tokens else []
+        return segments, duration
+
+    if single_timestamp_ending:
+        slices.append(len(tokens))
+
+    segments = []
+    last_slice = 0
+    for current_slice in slices:
+        sliced = tokens[last_slice:current_slice]
+        text_tokens = [token for token in sliced if token < timestamp_begin]
+        if text_tokens:
+            segments.append({'start': seconds(sliced[0]), 'end': seconds(sliced[-1]), 'text': decode(text_tokens)})
+        last_slice = current_slice
+
+    if single_timestamp_ending:
+        return segments, duration
+    return segments, min(seconds(tokens[last_slice - 1]), duration)
+
+
+def needs_fallback(decoded: Any) -> bool:
+    """Whether transcribe() would decode a window again at a higher temperature"""
+    too_unlikely = decoded.avg_logprob < LOGPROB_THRESHOLD
+    if decoded.no_speech_prob > NO_SPEECH_THRESHOLD and too_unlikely:
+        return False  # silence; dropped, not decoded again
+    return decoded.compression_ratio > COMPRESSION_RATIO_THRESHOLD or too_unlikely
+
+
+def supports_batching(model: Any) -> bool:
+    """Whether the model is an openai-whisper model that decodes mel batches"""
+    return hasattr(model, 'dims') and hasattr(model, 'decode')
+
+
+def decode_windows(model: Any, windows: List[np.ndarray], language: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Decode windows of up to 30 s in one batched encoder and decoder call
+
+    Windows that fail the compression ratio or logprob check are decoded
+    again at the next temperature of TEMPERATURES. Models without
+    batch support (faster-whisper) decode the windows one by one with their
+    own fallback.
+
+    Args:
+        model: Loaded model
+        windows: Mono float32 audio windows
+        language: Language code for transcription
+
+    Returns:
+        One dict per window with 'segments' (times relative to the window),
+        'avg_logprob' and 'consumed', the seconds covered by the segments;
+        the rest of the window has to be decoded again
+    """
+    if not supports_batching(model):
+        results = []
+        for window in windows:
+            result = model.transcribe(window, language=language, fp16=False, verbose=None, temperature=TEMPERATURES)
+            results.append({
+                'segments': result['segments'], 'avg_logprob': None, 'consumed': len(window) / SAMPLE_RATE
+            })
+        return results
+
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(window), model.dims.n_mels) for window in windows
+    ]).to(model.device)
+    tokenizer = get_tokenizer(
+        model.is_multilingual, num_languages=model.num_languages, language=language, task="transcribe"
+    )
+
+    options = whisper.DecodingOptions(language=language, fp16=False, temperature=0.0)
+    decoded = [(result, 0.0) for result in whisper.decode(model, mel, options)]
+
+    # whisper only samples best_of candidates for a single mel (it does not
+    # repeat the audio features of a batch), so the fallback runs per window
+    for index, (result, _) in enumerate(decoded):
+        for temperature in TEMPERATURES[1:]:
+            if not needs_fallback(result):
+                break
+            options = whisper.DecodingOptions(
+                language=language, fp16=False, temperature=temperature, best_of=BEST_OF
+            )
+            result = whisper.decode(model, mel[index:index + 1], options)[0]
+            decoded[index] = (result, temperature)
+
+    results = []
+    for window, (result, temperature) in zip(windows, decoded):
+        duration = len(window) / SAMPLE_RATE
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            results.append({'segments': [], 'avg_logprob': result.avg_logprob, 'consumed': duration})
+            continue
+        segments, consumed = tokens_to_segments(
+            result.tokens, tokenizer.timestamp_begin, tokenizer.decode, duration
+        )
+        for segment in segments:
+            segment.update(
+                avg_logprob=result.avg_logprob,
+                temperature=temperature,
+                compression_ratio=result.compression_ratio,
+                no_speech_prob=result.no_speech_prob,
+            )
+        results.append({'segments': segments, 'avg_logprob': result.avg_logprob, 'consumed': consumed})
+    return results
+
+
+class _Ticket:
+    """Windows of one submitted transcription and their results"""
+
+    def __init__(self, language: Optional[str], windows: int, on_window: Optional[Callable[[float], None]]):
+        self.future: Future = Future()
+        self.language = language
+        self.results: List[Tuple[float, List[Dict[str, Any]]]] = []
+        self.remaining = windows
+        self.on_window = on_window
+
+    def assemble(self) -> Dict[str, Any]:
+        """Join the window results into one transcribe()-style result"""
+        segments = []
+        for offset, window_segments in sorted(self.results, key=lambda result: result[0]):
+            for segment in window_segments:
+                segment = dict(segment, start=segment['start'] + offset, end=segment['end'] + offset)
+                segment['id'] = len(segments)
+                segments.append(segment)
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': self.language,
+        }
+
+
+class BatchScheduler:
+    """
+    Pools the 30-second windows of all submitted transcriptions into batches
+
+    Every submit() splits its audio into windows and queues them. One
+    dispatcher thread takes up to batch_size windows of the same language,
+    oldest first and from any transcription, runs one batched encoder and
+    decoder call and routes each result back to its transcription. Like
+    transcribe(), a window whose text ends in an unfinished segment is
+    decoded again from its last timestamp; the rest goes to the front of the
+    queue. Windows are decoded without the previous window's text as prompt.
+    """
+
+    def __init__(
+        self,
+        use_model: Callable[[], ContextManager[Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_wait_s: float = DEFAULT_MAX_WAIT_S,
+        decode: Callable[[Any, List[np.ndarray], Optional[str]], List[Dict[str, Any]]] = decode_windows,
+        on_batch: Optional[Callable[[float, float], None]] = None
+    ):
+        self.use_model = use_model
+        self.on_batch = on_batch
+        self.batch_size = max(1, batch_size)
+        self.max_wait_s = max_wait_s
+        self.decode = decode
+        self._pending: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._batches = 0
+        self._windows = 0
+        self._decode_seconds = 0.0
+
+    def submit(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        on_window: Optional[Callable[[float], None]] = None
+    ) -> Future:
+        """
+        Queue a transcription
+
+        Args:
+            audio: Mono float32 audio at 16 kHz
+            language: Language code for transcription
+            on_window: Called with the seconds of every decoded window
+
+        Returns:
+            Future of a transcribe()-style result dict
+        """
+        spans = split_windows(audio)
+        ticket = _Ticket(language, len(spans), on_window)
+        if not spans:
+            ticket.future.set_result(ticket.assemble())
+            return ticket.future
+
+        with self._condition:
+            for start, end in spans:
+                self._pending.append((ticket, start / SAMPLE_RATE, audio[start:end]))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return ticket.future
+
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        language: Optional[str] = None,
+        on_window: Optional[Callable[[float], None]] = None
+    ) -> Dict[str, Any]:
+        """Submit a transcription and wait for its result"""
+        return self.submit(audio, language, on_window).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batches run, windows decoded, mean batch size and decode time"""
+        with self._condition:
+            return {
+                'batches': self._batches,
+                'windows': self._windows,
+                'mean_batch': self._windows / self._batches if self._batches else 0.0,
+                'decode_seconds': self._decode_seconds,
+                'pending': len(self._pending),
+            }
+
+    def _next_batch(self) -> List[Tuple[_Ticket, float, np.ndarray]]:
+        """Wait for windows and take up to batch_size of the oldest window's language"""
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            # Give other transcriptions a moment to add windows to a partial batch
+            deadline = time.time() + self.max_wait_s
+            while len(self._pending) < self.batch_size and time.time() < deadline:
+                self._condition.wait(deadline - time.time())
+
+            language = self._pending[0][0].language
+            batch, rest = [], deque()
+            while self._pending:
+                entry = self._pending.popleft()
+                if entry[0].future.done():
+                    continue  # a failed transcription's remaining windows
+                if len(batch) < self.batch_size and entry[0].language == language:
+                    batch.append(entry)
+                else:
+                    rest.append(entry)
+            self._pending = rest
+            return batch
+
+    def _run(self):
+        """Dispatcher loop"""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            start = time.time()
+            try:
+                with self.use_model() as model:
+                    results = self.decode(model, [window for _, _, window in batch], batch[0][0].language)
+                    if len(results) != len(batch):
+                        raise RuntimeError(f"Decoder returned {len(results)} results for {len(batch)} windows")
+                    if self.on_batch:
+                        # Inside the model block, so the batch's thread lease still applies
+                        self.on_batch(sum(len(window) for _, _, window in batch) / SAMPLE_RATE, time.time() - start)
+            except Exception as e:
+                for ticket in {entry[0] for entry in batch}:
+                    if not ticket.future.done():
+                        ticket.future.set_exception(e)
+                continue
+
+            with self._condition:
+                self._batches += 1
+                self._windows += len(batch)
+                self._decode_seconds += time.time() - start
+
+            for (ticket, offset, window), result in zip(batch, results):
+                if ticket.future.done():
+                    continue
+                ticket.results.append((offset, result['segments']))
+                consumed = int(result.get('consumed', len(window) / SAMPLE_RATE) * SAMPLE_RATE)
+                if 0 < consumed and len(window) - consumed >= MIN_SEEK_SAMPLES:
+                    with self._condition:
+                        self._pending.appendleft((ticket, offset + consumed / SAMPLE_RATE, window[consumed:]))
+                        self._condition.notify()
+                else:
+                    consumed = len(window)
+                    ticket.remaining -= 1
+                try:
+                    if ticket.on_window:
+                        ticket.on_window(consumed / SAMPLE_RATE)
+                    if ticket.remaining == 0:
+                        ticket.future.set_result(ticket.assemble())
+                except Exception as e:
+                    ticket.future.set_exception(e)
+
+
+_schedulers: Dict[Tuple, BatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(key: Tuple, create: Callable[[], BatchScheduler]) -> BatchScheduler:
+    """
+    Return the process-wide scheduler for a key (model, device, backend, ...)
+
+    All transcriptions of one model in a process share its scheduler, so
+    their windows are decoded in the same batches.
+    """
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = create()
+        return _schedulers[key]
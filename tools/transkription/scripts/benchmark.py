@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Compare backends and weight formats by memory, speed and word error rate
+"""
+
+import argparse
+import json
+import multiprocessing
+import re
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+# Sibling modules must be importable when this file is run as a script
+SCRIPTS_DIR = Path(__file__).parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from chunking import SAMPLE_RATE  # noqa: E402
+from audio import decode_audio  # noqa: E402
+from resources import describe_hardware, current_threads  # noqa: E402
+from model_select import record_rtf  # noqa: E402
+
+DEFAULT_CONFIGS = ["whisper:fp32", "whisper:int8", "whisper:bf16", "faster-whisper:int8"]
+DEFAULT_BATCH_SIZES = [1, 4, 8]
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase text and split it into words without punctuation"""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Compute the word error rate of hypothesis against reference
+
+    Args:
+        reference: Reference transcript
+        hypothesis: Transcript to score
+
+    Returns:
+        (substitutions + deletions + insertions) / reference words
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+
+    return previous[-1] / len(ref)
+
+
+def parse_config(config: str) -> Tuple[str, Optional[str]]:
+    """Split 'backend:precision' (precision optional)"""
+    backend, _, precision = config.partition(':')
+    return backend, precision or None
+
+
+def _run_config(
+    audio: np.ndarray,
+    model_name: str,
+    language: Optional[str],
+    backend: str,
+    precision: Optional[str],
+    threads: Optional[int]
+) -> Dict[str, Any]:
+    """Load and run one configuration in a fresh worker process"""
+    from backends import load_model
+    from model_pool import measure_model_mb
+
+    if threads:
+        from chunking import _init_worker
+        _init_worker(threads)
+
+    start = time.time()
+    model = load_model(model_name, "cpu", backend, precision=precision)
+    load_seconds = time.time() - start
+    # ru_maxrss is in KB on Linux; includes the mapped checkpoint of int8/bf16
+    load_peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    start = time.time()
+    result = model.transcribe(audio, language=language, fp16=False, verbose=None, temperature=0.0)
+    inference_seconds = time.time() - start
+
+    audio_seconds = len(audio) / SAMPLE_RATE
+    return {
+        'load_seconds': load_seconds,
+        'inference_seconds': inference_seconds,
+        'rtf': inference_seconds / audio_seconds if audio_seconds else 0.0,
+        'threads': current_threads(),
+        'model_mb': measure_model_mb(model),
+        'load_peak_mb': load_peak_mb,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'text': result['text'],
+    }
+
+
+def run_benchmark(
+    audio: np.ndarray,
+    model_name: str = "base",
+    language: Optional[str] = "de",
+    configs: Optional[List[str]] = None,
+    reference: Optional[str] = None,
+    threads: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Benchmark configurations on the same audio
+
+    Every configuration runs in its own process, so peak memory is measured
+    without models of earlier runs. Without a reference transcript, WER is
+    computed against the first configuration.
+
+    Args:
+        audio: Mono float32 audio at 16 kHz
+        model_name: Whisper model to use
+        language: Language code for transcription
+        configs: 'backend:precision' strings
+        reference: Reference transcript for WER
+        threads: Torch/CTranslate2 threads per run (default: all cores)
+
+    Returns:
+        Report dict with one entry per configuration
+    """
+    configs = configs or DEFAULT_CONFIGS
+    context = multiprocessing.get_context("spawn")
+    results = []
+
+    for config in configs:
+        backend, precision = parse_config(config)
+        print(f"Benchmarking {model_name} on {config}...")
+        entry = {'config': config, 'backend': backend, 'precision': precision}
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                entry.update(executor.submit(
+                    _run_config, audio, model_name, language, backend, precision, threads
+                ).result())
+        except Exception as e:
+            print(f"Error: {config} failed: {e}")
+            entry['error'] = str(e)
+        results.append(entry)
+
+    baseline = reference
+    wer_reference = 'reference' if reference is not None else None
+    if baseline is None:
+        first = next((entry for entry in results if 'text' in entry), None)
+        if first is not None:
+            baseline = first['text']
+            wer_reference = first['config']
+
+    for entry in results:
+        if 'text' in entry and baseline is not None:
+            entry['wer'] = word_error_rate(baseline, entry['text'])
+
+    return {
+        'model': model_name,
+        'language': language,
+        'audio_seconds': len(audio) / SAMPLE_RATE,
+        'wer_reference': wer_reference,
+        'hardware': describe_hardware(),
+        'results': results,
+    }
+
+
+def run_batching_benchmark(
+    audio: np.ndarray,
+    model_name: str = "base",
+    language: Optional[str] = "de",
+    jobs: int = 4,
+    batch_sizes: Optional[List[int]] = None,
+    backend: str = "whisper",
+    precision: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Measure the throughput of batched decoding against per-job decoding
+
+    The audio is transcribed as `jobs` concurrent jobs. 'per-job' runs them
+    through model.transcribe() one after another; every batch size submits
+    all jobs to one BatchScheduler at once. Batch size 1 isolates the effect
+    of batching from that of the independent 30 s windows.
+
+    Args:
+        audio: Mono float32 audio at 16 kHz
+        model_name: Whisper model to use
+        language: Language code for transcription
+        jobs: Concurrent jobs
+        batch_sizes: Windows per model call to compare
+        backend: Inference backend
+        precision: Weight format, None for the backend default
+
+    Returns:
+        Report dict with one entry per mode
+    """
+    from backends import load_model
+    from batching import BatchScheduler
+
+    batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+    model = load_model(model_name, "cpu", backend, precision=precision)
+    audio_seconds = len(audio) / SAMPLE_RATE * jobs
+    results = []
+
+    print(f"Benchmarking {jobs} jobs one after another...")
+    start = time.time()
+    for _ in range(jobs):
+        model.transcribe(audio, language=language, fp16=False, verbose=None, temperature=0.0)
+    results.append({'mode': 'per-job', 'seconds': time.time() - start, 'mean_batch': 1.0})
+
+    for batch_size in batch_sizes:
+        print(f"Benchmarking {jobs} jobs in batches of {batch_size}...")
+        scheduler = BatchScheduler(lambda: nullcontext(model), batch_size=batch_size)
+        start = time.time()
+        futures = [scheduler.submit(audio, language) for _ in range(jobs)]
+        for future in futures:
+            future.result()
+        results.append({
+            'mode': f'batch {batch_size}',
+            'seconds': time.time() - start,
+            'mean_batch': scheduler.stats()['mean_batch'],
+        })
+
+    baseline = results[0]['seconds']
+    for entry in results:
+        entry['audio_seconds_per_second'] = audio_seconds / entry['seconds'] if entry['seconds'] else 0.0
+        entry['speedup'] = baseline / entry['seconds'] if entry['seconds'] else 0.0
+
+    return {
+        'model': model_name,
+        'backend': backend,
+        'precision': precision,
+        'language': language,
+        'jobs': jobs,
+        'audio_seconds': audio_seconds,
+        'threads': current_threads(),
+        'hardware': describe_hardware(),
+        'results': results,
+    }
+
+
+def print_batching_report(report: Dict[str, Any]):
+    """Print the batching benchmark as a table"""
+    print(f"\nModel {report['model']}, {report['jobs']} jobs, {report['audio_seconds']:.0f}s audio, "
+          f"{report['threads']} threads")
+    print(f"{'Mode':<10} {'Seconds':>8} {'Audio s/s':>10} {'Batch':>6} {'Speedup':>8}")
+    for entry in report['results']:
+        print(f"{entry['mode']:<10} {entry['seconds']:>8.1f} {entry['audio_seconds_per_second']:>10.1f} "
+              f"{entry['mean_batch']:>6.1f} {entry['speedup']:>7.2f}x")
+
+
+def print_report(report: Dict[str, Any]):
+    """Print the benchmark results as a table"""
+    print(f"\nModel {report['model']}, {report['audio_seconds']:.0f}s audio, "
+          f"WER against {report['wer_reference'] or '-'}")
+    print(f"{'Config':<22} {'Model MB':>9} {'Load MB':>8} {'Peak MB':>8} {'Load s':>7} {'RTF':>6} {'WER':>6}")
+    for entry in report['results']:
+        if 'error' in entry:
+            print(f"{entry['config']:<22} failed: {entry['error']}")
+            continue
+        print(f"{entry['config']:<22} {entry['model_mb'] or 0:>9.0f} {entry['load_peak_mb']:>8.0f} "
+              f"{entry['peak_rss_mb']:>8.0f} {entry['load_seconds']:>7.1f} {entry['rtf']:>6.2f} "
+              f"{entry.get('wer', 0):>6.1%}")
+
+
+def main():
+    """Main function for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description="Compare inference backends and weight formats on an audio file"
+    )
+    parser.add_argument('audio', help="Audio or video file")
+    parser.add_argument('--model', default="base", help="Whisper model (default: base)")
+    parser.add_argument('--language', default="de", help="Language code (default: de)")
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS,
+                        help="backend:precision entries (default: %(default)s)")
+    parser.add_argument('--reference', help="Text file with the reference transcript for WER")
+    parser.add_argument('--seconds', type=float, help="Only use the first N seconds of audio")
+    parser.add_argument('--threads', type=int, help="Threads per run (default: all cores)")
+    parser.add_argument('--report', help="Write the JSON report to this file")
+    parser.add_argument('--save-profile', action='store_true',
+                        help="Store the measured RTFs for the auto model")
+    parser.add_argument('--batching', action='store_true',
+                        help="Compare batched against per-job decoding (first config only)")
+    parser.add_argument('--jobs', type=int, default=4, help="Concurrent jobs for --batching (default: 4)")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES,
+                        help="Batch sizes for --batching (default: %(default)s)")
+    args = parser.parse_args()
+
+    audio = decode_audio(args.audio)
+    if args.seconds:
+        audio = audio[:int(args.seconds * SAMPLE_RATE)]
+
+    if args.batching:
+        backend, precision = parse_config(args.configs[0])
+        report = run_batching_benchmark(
+            audio, args.model, args.language, args.jobs, args.batch_sizes, backend, precision
+        )
+        print_batching_report(report)
+        prefix = "benchmark_batching"
+    else:
+        reference = None
+        if args.reference:
+            with open(args.reference, 'r', encoding='utf-8') as f:
+                reference = f.read()
+
+        report = run_benchmark(audio, args.model, args.language, args.configs, reference, args.threads)
+        print_report(report)
+        prefix = "benchmark"
+
+        if args.save_profile:
+            for entry in report['results']:
+                if 'error' not in entry:
+                    record_rtf(
+                        report['model'], report['audio_seconds'], entry['inference_seconds'],
+                        entry['threads'], entry['backend'], entry['precision']
+                    )
+            print("RTF profile updated")
+
+    report_path = args.report
+    if report_path is None:
+        report_dir = Path(__file__).parent.parent / "data" / "raw"
+        report_dir.mkdir(parents=True, exist_ok=True)
+        report_path = report_dir / f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nReport: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Silence-aware chunked transcription across a process pool
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Chunks are kept long so Whisper still conditions on several minutes of
+# previous text inside each chunk; only the chunk starts lose that context
+DEFAULT_CHUNK_SECONDS = 300
+DEFAULT_SEARCH_SECONDS = 30
+
+
+def frame_energy_db(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_s: float = 0.02) -> np.ndarray:
+    """
+    Compute per-frame RMS energy in dB
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        frame_s: Frame length in seconds
+
+    Returns:
+        Array with one energy value per frame
+    """
+    frame_len = max(1, int(sample_rate * frame_s))
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def smoothed_energy_db(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_s: float = 0.02,
+    smooth_s: float = 0.5
+) -> np.ndarray:
+    """
+    Compute frame energy smoothed over smooth_s
+
+    Smoothing makes a cut land in the middle of a pause rather than on a
+    single quiet frame between two words.
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        frame_s: Energy frame length in seconds
+        smooth_s: Smoothing window in seconds
+
+    Returns:
+        Array with one smoothed energy value per frame
+    """
+    energy = frame_energy_db(audio, sample_rate, frame_s)
+    smooth = max(1, int(smooth_s / frame_s))
+    if len(energy) >= smooth:
+        energy = np.convolve(energy, np.ones(smooth) / smooth, mode='same')
+    return energy
+
+
+def find_silence_boundaries(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    target_chunk_s: float = DEFAULT_CHUNK_SECONDS,
+    search_window_s: float = DEFAULT_SEARCH_SECONDS,
+    frame_s: float = 0.02,
+    smooth_s: float = 0.5
+) -> List[int]:
+    """
+    Find cut points close to every target_chunk_s that fall into silence
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        target_chunk_s: Desired chunk length in seconds
+        search_window_s: How far around each target to look for silence
+        frame_s: Energy frame length in seconds
+        smooth_s: Smoothing window in seconds
+
+    Returns:
+        Sample positions of the cuts, starting with 0 and ending with len(audio)
+    """
+    total = len(audio)
+    target = int(target_chunk_s * sample_rate)
+    if total <= target + int(search_window_s * sample_rate):
+        return [0, total]
+
+    energy = smoothed_energy_db(audio, sample_rate, frame_s, smooth_s)
+    frame_len = max(1, int(sample_rate * frame_s))
+
+    search = int(search_window_s / frame_s)
+    boundaries = [0]
+    position = 0
+
+    while total - position > target + search * frame_len:
+        center = (position + target) // frame_len
+        lo = max(position // frame_len + 1, center - search)
+        hi = min(len(energy), center + search + 1)
+        cut_frame = lo + int(np.argmin(energy[lo:hi]))
+        position = cut_frame * frame_len
+        boundaries.append(position)
+
+    boundaries.append(total)
+    return boundaries
+
+
+def find_silence_cut(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    target_s: float = DEFAULT_CHUNK_SECONDS,
+    search_window_s: float = DEFAULT_SEARCH_SECONDS,
+    frame_s: float = 0.02,
+    smooth_s: float = 0.5
+) -> int:
+    """
+    Find the quietest cut point within search_window_s of target_s
+
+    Only audio up to target_s + search_window_s is inspected, so this works on
+    a buffer that is still growing.
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        target_s: Desired cut position in seconds
+        search_window_s: How far around the target to look for silence
+        frame_s: Energy frame length in seconds
+        smooth_s: Smoothing window in seconds
+
+    Returns:
+        Sample position of the cut
+    """
+    lo = max(1, int((target_s - search_window_s) * sample_rate))
+    hi = min(len(audio), int((target_s + search_window_s) * sample_rate))
+    if hi <= lo:
+        return len(audio)
+
+    energy = smoothed_energy_db(audio[lo:hi], sample_rate, frame_s, smooth_s)
+    if len(energy) == 0:
+        return hi
+
+    frame_len = max(1, int(sample_rate * frame_s))
+    return lo + int(np.argmin(energy)) * frame_len
+
+
+def split_audio(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    target_chunk_s: float = DEFAULT_CHUNK_SECONDS,
+    search_window_s: float = DEFAULT_SEARCH_SECONDS
+) -> List[Tuple[int, int]]:
+    """
+    Split audio into (start, end) sample spans cut at silence
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        target_chunk_s: Desired chunk length in seconds
+        search_window_s: How far around each target to look for silence
+
+    Returns:
+        List of (start, end) sample spans
+    """
+    boundaries = find_silence_boundaries(audio, sample_rate, target_chunk_s, search_window_s)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def offset_segments(segments: List[Dict[str, Any]], offset_s: float) -> List[Dict[str, Any]]:
+    """
+    Shift segment timestamps by offset_s seconds
+
+    Args:
+        segments: Whisper segments relative to a chunk
+        offset_s: Chunk start in the original audio
+
+    Returns:
+        New segment dicts on the original timeline
+    """
+    shifted = []
+    for seg in segments:
+        seg = dict(seg)
+        seg['start'] = seg['start'] + offset_s
+        seg['end'] = seg['end'] + offset_s
+        shifted.append(seg)
+    return shifted
+
+
+def merge_results(results: List[Dict[str, Any]], language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Stitch chunk results (already on the original timeline) into one result
+
+    Args:
+        results: Per-chunk results in audio order
+        language: Requested language
+
+    Returns:
+        Result dict shaped like whisper's transcribe() output
+    """
+    segments = []
+    for result in results:
+        segments.extend(result['segments'])
+
+    for i, seg in enumerate(segments):
+        seg['id'] = i
+
+    detected = next((r.get('language') for r in results if r.get('language')), None)
+    return {
+        'text': ''.join(seg['text'] for seg in segments),
+        'segments': segments,
+        'language': language or detected,
+    }
+
+
+def _init_worker(threads: int, cores: Optional[List[int]] = None):
+    """Limit threads (and cores) so parallel workers do not oversubscribe the CPU"""
+    from resources import apply_thread_limits, configure_allocator
+    apply_thread_limits(threads, cores)
+    # Leases taken in this process (use_whisper_model) get exactly this share;
+    # the affinity is already set for the whole process
+    configure_allocator(total_cores=threads, max_jobs=1, oversubscription=1.0, pin=False)
+
+
+def _transcribe_chunk(
+    chunk: np.ndarray,
+    offset_s: float,
+    model_name: str,
+    device: str,
+    language: Optional[str],
+    options: Dict[str, Any],
+    backend: str = "whisper",
+    precision: Optional[str] = None
+) -> Dict[str, Any]:
+    """Transcribe one chunk in a worker process"""
+    from model_pool import get_model_pool
+    from backends import load_model
+    from model_select import record_rtf
+    from resources import current_threads
+
+    model = get_model_pool().get(
+        model_name, device, loader=load_model, backend=backend, precision=precision
+    )
+    start = time.time()
+    result = model.transcribe(chunk, language=language, fp16=False, verbose=False, **options)
+    # Feeds the speed profile used by the auto model, from every worker process
+    record_rtf(
+        model_name, len(chunk) / SAMPLE_RATE, time.time() - start,
+        current_threads(), backend, precision, device
+    )
+    return {
+        'segments': offset_segments(result['segments'], offset_s),
+        'language': result.get('language', language),
+    }
+
+
+def memory_worker_limit(
+    model_name: str,
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    target_chunk_s: float = DEFAULT_CHUNK_SECONDS
+) -> Optional[int]:
+    """
+    Count the chunk workers that fit into the available memory
+
+    Every worker is a spawned process with its own copy of the model, so the
+    memory, not the core count, limits larger models.
+
+    Args:
+        model_name: Whisper model each worker loads
+        backend: Inference backend
+        precision: Weight format, None for the backend default
+        target_chunk_s: Chunk length a worker holds at once
+
+    Returns:
+        Number of workers (at least 1), None if the available memory is unknown
+    """
+    from admission import estimate_job_mb, memory_budget_mb, read_available_memory
+
+    limits = [mb for mb in (memory_budget_mb(), read_available_memory()) if mb is not None]
+    if not limits:
+        return None
+    worker_mb = estimate_job_mb(
+        model_name, duration_s=target_chunk_s, backend=backend, precision=precision
+    )
+    return max(1, int(min(limits) // worker_mb))
+
+
+def transcribe_chunked(
+    audio: np.ndarray,
+    model_name: str = "base",
+    language: Optional[str] = "de",
+    device: str = "cpu",
+    workers: Optional[int] = None,
+    target_chunk_s: float = DEFAULT_CHUNK_SECONDS,
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    on_chunk: Optional[Callable[[float], None]] = None,
+    **options
+) -> Dict[str, Any]:
+    """
+    Transcribe audio in silence-bounded chunks on parallel worker processes
+
+    Args:
+        audio: Mono float32 audio at 16 kHz
+        model_name: Whisper model to use
+        language: Language code for transcription
+        device: Device to run the model on
+        workers: Number of worker processes (default: leased threads, capped
+            by the available memory, see memory_worker_limit(); max chunks)
+        target_chunk_s: Desired chunk length in seconds
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        on_chunk: Called with the length in seconds of every finished chunk
+        **options: Extra options passed to model.transcribe()
+
+    Returns:
+        Result dict shaped like whisper's transcribe() output
+    """
+    from resources import get_allocator
+
+    spans = split_audio(audio, SAMPLE_RATE, target_chunk_s)
+    allocator = get_allocator()
+
+    # Ask for every core but start with whatever share is free
+    with allocator.lease(threads=allocator.total_cores) as lease:
+        if workers is None:
+            workers = lease.threads
+            memory_workers = memory_worker_limit(model_name, backend, precision, target_chunk_s)
+            if memory_workers is not None and memory_workers < workers:
+                print(f"Warning: Memory only fits {memory_workers} copies of {model_name}, using {memory_workers} workers")
+                workers = memory_workers
+        workers = max(1, min(workers, len(spans)))
+        threads = lease.worker_threads(workers)
+
+        print(f"Transcribing {len(spans)} chunks on {workers} workers ({threads} threads each)")
+
+        results = _run_chunks(
+            audio, spans, model_name, device, language, options, backend, precision,
+            workers, threads, lease.worker_cores(), on_chunk
+        )
+
+    return merge_results(results, language)
+
+
+def _run_chunks(
+    audio: np.ndarray,
+    spans: List[Tuple[int, int]],
+    model_name: str,
+    device: str,
+    language: Optional[str],
+    options: Dict[str, Any],
+    backend: str,
+    precision: Optional[str],
+    workers: int,
+    threads: int,
+    cores: Optional[List[int]],
+    on_chunk: Optional[Callable[[float], None]] = None
+) -> List[Dict[str, Any]]:
+    """Transcribe the spans on a process pool, results in audio order"""
+    # spawn avoids inheriting torch's thread pools from the parent process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(threads, cores)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _transcribe_chunk,
+                audio[start:end],
+                start / SAMPLE_RATE,
+                model_name,
+                device,
+                language,
+                options,
+                backend,
+                precision
+            )
+            for start, end in spans
+        ]
+        if on_chunk:
+            seconds = {future: (end - start) / SAMPLE_RATE for future, (start, end) in zip(futures, spans)}
+            for future in as_completed(futures):
+                future.result()
+                on_chunk(seconds[future])
+        return [future.result() for future in futures]
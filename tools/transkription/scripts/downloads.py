@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Resumable, parallel yt-dlp download options and bandwidth measurement
+"""
+
+import os
+import shutil
+import threading
+import time
+from typing import Optional, Dict, Any, Callable
+
+# Fragments (HLS/DASH) or aria2c connections fetched at once
+DEFAULT_CONCURRENCY = 4
+
+# Plain HTTP streams are requested in ranges of this size, which avoids
+# throttled single responses and lets an interrupted range resume cleanly
+HTTP_CHUNK_BYTES = 10 * 1024 * 1024
+
+
+def aria2c_available() -> bool:
+    """Check whether aria2c is installed and not disabled via DOWNLOAD_ARIA2C=0"""
+    return os.getenv('DOWNLOAD_ARIA2C', '1') != '0' and shutil.which('aria2c') is not None
+
+
+def download_options(concurrency: Optional[int] = None, use_aria2c: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Build the yt-dlp options for parallel, resumable downloads
+
+    Fragmented streams are fetched concurrent_fragment_downloads at a time.
+    Unfragmented HTTP audio goes through aria2c with several connections
+    if it is installed. Partial .part files (and aria2c control files) are
+    kept and continued by the next attempt, so file names must be stable.
+
+    Args:
+        concurrency: Parallel fragments/connections (default: DOWNLOAD_CONCURRENCY)
+        use_aria2c: Use aria2c for HTTP downloads (default: if installed)
+
+    Returns:
+        Dict of yt-dlp options
+    """
+    if concurrency is None:
+        concurrency = int(os.getenv('DOWNLOAD_CONCURRENCY', DEFAULT_CONCURRENCY))
+    concurrency = max(1, concurrency)
+    if use_aria2c is None:
+        use_aria2c = aria2c_available()
+
+    options = {
+        'concurrent_fragment_downloads': concurrency,
+        'continuedl': True,
+        'nopart': False,
+        'http_chunk_size': HTTP_CHUNK_BYTES,
+    }
+    if use_aria2c and concurrency > 1:
+        options['external_downloader'] = {'http': 'aria2c'}
+        options['external_downloader_args'] = {
+            'aria2c': [f'-x{concurrency}', f'-s{concurrency}', f'-j{concurrency}'],
+        }
+    return options
+
+
+class BandwidthMeter:
+    """
+    yt-dlp progress hook measuring the bytes one job actually transferred
+
+    Bytes that were already on disk when a download resumed are counted
+    separately, so they do not inflate the bandwidth.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, listener: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Start measuring a new job
+
+        Args:
+            listener: Also receives every status of this job (e.g. a progress tracker)
+        """
+        with self._lock:
+            self._listener = listener
+            self._first: Dict[str, int] = {}
+            self._last: Dict[str, int] = {}
+            self._started: Optional[float] = None
+            self._updated: Optional[float] = None
+
+    def __call__(self, status: Dict[str, Any]):
+        """Progress hook; fragment downloads may call it from several threads"""
+        if self._listener:
+            self._listener(status)
+
+        downloaded = status.get('downloaded_bytes')
+        if downloaded is None:
+            return
+        filename = status.get('filename', '')
+        now = time.time()
+
+        with self._lock:
+            if filename not in self._first:
+                # External downloaders (aria2c) only report once they finished,
+                # with the elapsed time; a file that was complete already
+                # reports 'finished' without it
+                finished_run = status.get('status') == 'finished' and 'elapsed' in status
+                self._first[filename] = 0 if finished_run else downloaded
+                started = now - status['elapsed'] if finished_run else now
+                self._started = min(self._started or started, started)
+            self._last[filename] = max(self._last.get(filename, 0), downloaded)
+            self._updated = now
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the job
+
+        Returns:
+            Dict with transferred 'bytes', 'resumed_bytes', 'seconds' and 'mbit_per_s'
+        """
+        with self._lock:
+            transferred = sum(self._last[name] - self._first[name] for name in self._last)
+            resumed = sum(self._first.values())
+            seconds = self._updated - self._started if self._started is not None else 0.0
+
+        return {
+            'bytes': transferred,
+            'resumed_bytes': resumed,
+            'seconds': seconds,
+            'mbit_per_s': transferred * 8 / seconds / 1e6 if seconds > 0 else 0.0,
+        }
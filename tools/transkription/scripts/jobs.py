@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Durable SQLite job queue for transcriptions
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator
+
+# A running job whose worker has not reported for this long is taken back
+DEFAULT_STALE_SECONDS = 300
+
+# Attempts before a job that keeps losing its worker is marked failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    stage TEXT,
+    message TEXT,
+    progress TEXT,
+    draft TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    heartbeat REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE TABLE IF NOT EXISTS job_segments (
+    job_id INTEGER NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL,
+    memory_mb REAL NOT NULL DEFAULT 0,
+    models TEXT,
+    warmed REAL,
+    rss_mb REAL,
+    uss_mb REAL
+);
+"""
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobQueue:
+    """
+    Transcription jobs stored in SQLite, shared by the UI and worker processes
+
+    The UI submits jobs and polls them; workers claim queued jobs, report
+    their stage and store the result. Jobs survive restarts of both sides,
+    and running jobs of a worker that stopped reporting are queued again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            db_path = os.getenv('TRANSCRIBE_JOBS_DB') or Path(__file__).parent.parent / "data" / "jobs.db"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            # WAL lets the UI read while a worker writes; the mode is stored in the file
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Queues created before progress events and drafts were stored
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column in ('progress', 'draft'):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+            # ... and before workers reserved memory and reported their models
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(workers)")}
+            for column, definition in (
+                ('memory_mb', 'REAL NOT NULL DEFAULT 0'), ('models', 'TEXT'), ('warmed', 'REAL'),
+                ('rss_mb', 'REAL'), ('uss_mb', 'REAL')
+            ):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE workers ADD COLUMN {column} {definition}")
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction (commits on success)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        job['progress'] = json.loads(job['progress']) if job['progress'] else None
+        job['draft'] = json.loads(job['draft']) if job['draft'] else None
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def submit(self, url: str, options: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Queue a transcription
+
+        Submitting the same URL and options again while the first job is
+        still queued or running returns that job instead of a duplicate.
+
+        Args:
+            url: YouTube video URL
+            options: Pipeline options (model, chunked, vad, backend, ...)
+
+        Returns:
+            Job ID
+        """
+        options_json = json.dumps(options or {}, sort_keys=True)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE url = ? AND options = ? AND status IN (?, ?) ORDER BY id LIMIT 1",
+                (url, options_json, QUEUED, RUNNING)
+            ).fetchone()
+            if row:
+                return row['id']
+            return conn.execute(
+                "INSERT INTO jobs (url, options, created) VALUES (?, ?, ?)",
+                (url, options_json, time.time())
+            ).lastrowid
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job
+
+        Args:
+            worker_id: Identifies the claiming worker
+
+        Returns:
+            Job dict or None if the queue is empty
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started = ?, heartbeat = ?, "
+                "attempts = attempts + 1, error = NULL, progress = NULL, draft = NULL WHERE id = ?",
+                (RUNNING, worker_id, now, now, row['id'])
+            )
+            # Output of an interrupted attempt is replaced by this one
+            conn.execute("DELETE FROM job_segments WHERE job_id = ?", (row['id'],))
+            return self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+
+    def report(
+        self,
+        job_id: int,
+        stage: Optional[str] = None,
+        message: Optional[str] = None,
+        progress: Optional[Dict[str, Any]] = None
+    ):
+        """Record the current stage and progress event of a running job (also a heartbeat)"""
+        progress_json = json.dumps(progress) if progress is not None else None
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = COALESCE(?, stage), message = COALESCE(?, message), "
+                "progress = COALESCE(?, progress), heartbeat = ? WHERE id = ? AND status = ?",
+                (stage, message, progress_json, time.time(), job_id, RUNNING)
+            )
+
+    def progress_sink(self, job_id: int):
+        """Return a progress sink (see progress.py) that stores events with the job"""
+        def sink(event: Dict[str, Any]):
+            self.report(job_id, event['stage'], event['message'], event)
+        return sink
+
+    def add_segment(self, job_id: int, idx: int, segment: Dict[str, Any]):
+        """Store a decoded segment so the UI can show the text while the job runs"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_segments (job_id, idx, start, end, text) VALUES (?, ?, ?, ?, ?)",
+                (job_id, idx, segment['start'], segment['end'], segment['text'])
+            )
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def segments(self, job_id: int, after: int = -1) -> List[Dict[str, Any]]:
+        """Return the stored segments of a job with index > after"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT idx, start, end, text FROM job_segments WHERE job_id = ? AND idx > ? ORDER BY idx",
+                (job_id, after)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def publish_draft(self, job_id: int, draft: Dict[str, Any]):
+        """Store the draft result of a two-pass job so the UI can show it while the job runs"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET draft = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                (json.dumps(draft, ensure_ascii=False), time.time(), job_id, RUNNING)
+            )
+
+    def complete(self, job_id: int, result: Dict[str, Any]):
+        """Mark a job done and store its result (artifact paths, metadata)"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = 'complete', result = ?, finished = ?, heartbeat = ? WHERE id = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), time.time(), job_id)
+            )
+
+    def fail(self, job_id: int, error: str):
+        """Mark a job failed"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id)
+            )
+
+    def release(self, job_id: int):
+        """Put a running job back into the queue (worker shutting down)"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE id = ? AND status = ?",
+                (QUEUED, job_id, RUNNING)
+            )
+
+    def requeue_stale(
+        self,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> int:
+        """
+        Queue running jobs again whose worker stopped reporting
+
+        Args:
+            stale_seconds: Heartbeat age after which a worker counts as gone
+            max_attempts: Jobs that already used this many attempts fail instead
+
+        Returns:
+            Number of recovered jobs
+        """
+        cutoff = time.time() - stale_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'worker lost', finished = ? "
+                "WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (FAILED, time.time(), RUNNING, cutoff, max_attempts)
+            )
+            return conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat < ?",
+                (QUEUED, RUNNING, cutoff)
+            ).rowcount
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Return a job or None"""
+        with self._connect() as conn:
+            return self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the newest jobs, optionally only those with a status"""
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def worker_alive(
+        self,
+        worker_id: str,
+        pid: int,
+        rss_mb: Optional[float] = None,
+        uss_mb: Optional[float] = None
+    ):
+        """
+        Record a worker heartbeat (keeps its memory reservation)
+
+        Args:
+            worker_id: Worker name
+            pid: Process ID of the worker
+            rss_mb: Resident memory including pages shared with other processes
+            uss_mb: Memory only this worker maps (see read_process_memory)
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, pid, heartbeat, rss_mb, uss_mb) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET pid = excluded.pid, heartbeat = excluded.heartbeat, "
+                "rss_mb = COALESCE(excluded.rss_mb, rss_mb), uss_mb = COALESCE(excluded.uss_mb, uss_mb)",
+                (worker_id, pid, time.time(), rss_mb, uss_mb)
+            )
+
+    def reserved_mb(self, exclude: Optional[str] = None, stale_seconds: float = DEFAULT_STALE_SECONDS) -> float:
+        """Return the memory reserved by live workers, optionally without one of them"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(memory_mb), 0) FROM workers WHERE heartbeat >= ? AND id IS NOT ?",
+                (time.time() - stale_seconds, exclude)
+            ).fetchone()
+        return row[0]
+
+    def reserve_memory(
+        self,
+        worker_id: str,
+        memory_mb: float,
+        budget_mb: float,
+        stale_seconds: float = DEFAULT_STALE_SECONDS
+    ) -> bool:
+        """
+        Set a worker's memory reservation if all reservations stay within the budget
+
+        Check and update run in one transaction, so two workers cannot both
+        take the last free memory.
+
+        Args:
+            worker_id: Reserving worker (replaces its previous reservation)
+            memory_mb: Memory the worker will hold
+            budget_mb: Memory of all workers together
+            stale_seconds: Workers without a heartbeat for this long hold nothing
+
+        Returns:
+            True if reserved, False if it does not fit now
+        """
+        with self._connect() as conn:
+            used = conn.execute(
+                "SELECT COALESCE(SUM(memory_mb), 0) FROM workers WHERE heartbeat >= ? AND id != ?",
+                (time.time() - stale_seconds, worker_id)
+            ).fetchone()[0]
+            if used + memory_mb > budget_mb:
+                return False
+            conn.execute("UPDATE workers SET memory_mb = ? WHERE id = ?", (memory_mb, worker_id))
+            return True
+
+    def set_memory(self, worker_id: str, memory_mb: float):
+        """Set a worker's memory reservation without a budget check (e.g. lower it after a job)"""
+        with self._connect() as conn:
+            conn.execute("UPDATE workers SET memory_mb = ? WHERE id = ?", (memory_mb, worker_id))
+
+    def set_models(self, worker_id: str, models: List[str]):
+        """Record the models a worker has loaded"""
+        with self._connect() as conn:
+            conn.execute("UPDATE workers SET models = ? WHERE id = ?", (json.dumps(models), worker_id))
+
+    def mark_warm(self, worker_id: str):
+        """Record that a worker has loaded its prewarm models and takes jobs"""
+        with self._connect() as conn:
+            conn.execute("UPDATE workers SET warmed = ? WHERE id = ?", (time.time(), worker_id))
+
+    def waiting_for_memory(self) -> int:
+        """Return the number of running jobs that wait for memory"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND stage = 'waiting'", (RUNNING,)
+            ).fetchone()[0]
+
+    def worker_gone(self, worker_id: str):
+        """Remove a worker that shut down"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def live_workers(self, stale_seconds: float = DEFAULT_STALE_SECONDS) -> List[Dict[str, Any]]:
+        """Return the workers that reported within stale_seconds"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM workers WHERE heartbeat >= ?", (time.time() - stale_seconds,)
+            ).fetchall()
+        workers = [dict(row) for row in rows]
+        for worker in workers:
+            worker['models'] = json.loads(worker['models']) if worker['models'] else []
+        return workers
+
+
+def main():
+    """Main function for CLI usage"""
+    usage = (
+        "Usage: python jobs.py list [status]\n"
+        "       python jobs.py submit <youtube_url> [model] [language]\n"
+        "       python jobs.py show <job_id>\n"
+        "       python jobs.py workers"
+    )
+    if len(sys.argv) < 2:
+        print(usage)
+        sys.exit(1)
+
+    queue = JobQueue()
+    command = sys.argv[1]
+
+    if command == "list":
+        status = sys.argv[2] if len(sys.argv) > 2 else None
+        for job in queue.jobs(status):
+            print(f"{job['id']:>5}  {job['status']:<8} {job['stage'] or '':<12} {job['url']}")
+        print(", ".join(f"{n} {status}" for status, n in sorted(queue.counts().items())) or "No jobs")
+
+    elif command == "submit" and len(sys.argv) > 2:
+        options = {
+            'model': sys.argv[3] if len(sys.argv) > 3 else "base",
+            'language': sys.argv[4] if len(sys.argv) > 4 else "de",
+        }
+        print(f"Job {queue.submit(sys.argv[2], options)} queued")
+
+    elif command == "show" and len(sys.argv) > 2:
+        job = queue.get(int(sys.argv[2]))
+        if job is None:
+            print("Job not found")
+            sys.exit(1)
+        print(json.dumps(job, ensure_ascii=False, indent=2))
+
+    elif command == "workers":
+        workers = queue.live_workers()
+        for worker in workers:
+            memory = "-"
+            if worker['uss_mb'] is not None:
+                # USS is what the worker costs; RSS also counts weights shared with a fork server
+                memory = f"USS {worker['uss_mb']:.0f} MB, RSS {worker['rss_mb']:.0f} MB"
+            print(f"{worker['id']:<32} pid {worker['pid']:<7} {memory:<28} "
+                  f"reserved {worker['memory_mb']:.0f} MB  models: {', '.join(worker['models']) or '-'}")
+        total = sum(worker['uss_mb'] or 0 for worker in workers)
+        print(f"{len(workers)} workers, {total:.0f} MB unique memory")
+
+    else:
+        print(usage)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Process-wide pool of loaded Whisper models with memory-budgeted LRU eviction
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, List, Tuple, Iterator
+
+# Approximate parameter counts (millions) of the Whisper models
+MODEL_PARAMS_M = {
+    'tiny': 39,
+    'base': 74,
+    'small': 244,
+    'medium': 769,
+    'large': 1550,
+}
+
+# Bytes per weight of the supported precisions
+PRECISION_BYTES = {
+    'fp32': 4,
+    'bf16': 2,
+    'int8': 1,
+}
+
+# Bytes per weight of the checkpoints on disk (whisper and CTranslate2
+# publish fp16); read or mapped while the model is built
+CHECKPOINT_BYTES = 2
+
+# Default budget leaves room for audio buffers inside the 4G container limit
+DEFAULT_BUDGET_MB = 2048
+
+
+def estimate_model_mb(model_name: str, bytes_per_param: int = 4) -> float:
+    """
+    Estimate the resident size of a model from its parameter count
+
+    Args:
+        model_name: Whisper model name (tiny, base, small, medium, large)
+        bytes_per_param: Bytes per weight (see PRECISION_BYTES)
+
+    Returns:
+        Estimated size in MB
+    """
+    base_name = model_name.split('.')[0].split('-')[0]
+    params_m = MODEL_PARAMS_M.get(base_name, MODEL_PARAMS_M['large'])
+    return params_m * 1e6 * bytes_per_param / (1024 * 1024)
+
+
+def estimate_load_mb(model_name: str, bytes_per_param: int = 4) -> float:
+    """
+    Estimate the peak memory while a model is loaded
+
+    The checkpoint is held (fp32: read by whisper.load_model, int8/bf16:
+    memory-mapped and converted layer by layer) next to the weights being
+    built.
+
+    Args:
+        model_name: Whisper model name
+        bytes_per_param: Bytes per weight of the loaded model (see PRECISION_BYTES)
+
+    Returns:
+        Estimated peak in MB
+    """
+    return estimate_model_mb(model_name, bytes_per_param) + estimate_model_mb(model_name, CHECKPOINT_BYTES)
+
+
+def measure_model_mb(model: Any) -> Optional[float]:
+    """
+    Measure the size of a loaded PyTorch model from its weights and buffers
+
+    Args:
+        model: Loaded model
+
+    Returns:
+        Size in MB or None if the model exposes no tensors
+    """
+    # Backends without PyTorch tensors report their own size
+    size_mb = getattr(model, 'model_size_mb', None)
+    if size_mb is not None:
+        return size_mb
+
+    try:
+        # state_dict also covers the packed weights of quantized layers,
+        # which are not parameters
+        values = list(model.state_dict().values())
+    except AttributeError:
+        return None
+
+    total = sum(_tensor_bytes(value) for value in values)
+    if not total:
+        return None
+    return total / (1024 * 1024)
+
+
+def _tensor_bytes(value: Any) -> int:
+    """Count the bytes of a tensor or a (nested) tuple of tensors"""
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item) for item in value)
+    if hasattr(value, 'element_size') and hasattr(value, 'numel'):
+        return value.numel() * value.element_size()
+    return 0
+
+
+def _load_whisper_model(model_name: str, device: str, **options) -> Any:
+    """Default loader using openai-whisper"""
+    import whisper
+    return whisper.load_model(model_name, device=device, **options)
+
+
+class ModelPool:
+    """
+    Thread-safe LRU pool of loaded models
+
+    Models are keyed by name, device and load options. When the summed size of
+    the loaded models exceeds the memory budget, the least recently used
+    models are dropped from the pool. A model that is still in use by a
+    running job stays alive until that job releases its reference.
+
+    Whisper installs its KV-cache hooks on the model's own modules, so two
+    decodes must never run on one model instance at the same time; use
+    acquire() to hold a model exclusively while transcribing.
+    """
+
+    def __init__(self, budget_mb: Optional[float] = None):
+        if budget_mb is None:
+            budget_mb = float(os.getenv('WHISPER_POOL_BUDGET_MB', DEFAULT_BUDGET_MB))
+
+        self.budget_mb = budget_mb
+        self._models: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._use_locks: "weakref.WeakKeyDictionary[Any, threading.Lock]" = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name: str, device: str, **options) -> Tuple:
+        """Build the pool key for a model configuration"""
+        return (model_name, device, tuple(sorted(options.items())))
+
+    def get(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        loader: Optional[Callable[..., Any]] = None,
+        **options
+    ) -> Any:
+        """
+        Return a loaded model, loading it on a miss
+
+        Args:
+            model_name: Model to load
+            device: Device the model is placed on
+            loader: Callable(model_name, device, **options) returning the model
+            **options: Additional load options, part of the pool key
+
+        Returns:
+            Loaded model
+        """
+        key = self.make_key(model_name, device, **options)
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                entry['last_used'] = time.time()
+                self.hits += 1
+                return entry['model']
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the pool lock so other models stay available meanwhile;
+        # the key lock makes concurrent requests for the same model wait
+        with key_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    entry['last_used'] = time.time()
+                    self.hits += 1
+                    return entry['model']
+                self.misses += 1
+                # Make room for the load peak, which is above the loaded size
+                bytes_per_param = PRECISION_BYTES.get(options.get('precision'), 4)
+                self._evict_to_fit(estimate_load_mb(model_name, bytes_per_param))
+
+            try:
+                start = time.time()
+                model = (loader or _load_whisper_model)(model_name, device, **options)
+                load_seconds = time.time() - start
+
+                size_mb = measure_model_mb(model) or estimate_model_mb(model_name, bytes_per_param)
+
+                with self._lock:
+                    self._evict_to_fit(size_mb)
+                    self._models[key] = {
+                        'model': model,
+                        'model_name': model_name,
+                        'device': device,
+                        'options': dict(options),
+                        'size_mb': size_mb,
+                        'load_seconds': load_seconds,
+                        'last_used': time.time(),
+                        'shared': False,
+                    }
+            finally:
+                # Also when the loader raises, so failed keys do not pile up
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+            print(f"Loaded model {model_name} on {device} ({size_mb:.0f} MB, {load_seconds:.1f}s)")
+            return model
+
+    @contextmanager
+    def acquire(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        loader: Optional[Callable[..., Any]] = None,
+        **options
+    ) -> Iterator[Any]:
+        """
+        Get a model and hold it exclusively while the block runs
+
+        Args:
+            model_name: Model to load
+            device: Device the model is placed on
+            loader: Callable(model_name, device, **options) returning the model
+            **options: Additional load options, part of the pool key
+
+        Yields:
+            Loaded model
+        """
+        model = self.get(model_name, device, loader, **options)
+        with self._lock:
+            use_lock = self._use_locks.setdefault(model, threading.Lock())
+        with use_lock:
+            yield model
+
+    def _used_mb(self) -> float:
+        return sum(entry['size_mb'] for entry in self._models.values())
+
+    def _evict_to_fit(self, incoming_mb: float):
+        """Drop least recently used models until incoming_mb fits (lock held)"""
+        while self._models and self._used_mb() + incoming_mb > self.budget_mb:
+            key, entry = self._models.popitem(last=False)
+            self.evictions += 1
+            print(f"Evicted model {entry['model_name']} on {entry['device']} ({entry['size_mb']:.0f} MB)")
+
+    def contains(self, model_name: str, device: str = "cpu", **options) -> bool:
+        """Check whether a model configuration is loaded"""
+        key = self.make_key(model_name, device, **options)
+        with self._lock:
+            return key in self._models
+
+    def mark_shared(self):
+        """
+        Mark the loaded models as shared with other processes
+
+        Called in a process forked from a fork server: the inherited weights
+        are shared copy-on-write, so dropping them frees no memory.
+        """
+        with self._lock:
+            for entry in self._models.values():
+                entry['shared'] = True
+
+    def evict(self, model_name: Optional[str] = None, keep_shared: bool = False) -> int:
+        """
+        Explicitly drop models from the pool
+
+        Args:
+            model_name: Only drop this model (all configurations); None drops all
+            keep_shared: Keep models shared with a fork server (see mark_shared)
+
+        Returns:
+            Number of evicted models
+        """
+        with self._lock:
+            keys = [
+                key for key, entry in self._models.items()
+                if (model_name is None or entry['model_name'] == model_name)
+                and not (keep_shared and entry['shared'])
+            ]
+            for key in keys:
+                del self._models[key]
+            self.evictions += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """Drop all models and reset the counters"""
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def loaded_models(self) -> List[Dict[str, Any]]:
+        """Describe the loaded models, least recently used first"""
+        with self._lock:
+            return [
+                {
+                    'model_name': entry['model_name'],
+                    'device': entry['device'],
+                    'options': entry['options'],
+                    'size_mb': entry['size_mb'],
+                    'load_seconds': entry['load_seconds'],
+                    'last_used': entry['last_used'],
+                    'shared': entry['shared'],
+                }
+                for entry in self._models.values()
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and memory usage"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'loaded': len(self._models),
+                'used_mb': self._used_mb(),
+                'shared_mb': sum(entry['size_mb'] for entry in self._models.values() if entry['shared']),
+                'budget_mb': self.budget_mb,
+            }
+
+
+_pool: Optional[ModelPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """Return the process-wide model pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelPool()
+        return _pool
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Deadline-aware model selection from audio duration and measured speed
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from resources import get_allocator
+
+# Model name that is resolved to a concrete model per video
+AUTO_MODEL = "auto"
+
+# Candidates from fastest to most accurate
+MODEL_ORDER = ('tiny', 'base', 'small', 'medium', 'large')
+
+# Rough CPU cost of openai-whisper fp32 in core-seconds per audio second,
+# used until a model has been measured on this host
+PRIOR_CORE_RTF = {
+    'tiny': 0.2,
+    'base': 0.4,
+    'small': 1.4,
+    'medium': 4.0,
+    'large': 8.0,
+}
+
+# Wall-clock seconds a transcription may take
+DEFAULT_LATENCY_BUDGET_S = 600.0
+
+# Weight of a new measurement in the moving average
+PROFILE_SMOOTHING = 0.3
+
+PROFILE_PATH = Path(__file__).parent.parent / "data" / "rtf_profile.json"
+
+_profile_lock = threading.Lock()
+
+
+def profile_key(backend: str = "whisper", precision: Optional[str] = None, device: str = "cpu") -> str:
+    """Return the profile section for an engine, weight format and device"""
+    return f"{backend}:{precision or 'default'}:{device}"
+
+
+def load_profile(path: Path = PROFILE_PATH) -> Dict[str, Any]:
+    """
+    Read the real-time factor profile of this host
+
+    Args:
+        path: Profile file
+
+    Returns:
+        Dict mapping profile keys to {model: entry}; empty if missing or invalid
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_rtf(
+    model_name: str,
+    audio_seconds: float,
+    inference_seconds: float,
+    threads: int = 1,
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    device: str = "cpu",
+    path: Path = PROFILE_PATH
+) -> Optional[Dict[str, Any]]:
+    """
+    Add a measured run to the profile
+
+    On CPU the real-time factor is stored per thread (rtf * threads), so
+    runs with different leases can be compared and rescaled.
+
+    Args:
+        model_name: Model that ran
+        audio_seconds: Length of the transcribed audio
+        inference_seconds: Wall-clock inference time
+        threads: Threads the run used
+        backend: Inference backend
+        precision: Weight format, None for the backend default
+        device: Device the model ran on
+        path: Profile file
+
+    Returns:
+        Updated profile entry, None if the run was too short to count
+    """
+    if audio_seconds <= 0 or inference_seconds <= 0:
+        return None
+
+    value = inference_seconds / audio_seconds
+    if device == "cpu":
+        value *= max(1, threads)
+
+    with _profile_lock:
+        profile = load_profile(path)
+        models = profile.setdefault(profile_key(backend, precision, device), {})
+        entry = models.get(model_name)
+        if entry:
+            value = (1 - PROFILE_SMOOTHING) * entry['core_rtf'] + PROFILE_SMOOTHING * value
+        entry = {
+            'core_rtf': value,
+            'runs': (entry or {}).get('runs', 0) + 1,
+            'updated': datetime.now().isoformat(),
+        }
+        models[model_name] = entry
+
+        # Write a temporary file first so readers never see a partial profile;
+        # the name is unique per writer, as worker processes record concurrently
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+            ) as f:
+                json.dump(profile, f, indent=2)
+            try:
+                os.replace(f.name, path)
+            except OSError:
+                Path(f.name).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            print(f"Warning: Could not save RTF profile: {e}")
+
+    return entry
+
+
+def core_rtf(
+    model_name: str,
+    profile: Dict[str, Any],
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    device: str = "cpu"
+) -> Tuple[Optional[float], bool]:
+    """
+    Look up the per-thread real-time factor of a model
+
+    Returns:
+        Tuple of (core-seconds per audio second or None if unknown, measured)
+    """
+    entry = profile.get(profile_key(backend, precision, device), {}).get(model_name)
+    if entry:
+        return entry['core_rtf'], True
+    # Priors are CPU numbers; other devices must be measured
+    if device == "cpu":
+        return PRIOR_CORE_RTF.get(model_name), False
+    return None, False
+
+
+def available_threads() -> int:
+    """
+    Estimate the threads a transcription started now would get
+
+    Takes the allocator's free share of this process and, as a signal for
+    load from other processes, the cores not covered by the load average.
+    """
+    allocator = get_allocator()
+    stats = allocator.stats()
+    threads = min(allocator.default_threads(), stats['budget'] - stats['granted'])
+
+    try:
+        idle = allocator.total_cores - os.getloadavg()[0]
+        threads = min(threads, int(idle + 0.5))
+    except (AttributeError, OSError):
+        pass
+
+    return max(1, threads)
+
+
+def select_model(
+    duration_s: float,
+    budget_s: Optional[float] = None,
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    device: str = "cpu",
+    threads: Optional[int] = None,
+    models: Tuple[str, ...] = MODEL_ORDER,
+    profile: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Pick the most accurate model expected to finish within the latency budget
+
+    The expected time is duration * per-thread RTF / threads, with threads
+    being what a new job gets now, so busier hosts get smaller models. If no
+    model fits, the fastest one is used.
+
+    Args:
+        duration_s: Audio duration in seconds
+        budget_s: Allowed wall-clock seconds (default: TRANSCRIBE_LATENCY_BUDGET_S)
+        backend: Inference backend
+        precision: Weight format, None for the backend default
+        device: Device the model will run on
+        threads: Threads available (default: estimated from current load)
+        models: Candidates from fastest to most accurate
+        profile: RTF profile (default: read from PROFILE_PATH)
+
+    Returns:
+        Dict with 'model', 'estimate_seconds', 'budget_seconds', 'threads',
+        'fits' and per-model 'candidates'
+    """
+    if budget_s is None:
+        budget_s = float(os.getenv('TRANSCRIBE_LATENCY_BUDGET_S', DEFAULT_LATENCY_BUDGET_S))
+    if profile is None:
+        profile = load_profile()
+    if threads is None:
+        threads = available_threads() if device == "cpu" else 1
+
+    candidates: List[Dict[str, Any]] = []
+    for model_name in models:
+        rtf, measured = core_rtf(model_name, profile, backend, precision, device)
+        if rtf is None:
+            continue
+        scale = max(1, threads) if device == "cpu" else 1
+        candidates.append({
+            'model': model_name,
+            'estimate_seconds': duration_s * rtf / scale,
+            'measured': measured,
+        })
+
+    if not candidates:
+        # Nothing known about this device yet; the fastest model is the safe choice
+        return {
+            'model': models[0], 'estimate_seconds': None, 'budget_seconds': budget_s,
+            'threads': threads, 'fits': False, 'candidates': [],
+        }
+
+    fitting = [c for c in candidates if c['estimate_seconds'] <= budget_s]
+    choice = fitting[-1] if fitting else candidates[0]
+    return {
+        'model': choice['model'],
+        'estimate_seconds': choice['estimate_seconds'],
+        'budget_seconds': budget_s,
+        'threads': threads,
+        'fits': bool(fitting),
+        'candidates': candidates,
+    }
+
+
+def resolve_model(
+    model_name: str,
+    duration_s: Optional[float],
+    budget_s: Optional[float] = None,
+    backend: str = "whisper",
+    precision: Optional[str] = None,
+    device: str = "cpu"
+) -> str:
+    """
+    Replace AUTO_MODEL with the model select_model() picks
+
+    Args:
+        model_name: Requested model, returned unchanged unless it is AUTO_MODEL
+        duration_s: Audio duration in seconds, None if unknown
+        budget_s: Allowed wall-clock seconds
+        backend: Inference backend
+        precision: Weight format, None for the backend default
+        device: Device the model will run on
+
+    Returns:
+        Concrete model name
+    """
+    if model_name != AUTO_MODEL:
+        return model_name
+
+    if not duration_s:
+        print(f"Warning: Unknown duration, using {MODEL_ORDER[1]}")
+        return MODEL_ORDER[1]
+
+    selection = select_model(duration_s, budget_s, backend, precision, device)
+    estimate = selection['estimate_seconds']
+    if estimate is None:
+        print(f"Auto model: {selection['model']} (no speed profile for {device})")
+    elif selection['fits']:
+        print(f"Auto model: {selection['model']} (~{estimate:.0f}s of {selection['budget_seconds']:.0f}s budget, "
+              f"{selection['threads']} threads)")
+    else:
+        print(f"Auto model: {selection['model']} (~{estimate:.0f}s, over the "
+              f"{selection['budget_seconds']:.0f}s budget)")
+    return selection['model']
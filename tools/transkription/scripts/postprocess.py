@@ -10,6 +10,8 @@ from typing import Optional, List, Dict, Any
 import json
 import textwrap
 
+from segment_store import read_table, SEGMENT_SUFFIX
+
 
 def extract_video_id(url: str) -> Optional[str]:
     """
@@ -22,9 +24,9 @@ def extract_video_id(url: str) -> Optional[str]:
         Video ID or None
     """
     patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&\n]+)',
-        r'youtube\.com\/embed\/([^&\n]+)',
-        r'youtube\.com\/v\/([^&\n]+)',
+        r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&?#\n]+)',
+        r'youtube\.com\/embed\/([^&?#\n]+)',
+        r'youtube\.com\/v\/([^&?#\n]+)',
     ]
     
     for pattern in patterns:
@@ -35,6 +37,54 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 
+# Downloaded audio and its metadata sidecars (<video_id>.info.json)
+AUDIO_DIR = Path(__file__).parent.parent / "data" / "audio"
+
+
+def video_info_path(video_id: str, directory: Optional[str] = None) -> Path:
+    """Return the metadata sidecar path of a video"""
+    return Path(directory or AUDIO_DIR) / f"{video_id}.info.json"
+
+
+def save_video_info(video_info: Dict[str, Any], directory: Optional[str] = None) -> Optional[Path]:
+    """
+    Store video metadata as a sidecar next to the downloaded audio
+    
+    Args:
+        video_info: Video metadata including 'id'
+        directory: Audio directory (default: data/audio)
+        
+    Returns:
+        Path to the sidecar or None if the metadata has no ID
+    """
+    if not video_info.get('id'):
+        return None
+    
+    path = video_info_path(video_info['id'], directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(video_info, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_video_info(video_id: str, directory: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Read the metadata sidecar of a video
+    
+    Args:
+        video_id: YouTube video ID
+        directory: Audio directory (default: data/audio)
+        
+    Returns:
+        Video metadata or None if no sidecar exists
+    """
+    try:
+        with open(video_info_path(video_id, directory), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
 def format_timestamp(seconds: int) -> str:
     """
     Format seconds to HH:MM:SS
@@ -127,7 +177,7 @@ def create_markdown_output(
     Args:
         transcript_path: Path to transcript file
         video_url: Original video URL
-        video_info: Video metadata
+        video_info: Video metadata (default: the sidecar stored with the audio)
         output_dir: Directory to save markdown file
         
     Returns:
@@ -140,6 +190,12 @@ def create_markdown_output(
         return None
     
     try:
+        # Metadata was saved at download time, no need to ask YouTube again
+        if video_info is None and video_url:
+            video_id = extract_video_id(video_url)
+            if video_id:
+                video_info = load_video_info(video_id)
+        
         # Read transcript
         with open(transcript_path, 'r', encoding='utf-8') as f:
             text = f.read()
@@ -248,7 +304,7 @@ def create_srt_output(
     Create SRT subtitle file from segments
     
     Args:
-        segments_path: Path to segments JSON file
+        segments_path: Path to segment file (columnar, or JSON of older transcripts)
         output_dir: Directory to save SRT file
         
     Returns:
@@ -261,31 +317,36 @@ def create_srt_output(
         return None
     
     try:
-        # Load segments
-        with open(segments_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if 'segments' not in data:
-            print("Error: No segments found in file")
-            return None
-        
-        segments = data['segments']
+        # Load segments; columnar files are mapped and only these columns read
+        if segments_path.suffix == SEGMENT_SUFFIX:
+            table = read_table(segments_path, ['start', 'end', 'text'])
+            starts = table.column('start').to_pylist()
+            ends = table.column('end').to_pylist()
+            texts = table.column('text').to_pylist()
+        else:
+            with open(segments_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            if 'segments' not in data:
+                print("Error: No segments found in file")
+                return None
+            
+            starts = [seg['start'] for seg in data['segments']]
+            ends = [seg['end'] for seg in data['segments']]
+            texts = [seg['text'] for seg in data['segments']]
         
         # Create SRT content
         srt_lines = []
         
-        for i, segment in enumerate(segments, 1):
+        for i, (start, end, text) in enumerate(zip(starts, ends, texts), 1):
             # Index
             srt_lines.append(str(i))
             
             # Timestamps
-            start = format_srt_timestamp(segment['start'])
-            end = format_srt_timestamp(segment['end'])
-            srt_lines.append(f"{start} --> {end}")
+            srt_lines.append(f"{format_srt_timestamp(start)} --> {format_srt_timestamp(end)}")
             
             # Text
-            text = segment['text'].strip()
-            srt_lines.append(text)
+            srt_lines.append(text.strip())
             srt_lines.append("")  # Empty line between entries
         
         srt_content = '\n'.join(srt_lines)
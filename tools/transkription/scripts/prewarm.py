@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Model pre-warming at startup and the readiness check for the container
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+# Sibling modules must be importable when this file is loaded by path (main.py)
+SCRIPTS_DIR = Path(__file__).parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from jobs import JobQueue  # noqa: E402
+
+# Workers without a heartbeat for this long do not count as ready
+READY_STALE_SECONDS = 60
+
+
+def prewarm_models() -> List[str]:
+    """Return TRANSCRIBE_PREWARM_MODELS (comma separated), empty if pre-warming is off"""
+    value = os.getenv('TRANSCRIBE_PREWARM_MODELS', '')
+    return [model.strip() for model in value.split(',') if model.strip()]
+
+
+def warm_models(
+    models: List[str],
+    fits: Optional[Callable[[str], bool]] = None,
+    load: Optional[Callable[[str], Any]] = None
+) -> Dict[str, float]:
+    """
+    Load models into this process's model pool
+
+    The first load also pays for importing torch and whisper, so the first
+    job after a restart starts as fast as any later one.
+
+    Args:
+        models: Model names in load order
+        fits: Whether a model may be loaded now (e.g. within the memory budget)
+        load: Loads one model (default: load_whisper_model with the default
+            backend and precision, as jobs use them)
+
+    Returns:
+        Seconds per loaded model; skipped and failed models are missing
+    """
+    if load is None:
+        from transcribe import load_whisper_model
+        load = load_whisper_model
+
+    loaded = {}
+    for model in models:
+        if fits and not fits(model):
+            print(f"Warning: Not enough memory to pre-load {model}, skipped")
+            continue
+        start = time.time()
+        try:
+            load(model)
+        except Exception as e:
+            print(f"Warning: Could not pre-load {model}: {e}")
+            continue
+        loaded[model] = time.time() - start
+        print(f"Pre-loaded {model} in {loaded[model]:.1f}s")
+    return loaded
+
+
+def readiness(
+    queue: Optional[JobQueue] = None,
+    models: Optional[List[str]] = None,
+    stale_seconds: float = READY_STALE_SECONDS
+) -> Dict[str, Any]:
+    """
+    Report whether the workers have finished pre-warming
+
+    Args:
+        queue: Job queue the workers report to (default: JobQueue())
+        models: Models to pre-warm (default: TRANSCRIBE_PREWARM_MODELS)
+        stale_seconds: Heartbeat age after which a worker is gone
+
+    Returns:
+        Dict with 'ready', 'models' (requested) and 'workers' (id, models
+        loaded, 'warmed' timestamp or None while loading); ready without
+        models to pre-warm, else once all live workers are warm
+    """
+    models = prewarm_models() if models is None else models
+    if not models:
+        # Nothing to wait for; the health check must not need the job queue
+        return {'ready': True, 'models': [], 'workers': []}
+    workers = (queue or JobQueue()).live_workers(stale_seconds=stale_seconds)
+    ready = bool(workers) and all(worker['warmed'] for worker in workers)
+    return {'ready': ready, 'models': models, 'workers': workers}
+
+
+def main():
+    """Main function for CLI usage"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+
+    if '--help' in flags:
+        print("Usage: python prewarm.py --check")
+        print("       python prewarm.py [model ...]")
+        print("  --check  Exit 0 once the workers have loaded TRANSCRIBE_PREWARM_MODELS, else 1")
+        print("  model    Load models in this process (default: TRANSCRIBE_PREWARM_MODELS)")
+        sys.exit(1)
+
+    if '--check' in flags:
+        status = readiness()
+        for worker in status['workers']:
+            state = "warm" if worker['warmed'] else "loading"
+            print(f"{worker['id']}: {state}, models: {', '.join(worker['models']) or '-'}")
+        print("ready" if status['ready'] else "not ready")
+        sys.exit(0 if status['ready'] else 1)
+
+    loaded = warm_models(args or prewarm_models())
+    print(f"{len(loaded)} models loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Progress events of a transcription: download, decoding, real-time factor and ETA
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, TextIO
+
+# Default log file for progress events of the CLI and the workers
+PROGRESS_LOG = Path(__file__).parent.parent / "logs" / "progress.jsonl"
+
+# Events within this many seconds of the last one are dropped, except stage changes
+DEFAULT_MIN_INTERVAL_S = 1.0
+
+Sink = Callable[[Dict[str, Any]], None]
+
+
+class ProgressTracker:
+    """
+    Collects the progress of one job and sends events to sinks
+
+    Fed by yt-dlp progress hooks (download()) and by the decoded segments
+    (segment() / track()). Every event is a flat dict with the stage, bytes
+    downloaded, download speed, audio seconds decoded, the current
+    real-time factor (decode seconds per audio second) and an ETA.
+    """
+
+    def __init__(
+        self,
+        duration_s: Optional[float] = None,
+        sinks: Iterable[Sink] = (),
+        min_interval_s: float = DEFAULT_MIN_INTERVAL_S
+    ):
+        self.sinks: List[Sink] = list(sinks)
+        self.min_interval_s = min_interval_s
+        self._lock = threading.Lock()
+        self._duration = duration_s
+        self._stage: Optional[str] = None
+        self._message: Optional[str] = None
+        self._started = time.time()
+        self._decode_started: Optional[float] = None
+        self._downloaded = 0
+        self._total_bytes: Optional[int] = None
+        self._speed: Optional[float] = None
+        self._download_eta: Optional[float] = None
+        self._audio_seconds = 0.0
+        self._last_emit = 0.0
+
+    def subscribe(self, sink: Sink):
+        """Add a sink that receives every emitted event"""
+        self.sinks.append(sink)
+
+    def set_duration(self, duration_s: Optional[float]):
+        """Set the audio duration once it is known (enables fraction and ETA)"""
+        if duration_s:
+            with self._lock:
+                self._duration = float(duration_s)
+
+    def stage(self, name: str, message: Optional[str] = None):
+        """
+        Enter a pipeline stage (downloading, transcribing, fixing, ...)
+
+        Entering 'transcribing' starts the clock for the real-time factor.
+        Each pass of a two-pass transcription enters it again and gets its
+        own clock and audio position.
+        """
+        with self._lock:
+            self._stage = name
+            self._message = message
+            if name == "transcribing":
+                self._decode_started = time.time()
+                self._audio_seconds = 0.0
+        self._emit(force=True)
+
+    def download(self, status: Dict[str, Any]):
+        """yt-dlp progress hook"""
+        with self._lock:
+            downloaded = status.get('downloaded_bytes')
+            if downloaded is not None:
+                self._downloaded = downloaded
+            total = status.get('total_bytes') or status.get('total_bytes_estimate')
+            if total:
+                self._total_bytes = int(total)
+            self._speed = status.get('speed')
+            self._download_eta = status.get('eta')
+        self._emit(force=status.get('status') == 'finished')
+
+    def decoded(self, audio_seconds: float):
+        """Report that audio up to audio_seconds has been decoded"""
+        with self._lock:
+            self._audio_seconds = max(self._audio_seconds, audio_seconds)
+            if self._decode_started is None:
+                self._decode_started = time.time()
+        self._emit()
+
+    def segment(self, segment: Dict[str, Any]):
+        """Per-segment callback; the segment end is the decoded audio position"""
+        self.decoded(segment['end'])
+
+    def track(self, segments: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass segments through, reporting each one"""
+        for segment in segments:
+            self.segment(segment)
+            yield segment
+
+    def finish(self, message: Optional[str] = None):
+        """Mark the job complete"""
+        with self._lock:
+            if self._duration:
+                self._audio_seconds = max(self._audio_seconds, self._duration)
+        self.stage("complete", message)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the current progress
+
+        Returns:
+            Event dict with 'stage', 'message', 'elapsed', 'downloaded_bytes',
+            'total_bytes', 'download_speed' (bytes/s), 'audio_seconds',
+            'duration', 'rtf', 'eta_seconds' and 'fraction' (None if unknown)
+        """
+        now = time.time()
+        with self._lock:
+            rtf = None
+            if self._decode_started is not None and self._audio_seconds > 0:
+                rtf = (now - self._decode_started) / self._audio_seconds
+
+            fraction = eta = None
+            if self._stage == "downloading":
+                if self._total_bytes:
+                    fraction = min(1.0, self._downloaded / self._total_bytes)
+                eta = self._download_eta
+                if eta is None and self._speed and self._total_bytes:
+                    eta = max(0.0, (self._total_bytes - self._downloaded) / self._speed)
+            elif self._duration:
+                fraction = min(1.0, self._audio_seconds / self._duration)
+                if rtf is not None:
+                    eta = max(0.0, (self._duration - self._audio_seconds) * rtf)
+            if self._stage == "complete":
+                fraction, eta = 1.0, 0.0
+
+            return {
+                'time': now,
+                'stage': self._stage,
+                'message': self._message,
+                'elapsed': now - self._started,
+                'downloaded_bytes': self._downloaded,
+                'total_bytes': self._total_bytes,
+                'download_speed': self._speed,
+                'audio_seconds': self._audio_seconds,
+                'duration': self._duration,
+                'rtf': rtf,
+                'eta_seconds': eta,
+                'fraction': fraction,
+            }
+
+    def _emit(self, force: bool = False):
+        """Send a snapshot to the sinks, at most every min_interval_s unless forced"""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_emit < self.min_interval_s:
+                return
+            self._last_emit = now
+        event = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                print(f"Warning: Progress sink failed: {e}")
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """
+    Format a progress event as one line of text
+
+    Args:
+        event: Event from ProgressTracker
+
+    Returns:
+        Line such as "transcribing  42% | 310s audio | RTF 0.35 | ETA 2m05s"
+    """
+    parts = [event['stage'] or 'starting']
+    if event['fraction'] is not None:
+        parts[0] += f" {event['fraction'] * 100:3.0f}%"
+    if event['stage'] == "downloading":
+        part = f"{event['downloaded_bytes'] / 1e6:.1f} MB"
+        if event['total_bytes']:
+            part += f" of {event['total_bytes'] / 1e6:.1f} MB"
+        parts.append(part)
+        if event['download_speed']:
+            parts.append(f"{event['download_speed'] * 8 / 1e6:.1f} Mbit/s")
+    elif event['audio_seconds']:
+        parts.append(f"{event['audio_seconds']:.0f}s audio")
+    if event['rtf'] is not None:
+        parts.append(f"RTF {event['rtf']:.2f}")
+    if event['eta_seconds'] is not None and event['stage'] != "complete":
+        minutes, seconds = divmod(int(event['eta_seconds']), 60)
+        parts.append(f"ETA {minutes}m{seconds:02d}s")
+    return " | ".join(parts)
+
+
+class ConsoleSink:
+    """Prints events, rewriting one line on a terminal"""
+
+    def __init__(self, stream: TextIO = sys.stderr):
+        self.stream = stream
+        self.tty = hasattr(stream, 'isatty') and stream.isatty()
+
+    def __call__(self, event: Dict[str, Any]):
+        line = format_event(event)
+        if self.tty:
+            end = "\n" if event['stage'] == "complete" else ""
+            self.stream.write(f"\r\033[K{line}{end}")
+        else:
+            self.stream.write(f"{line}\n")
+        self.stream.flush()
+
+
+class JsonlSink:
+    """Appends events as JSON lines to a log file"""
+
+    def __init__(self, path: Path = PROGRESS_LOG, **fields):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Written with every event, e.g. the job ID or URL
+        self.fields = fields
+
+    def __call__(self, event: Dict[str, Any]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({**self.fields, **event}, ensure_ascii=False) + "\n")
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+CPU detection and thread/core leases for concurrent transcriptions
+"""
+
+import math
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set, Iterator
+
+# Try to import optional dependencies
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+# CPU flags that matter for inference speed (x86 and ARM names)
+INFERENCE_FLAGS = {
+    'avx', 'avx2', 'fma', 'f16c', 'avx512f', 'avx512_vnni', 'avx_vnni',
+    'avx512_bf16', 'amx_bf16', 'amx_int8', 'asimd', 'asimddp', 'bf16', 'i8mm', 'sve',
+}
+
+# Jobs expected to run side by side; each gets an equal share of the cores
+DEFAULT_MAX_JOBS = 2
+
+# Threads handed out may exceed the usable cores by at most this factor
+DEFAULT_OVERSUBSCRIPTION = 1.0
+
+# Environment variables read by BLAS/OpenMP runtimes when a process starts
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def read_cgroup_quota(cgroup_root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """
+    Read the container CPU quota in cores
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        Quota in cores (e.g. 1.5) or None if there is no limit
+    """
+    root = Path(cgroup_root)
+
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = root / "cpu.max"
+    if cpu_max.exists():
+        try:
+            quota, period = cpu_max.read_text().split()[:2]
+            if quota != "max":
+                return int(quota) / int(period)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    # cgroup v1
+    for directory in (root / "cpu", root / "cpu,cpuacct", root):
+        quota_file = directory / "cpu.cfs_quota_us"
+        period_file = directory / "cpu.cfs_period_us"
+        if quota_file.exists() and period_file.exists():
+            try:
+                quota = int(quota_file.read_text())
+                period = int(period_file.read_text())
+            except (OSError, ValueError):
+                return None
+            return quota / period if quota > 0 and period > 0 else None
+
+    return None
+
+
+def available_cores() -> List[int]:
+    """Return the core IDs this process may run on"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def cpu_percent_limit() -> float:
+    """Return MAX_CPU_PERCENT (share of the usable cores transcriptions may take), 100 if unset"""
+    try:
+        percent = float(os.getenv('MAX_CPU_PERCENT', 100))
+    except ValueError:
+        print(f"Warning: Invalid MAX_CPU_PERCENT: {os.getenv('MAX_CPU_PERCENT')}")
+        return 100.0
+    return min(100.0, max(1.0, percent))
+
+
+def detect_cpu_count() -> int:
+    """
+    Count the cores transcriptions can actually use
+
+    Takes the smaller of the CPU affinity mask and the container quota, so a
+    container limited to 2 CPUs on a 64-core host reports 2, and keeps
+    MAX_CPU_PERCENT of that.
+
+    Returns:
+        Usable core count (at least 1)
+    """
+    count = len(available_cores())
+    quota = read_cgroup_quota()
+    if quota is not None:
+        count = min(count, max(1, math.floor(quota)))
+    count = math.floor(count * cpu_percent_limit() / 100)
+    return max(1, count)
+
+
+def cpu_features(cpuinfo_path: str = "/proc/cpuinfo") -> Set[str]:
+    """
+    Read the inference-relevant CPU flags
+
+    Args:
+        cpuinfo_path: Path to cpuinfo
+
+    Returns:
+        Set of flags such as avx2, avx512_vnni or amx_bf16
+    """
+    try:
+        with open(cpuinfo_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key.strip() in ('flags', 'Features'):
+                    return set(value.split()) & INFERENCE_FLAGS
+    except OSError:
+        pass
+    return set()
+
+
+def describe_hardware() -> Dict[str, Any]:
+    """Summarize cores, quota and CPU features"""
+    features = cpu_features()
+    return {
+        'cpu_count': os.cpu_count(),
+        'usable_cores': detect_cpu_count(),
+        'cgroup_quota': read_cgroup_quota(),
+        'features': sorted(features),
+        'int8_acceleration': bool(features & {'avx512_vnni', 'avx_vnni', 'amx_int8', 'i8mm', 'asimddp'}),
+        'bf16_acceleration': bool(features & {'avx512_bf16', 'amx_bf16', 'bf16'}),
+    }
+
+
+def apply_thread_limits(threads: int, cores: Optional[List[int]] = None, set_env: bool = True):
+    """
+    Limit torch, BLAS and OpenMP threads (and optionally the cores) of the whole process
+
+    For worker processes that run one job at a time: call this once before
+    the first inference; the limits stay in place for the life of the
+    process. Inside a process shared by concurrent jobs use thread_limits(),
+    which restores the previous limits when the last job is done.
+
+    Args:
+        threads: Thread count
+        cores: Core IDs to pin to, None leaves the affinity alone
+        set_env: Also export the BLAS/OpenMP variables (read by native
+            libraries loaded later)
+    """
+    if set_env:
+        for var in THREAD_ENV_VARS:
+            os.environ[var] = str(threads)
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    if THREADPOOLCTL_AVAILABLE:
+        threadpool_limits(limits=threads)
+
+    if cores:
+        _pin_cores(cores)
+
+
+# Thread counts of the thread_limits() blocks running in this process and
+# the limits from before the first one, restored when the last one exits
+_limits_lock = threading.Lock()
+_active_limits: List[int] = []
+_saved_limits: Dict[str, Any] = {}
+
+
+def _set_process_threads(threads: int):
+    """Set the torch and BLAS thread counts of the process (limits lock held)"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    if THREADPOOLCTL_AVAILABLE:
+        threadpool_limits(limits=threads)
+
+
+@contextmanager
+def thread_limits(threads: int, cores: Optional[List[int]] = None) -> Iterator[None]:
+    """
+    Limit torch, BLAS and OpenMP threads (and optionally the cores) for a with block
+
+    The torch and BLAS thread counts belong to the whole process, so
+    overlapping blocks (concurrent jobs in one process) share them: while
+    several run, the largest requested count applies, and the limits from
+    before the first block come back only when the last one exits, in
+    whatever order the blocks finish. The core affinity applies to the
+    calling thread (sched_setaffinity is per thread on Linux) and is
+    restored when its block exits.
+
+    Args:
+        threads: Thread count
+        cores: Core IDs to pin to, None leaves the affinity alone
+    """
+    with _limits_lock:
+        if not _active_limits:
+            try:
+                import torch
+                _saved_limits['torch'] = torch.get_num_threads()
+            except ImportError:
+                pass
+            if THREADPOOLCTL_AVAILABLE:
+                _saved_limits['blas'] = threadpool_limits(limits=threads)
+        _active_limits.append(threads)
+        _set_process_threads(max(_active_limits))
+
+    previous_cores = None
+    if cores and hasattr(os, 'sched_getaffinity'):
+        previous_cores = os.sched_getaffinity(0)
+        _pin_cores(cores)
+    try:
+        yield
+    finally:
+        if previous_cores:
+            _pin_cores(sorted(previous_cores))
+        with _limits_lock:
+            _active_limits.remove(threads)
+            if _active_limits:
+                _set_process_threads(max(_active_limits))
+            else:
+                if 'torch' in _saved_limits:
+                    import torch
+                    torch.set_num_threads(_saved_limits.pop('torch'))
+                if 'blas' in _saved_limits:
+                    _saved_limits.pop('blas').restore_original_limits()
+
+
+def _pin_cores(cores: List[int]):
+    """Pin the calling thread to cores, warn if the platform refuses"""
+    try:
+        os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError) as e:
+        print(f"Warning: Could not pin to cores {cores}: {e}")
+
+
+def current_threads() -> int:
+    """Return the torch thread count of the calling thread"""
+    try:
+        import torch
+        return torch.get_num_threads()
+    except ImportError:
+        return detect_cpu_count()
+
+
+class Lease:
+    """Threads and cores granted to one running transcription"""
+
+    def __init__(self, threads: int, cores: List[int], pin: bool):
+        self.threads = threads
+        self.cores = cores
+        self.pin = pin
+
+    def limits(self):
+        """Context manager applying the lease while a block runs (see thread_limits())"""
+        return thread_limits(self.threads, self.cores if self.pin else None)
+
+    def worker_cores(self) -> Optional[List[int]]:
+        """Cores worker processes should be pinned to, None without pinning"""
+        return self.cores if self.pin else None
+
+    def worker_threads(self, workers: int) -> int:
+        """Threads per process when the lease is split across workers"""
+        return max(1, self.threads // max(1, workers))
+
+    def __repr__(self) -> str:
+        return f"Lease(threads={self.threads}, cores={self.cores})"
+
+
+class ResourceAllocator:
+    """
+    Hands out thread counts and core sets to concurrent transcriptions
+
+    Every job gets an equal share of the usable cores (cores / max_jobs)
+    unless it asks for more, and less if only less is free. The sum of all
+    granted threads never exceeds cores * oversubscription; a job that
+    cannot get min_threads waits for a release.
+    """
+
+    def __init__(
+        self,
+        total_cores: Optional[int] = None,
+        max_jobs: Optional[int] = None,
+        oversubscription: Optional[float] = None,
+        pin: Optional[bool] = None
+    ):
+        if total_cores is None:
+            total_cores = detect_cpu_count()
+        if max_jobs is None:
+            max_jobs = int(os.getenv('TRANSCRIBE_MAX_JOBS', DEFAULT_MAX_JOBS))
+        if oversubscription is None:
+            oversubscription = float(os.getenv('TRANSCRIBE_OVERSUBSCRIPTION', DEFAULT_OVERSUBSCRIPTION))
+        if pin is None:
+            pin = os.getenv('TRANSCRIBE_PIN_CORES', '0') == '1'
+
+        self.total_cores = max(1, total_cores)
+        self.max_jobs = max(1, max_jobs)
+        self.budget = max(1, int(self.total_cores * max(1.0, oversubscription)))
+        self.pin = pin
+        self._cores = available_cores()[:self.total_cores]
+        self._core_load = {core: 0 for core in self._cores}
+        self._granted = 0
+        self._leases: List[Lease] = []
+        self._condition = threading.Condition()
+
+    def default_threads(self) -> int:
+        """Equal share of the cores for one of max_jobs jobs"""
+        return max(1, self.total_cores // self.max_jobs)
+
+    def _pick_cores(self, threads: int) -> List[int]:
+        """Choose the least loaded cores (lock held)"""
+        ranked = sorted(self._cores, key=lambda core: (self._core_load[core], core))
+        return sorted(ranked[:min(threads, len(ranked))])
+
+    def acquire(
+        self,
+        threads: Optional[int] = None,
+        min_threads: int = 1,
+        timeout: Optional[float] = None
+    ) -> Lease:
+        """
+        Grant a lease, waiting while fewer than min_threads are free
+
+        Args:
+            threads: Requested threads (default: equal share), capped at the budget
+            min_threads: Smallest grant worth starting with
+            timeout: Seconds to wait at most, None waits indefinitely
+
+        Returns:
+            Granted lease with min_threads to threads threads
+
+        Raises:
+            TimeoutError: If not enough threads became free within timeout
+        """
+        wanted = min(max(1, threads or self.default_threads()), self.budget)
+        needed = min(max(1, min_threads), wanted)
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.budget - self._granted >= needed, timeout):
+                raise TimeoutError(f"No {needed} free threads within {timeout}s")
+
+            threads = min(wanted, self.budget - self._granted)
+
+            cores = self._pick_cores(threads)
+            for core in cores:
+                self._core_load[core] += 1
+            self._granted += threads
+            lease = Lease(threads, cores, self.pin)
+            self._leases.append(lease)
+            return lease
+
+    def release(self, lease: Lease):
+        """Return a lease's threads and cores"""
+        with self._condition:
+            if lease not in self._leases:
+                return
+            self._leases.remove(lease)
+            self._granted -= lease.threads
+            for core in lease.cores:
+                self._core_load[core] -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def lease(
+        self,
+        threads: Optional[int] = None,
+        min_threads: int = 1,
+        timeout: Optional[float] = None
+    ) -> Iterator[Lease]:
+        """
+        Hold a lease while the block runs
+
+        Args:
+            threads: Requested threads (default: equal share)
+            min_threads: Smallest grant worth starting with
+            timeout: Seconds to wait at most for free threads
+
+        Yields:
+            Granted lease
+        """
+        lease = self.acquire(threads, min_threads, timeout)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cores, budget and granted threads"""
+        with self._condition:
+            return {
+                'total_cores': self.total_cores,
+                'budget': self.budget,
+                'granted': self._granted,
+                'leases': len(self._leases),
+                'max_jobs': self.max_jobs,
+                'pin': self.pin,
+            }
+
+
+_allocator: Optional[ResourceAllocator] = None
+_allocator_lock = threading.Lock()
+
+
+def get_allocator() -> ResourceAllocator:
+    """Return the process-wide resource allocator"""
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = ResourceAllocator()
+        return _allocator
+
+
+def configure_allocator(**options) -> ResourceAllocator:
+    """
+    Replace the process-wide resource allocator
+
+    For worker processes that were handed a share of the parent's lease:
+    without this, their own allocator would split all cores by
+    TRANSCRIBE_MAX_JOBS again and ignore that share.
+
+    Args:
+        **options: Arguments of ResourceAllocator
+
+    Returns:
+        New allocator
+    """
+    global _allocator
+    with _allocator_lock:
+        _allocator = ResourceAllocator(**options)
+        return _allocator
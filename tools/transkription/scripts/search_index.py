@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Full-text search over the transcript archive (SQLite FTS5)
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+# Sibling modules must be importable when this file is loaded by path (ui.py)
+SCRIPTS_DIR = Path(__file__).parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from segment_store import read_table, SEGMENT_SUFFIX, JSON_SUFFIX, load_segments  # noqa: E402
+from transcript_cache import TranscriptCache  # noqa: E402
+
+DATA_DIR = SCRIPTS_DIR.parent / "data"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    video_id TEXT,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_id INTEGER NOT NULL,
+    start_ms INTEGER,
+    end_ms INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_document ON passages (document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+    text, content='passages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS passages_insert AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_delete AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Files that are indexed: segment files carry timestamps, Markdown is the
+# name-corrected text and is indexed by paragraph
+SEGMENT_PATTERNS = (f"segments_*{SEGMENT_SUFFIX}", f"segments_*{JSON_SUFFIX}")
+MARKDOWN_PATTERN = "*.md"
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Turn user input into an FTS5 query
+
+    Words are matched as terms (all must occur), "quoted text" as a phrase
+    and a trailing * as prefix; other FTS5 syntax is taken literally.
+
+    Args:
+        query: Search input
+
+    Returns:
+        FTS5 MATCH expression
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query):
+        text = phrase or word
+        prefix = not phrase and text.endswith('*')
+        text = text.rstrip('*') if prefix else text
+        if text:
+            quoted = '"' + text.replace('"', '""') + '"'
+            terms.append(quoted + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def read_markdown(path: Path) -> Tuple[Optional[str], Optional[str], List[str]]:
+    """
+    Extract title, video ID and paragraphs from a Markdown transcript
+
+    Args:
+        path: Markdown file written by create_markdown_output()
+
+    Returns:
+        Tuple of (title, video_id, paragraphs)
+    """
+    title = video_id = None
+    paragraphs: List[str] = []
+    in_body = False
+    lines: List[str] = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if title is None and line.startswith('# '):
+                title = line[2:].strip()
+            elif line.startswith('**Video ID:**'):
+                video_id = line.split(':**', 1)[1].strip()
+            elif line.startswith('## '):
+                in_body = line.startswith('## Inhalt')
+            elif in_body:
+                if line.strip() and not line.startswith('#') and line != '---':
+                    lines.append(line.strip())
+                elif lines:
+                    paragraphs.append(' '.join(lines))
+                    lines = []
+    if lines:
+        paragraphs.append(' '.join(lines))
+    return title, video_id, paragraphs
+
+
+class SearchIndex:
+    """
+    Incrementally maintained FTS5 index of segment files and Markdown transcripts
+
+    Each segment becomes a passage with its start and end in milliseconds;
+    Markdown files add their paragraphs without timestamps. update() only
+    re-reads files whose size or modification time changed.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            db_path = os.getenv('TRANSCRIBE_SEARCH_DB') or DATA_DIR / "search.db"
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction (commits on success)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def add_file(
+        self,
+        path: Path,
+        video_id: Optional[str] = None,
+        title: Optional[str] = None
+    ) -> int:
+        """
+        Index a segment or Markdown file, replacing an earlier version of it
+
+        Args:
+            path: segments_* file or Markdown transcript
+            video_id: Video the file belongs to (Markdown files name it themselves)
+            title: Video title
+
+        Returns:
+            Number of passages indexed
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+
+        if path.suffix == '.md':
+            kind = 'markdown'
+            md_title, md_video_id, paragraphs = read_markdown(path)
+            title = title or md_title
+            video_id = video_id or md_video_id
+            passages = [(None, None, text) for text in paragraphs]
+        else:
+            kind = 'segments'
+            if path.suffix == SEGMENT_SUFFIX:
+                segments = read_table(path, ['start', 'end', 'text']).to_pylist()
+            else:
+                segments = load_segments(path)
+            passages = [
+                (round(seg['start'] * 1000), round(seg['end'] * 1000), seg['text'].strip())
+                for seg in segments if seg['text'].strip()
+            ]
+
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM passages WHERE document_id IN (SELECT id FROM documents WHERE path = ?)",
+                (str(path),)
+            )
+            conn.execute("DELETE FROM documents WHERE path = ?", (str(path),))
+            document_id = conn.execute(
+                "INSERT INTO documents (path, kind, mtime, size, video_id, title) VALUES (?, ?, ?, ?, ?, ?)",
+                (str(path), kind, stat.st_mtime, stat.st_size, video_id, title)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO passages (document_id, start_ms, end_ms, text) VALUES (?, ?, ?, ?)",
+                [(document_id, start, end, text) for start, end, text in passages]
+            )
+        return len(passages)
+
+    def remove_file(self, path: Path):
+        """Drop a file from the index"""
+        path = str(Path(path).resolve())
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM passages WHERE document_id IN (SELECT id FROM documents WHERE path = ?)", (path,)
+            )
+            conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+    def update(
+        self,
+        directories: Optional[List[Path]] = None,
+        cache: Optional[TranscriptCache] = None
+    ) -> Dict[str, int]:
+        """
+        Bring the index in line with the archive
+
+        New and changed files are (re-)indexed, deleted files are dropped.
+        Segment files are linked to their video through the transcript cache,
+        which stores copies under the same file names.
+
+        Args:
+            directories: Directories to index (default: data/raw and data/fixed)
+            cache: Transcript cache to look up video IDs (default: TranscriptCache())
+
+        Returns:
+            Dict with 'added', 'removed' and 'unchanged' file counts
+        """
+        if directories is None:
+            directories = [DATA_DIR / "raw", DATA_DIR / "fixed"]
+
+        files = {}
+        for directory in directories:
+            directory = Path(directory)
+            if not directory.exists():
+                continue
+            for pattern in SEGMENT_PATTERNS + (MARKDOWN_PATTERN,):
+                for path in directory.rglob(pattern):
+                    files[str(path.resolve())] = path.stat()
+
+        with self._connect() as conn:
+            indexed = {
+                row['path']: (row['mtime'], row['size'])
+                for row in conn.execute("SELECT path, mtime, size FROM documents")
+            }
+
+        roots = [str(Path(directory).resolve()) for directory in directories]
+        removed = [
+            path for path in indexed
+            if path not in files and any(path.startswith(root) for root in roots)
+        ]
+        for path in removed:
+            self.remove_file(Path(path))
+
+        changed = [
+            path for path, stat in files.items()
+            if indexed.get(path) != (stat.st_mtime, stat.st_size)
+        ]
+        videos = self._videos_by_file(cache or TranscriptCache()) if changed else {}
+        for path in changed:
+            video_id, title = videos.get(Path(path).name, (None, None))
+            try:
+                self.add_file(Path(path), video_id, title)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: Could not index {path}: {e}")
+
+        return {'added': len(changed), 'removed': len(removed), 'unchanged': len(files) - len(changed)}
+
+    @staticmethod
+    def _videos_by_file(cache: TranscriptCache) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Map cached artifact file names to (video_id, title)"""
+        videos = {}
+        for manifest in cache.entries():
+            title = (manifest.get('video_info') or {}).get('title')
+            for file_name in manifest.get('artifacts', {}).values():
+                videos[Path(file_name).name] = (manifest['video_id'], title)
+        return videos
+
+    def search(self, query: str, limit: int = 20, video_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find passages matching a query, best matches first
+
+        Args:
+            query: Words, "phrases" or prefixes* (see to_fts_query)
+            limit: Maximum number of hits
+            video_id: Only search this video
+
+        Returns:
+            List of dicts with 'video_id', 'title', 'path', 'kind', 'start_ms',
+            'end_ms' (None for Markdown paragraphs), 'text' and 'snippet'
+        """
+        match = to_fts_query(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT d.video_id, d.title, d.path, d.kind, p.start_ms, p.end_ms, p.text, "
+            "snippet(passages_fts, 0, '**', '**', ' ... ', 16) AS snippet "
+            "FROM passages_fts "
+            "JOIN passages p ON p.id = passages_fts.rowid "
+            "JOIN documents d ON d.id = p.document_id "
+            "WHERE passages_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if video_id:
+            sql += " AND d.video_id = ?"
+            params.append(video_id)
+        sql += " ORDER BY bm25(passages_fts) LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of indexed files, videos and passages"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS files, COUNT(DISTINCT video_id) AS videos FROM documents"
+            ).fetchone()
+            passages = conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        return {'files': row['files'], 'videos': row['videos'], 'passages': passages}
+
+
+def format_ms(ms: Optional[int]) -> str:
+    """Format milliseconds as HH:MM:SS.mmm"""
+    if ms is None:
+        return "--:--:--.---"
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+
+
+def video_link(video_id: Optional[str], start_ms: Optional[int] = None) -> Optional[str]:
+    """Return the YouTube URL of a hit, starting at its timestamp"""
+    if not video_id:
+        return None
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    if start_ms is not None:
+        url += f"&t={start_ms // 1000}s"
+    return url
+
+
+def main():
+    """Main function for CLI usage"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    options = dict(flag[2:].split('=', 1) for flag in flags if '=' in flag)
+
+    usage = (
+        "Usage: python search_index.py update\n"
+        "       python search_index.py search <query> [--limit=N] [--video=VIDEO_ID]\n"
+        "       python search_index.py stats"
+    )
+    if not args or args[0] not in ("update", "search", "stats"):
+        print(usage)
+        sys.exit(1)
+
+    index = SearchIndex()
+    command = args[0]
+
+    if command == "update":
+        result = index.update()
+        print(f"Indexed {result['added']} files, removed {result['removed']}, "
+              f"{result['unchanged']} unchanged")
+
+    elif command == "search":
+        if len(args) < 2:
+            print(usage)
+            sys.exit(1)
+        # Pick up files written since the last run
+        index.update()
+        hits = index.search(' '.join(args[1:]), int(options.get('limit', 20)), options.get('video'))
+        for hit in hits:
+            video = hit['video_id'] or Path(hit['path']).name
+            print(f"{video}  {format_ms(hit['start_ms'])}  {hit['snippet']}")
+        if not hits:
+            print("No matches")
+
+    else:
+        stats = index.stats()
+        print(f"{stats['files']} files, {stats['videos']} videos, {stats['passages']} passages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Columnar segment files (Arrow IPC) with memory-mapped reads
+"""
+
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+# Try to import optional dependencies
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Segment files are written as segments_<timestamp> plus this suffix;
+# without pyarrow the indented JSON of earlier versions is written instead
+SEGMENT_SUFFIX = ".arrow"
+JSON_SUFFIX = ".json"
+
+
+def _schema(metadata: Optional[Dict[str, Any]] = None) -> "pa.Schema":
+    """Segment columns; file-level values (language, VAD report) go into the metadata"""
+    schema = pa.schema([
+        ('start', pa.float64()),
+        ('end', pa.float64()),
+        ('text', pa.string()),
+        ('confidence', pa.float32()),
+    ])
+    if metadata:
+        schema = schema.with_metadata({key: json.dumps(value) for key, value in metadata.items()})
+    return schema
+
+
+def segment_confidence(segment: Dict[str, Any]) -> Optional[float]:
+    """Return the mean token probability of a segment, None if the decoder did not report it"""
+    avg_logprob = segment.get('avg_logprob')
+    if avg_logprob is None:
+        return segment.get('confidence')
+    return math.exp(avg_logprob)
+
+
+def segments_file(directory: Path, timestamp: str) -> Path:
+    """Return the segment file name for a transcription, columnar if pyarrow is installed"""
+    suffix = SEGMENT_SUFFIX if PYARROW_AVAILABLE else JSON_SUFFIX
+    return Path(directory) / f"segments_{timestamp}{suffix}"
+
+
+def write_segments(
+    path: Path,
+    segments: Iterable[Dict[str, Any]],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Path:
+    """
+    Write segments as one columnar file
+
+    Args:
+        path: Target file, with SEGMENT_SUFFIX (or .json without pyarrow)
+        segments: Segment dicts with start, end, text and optionally avg_logprob
+        metadata: File-level values such as 'language' and 'vad'
+
+    Returns:
+        Path of the written file
+    """
+    segments = list(segments)
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+
+    if not PYARROW_AVAILABLE:
+        data = {'text': ''.join(seg['text'] for seg in segments)}
+        data.update(metadata or {})
+        data['segments'] = [
+            {'start': seg['start'], 'end': seg['end'], 'text': seg['text']} for seg in segments
+        ]
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    table = pa.table({
+        'start': [float(seg['start']) for seg in segments],
+        'end': [float(seg['end']) for seg in segments],
+        'text': [seg['text'] for seg in segments],
+        'confidence': [segment_confidence(seg) for seg in segments],
+    }, schema=_schema(metadata))
+
+    # Uncompressed IPC so readers can map the columns without decoding
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(path: Path, columns: Optional[List[str]] = None) -> "pa.Table":
+    """
+    Memory-map a segment file; only the pages of the requested columns are read
+
+    Args:
+        path: Segment file written by write_segments()
+        columns: Columns to return (default: all)
+
+    Returns:
+        pyarrow Table backed by the mapped file
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for columnar segment files. Install with: pip install pyarrow")
+
+    source = pa.memory_map(str(path), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def read_metadata(path: Path) -> Dict[str, Any]:
+    """Return the file-level values (language, vad, ...) of a segment file"""
+    path = Path(path)
+    if path.suffix == JSON_SUFFIX:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data.pop('segments', None)
+        return data
+
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for columnar segment files. Install with: pip install pyarrow")
+
+    metadata = pa.ipc.open_file(pa.memory_map(str(path), 'r')).schema.metadata or {}
+    return {key.decode(): json.loads(value) for key, value in metadata.items()}
+
+
+def load_segments(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read all segments of a file as dicts
+
+    Both columnar files and the segments JSON of earlier versions are read.
+
+    Args:
+        path: Segment file
+
+    Returns:
+        List of dicts with start, end and text (and confidence if stored)
+    """
+    path = Path(path)
+    if path.suffix == JSON_SUFFIX:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['segments']
+    return read_table(path).to_pylist()
+
+
+def open_archive(directory: Path) -> "ds.Dataset":
+    """
+    Open every columnar segment file below a directory as one dataset
+
+    Scans project only the columns they need, e.g.
+    open_archive(raw_dir).to_table(columns=['text']).
+
+    Args:
+        directory: Directory with segments_*.arrow files (searched recursively)
+
+    Returns:
+        pyarrow Dataset over all files
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for columnar segment files. Install with: pip install pyarrow")
+
+    files = sorted(str(path) for path in Path(directory).rglob(f"segments_*{SEGMENT_SUFFIX}"))
+    return ds.dataset(files, schema=_schema(), format="ipc")
+
+
+def convert_json(path: Path, remove: bool = False) -> Optional[Path]:
+    """
+    Convert a segments JSON file into a columnar file next to it
+
+    Args:
+        path: segments_*.json file
+        remove: Delete the JSON file afterwards
+
+    Returns:
+        Path of the columnar file, None if the file has no segments
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'segments' not in data:
+        return None
+
+    segments = data.pop('segments')
+    data.pop('text', None)
+    target = write_segments(path.with_suffix(SEGMENT_SUFFIX), segments, data)
+    if remove:
+        path.unlink()
+    return target
+
+
+def main():
+    """Main function for CLI usage"""
+    usage = (
+        "Usage: python segment_store.py convert <directory> [--remove-json]\n"
+        "       python segment_store.py stats <directory>"
+    )
+    if len(sys.argv) < 3 or sys.argv[1] not in ("convert", "stats"):
+        print(usage)
+        sys.exit(1)
+
+    if not PYARROW_AVAILABLE:
+        print("Error: pyarrow is not installed. Run: pip install pyarrow")
+        sys.exit(1)
+
+    directory = Path(sys.argv[2])
+    if sys.argv[1] == "convert":
+        converted = 0
+        for path in sorted(directory.rglob(f"segments_*{JSON_SUFFIX}")):
+            if convert_json(path, remove='--remove-json' in sys.argv):
+                converted += 1
+        print(f"Converted {converted} segment files")
+    else:
+        table = open_archive(directory).to_table(columns=['start', 'end'])
+        seconds = pc.sum(pc.subtract(table.column('end'), table.column('start'))).as_py() or 0.0
+        print(f"{table.num_rows} segments, {seconds / 3600:.1f} hours of speech")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Reusable client sessions that outlive repeated imports of the scripts
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+# Clients such as yt_dlp.YoutubeDL are not thread-safe, so every thread
+# keeps its own sessions
+_local = threading.local()
+
+
+def get_session(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """
+    Return the calling thread's session for key, creating it on first use
+
+    Args:
+        key: Identifies the session configuration
+        factory: Creates a new session
+
+    Returns:
+        Session object
+    """
+    sessions = _sessions()
+    if key not in sessions:
+        sessions[key] = factory()
+    return sessions[key]
+
+
+def _sessions() -> Dict[Hashable, Any]:
+    """Return the session dict of the calling thread"""
+    if not hasattr(_local, 'sessions'):
+        _local.sessions = {}
+    return _local.sessions
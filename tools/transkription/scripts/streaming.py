@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Incremental transcription that yields segments as they are decoded
+"""
+
+import itertools
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Iterable, BinaryIO
+
+import numpy as np
+
+from chunking import SAMPLE_RATE, find_silence_cut, offset_segments
+
+# Short windows keep the time to first text low; the previous window's text
+# is passed on as prompt so the decoder keeps its context across windows
+DEFAULT_WINDOW_SECONDS = 30
+PROMPT_CHARS = 200
+
+# Blocks the pipe reader may run ahead of inference (one minute of 5 s blocks)
+MAX_PENDING_BLOCKS = 12
+
+
+def iter_stream_segments(
+    model: Any,
+    blocks: Iterable[np.ndarray],
+    language: Optional[str] = "de",
+    window_s: float = DEFAULT_WINDOW_SECONDS,
+    **options
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transcribe audio arriving in blocks and yield segments as they are decoded
+
+    A window is decoded as soon as enough audio has arrived to cut it at a
+    pause; the remainder is carried over to the next window.
+
+    Args:
+        model: Loaded Whisper model
+        blocks: Iterable of mono float32 audio blocks at 16 kHz
+        language: Language code, None to detect it on the first window
+        window_s: Target window length, windows are cut at silence
+        **options: Extra options passed to model.transcribe()
+
+    Yields:
+        Segment dicts with timestamps on the original timeline
+    """
+    search_s = window_s / 4
+    needed = int((window_s + search_s) * SAMPLE_RATE)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+    prompt = None
+    segment_id = 0
+
+    def decode(window, window_offset):
+        nonlocal language, prompt
+        result = model.transcribe(
+            window,
+            language=language,
+            initial_prompt=prompt,
+            fp16=False,
+            verbose=None,
+            **options
+        )
+        # Pin the detected language so later windows do not flip
+        language = language or result.get('language')
+        text = result['text'].strip()
+        if text:
+            prompt = text[-PROMPT_CHARS:]
+        return offset_segments(result['segments'], window_offset / SAMPLE_RATE)
+
+    for block in itertools.chain(blocks, [None]):
+        if block is not None:
+            buffer = block if len(buffer) == 0 else np.concatenate([buffer, block])
+            if len(buffer) < needed:
+                continue
+
+        while len(buffer) >= needed or (block is None and len(buffer) > 0):
+            if len(buffer) >= needed:
+                cut = find_silence_cut(buffer, SAMPLE_RATE, window_s, search_s)
+            else:
+                cut = len(buffer)
+
+            for seg in decode(buffer[:cut], offset):
+                seg['id'] = segment_id
+                segment_id += 1
+                yield seg
+
+            buffer = buffer[cut:]
+            offset += cut
+
+
+def iter_pcm_blocks(
+    stream: BinaryIO,
+    block_s: float = 5.0,
+    sample_rate: int = SAMPLE_RATE,
+    max_blocks: int = MAX_PENDING_BLOCKS
+) -> Iterator[np.ndarray]:
+    """
+    Read 16-bit mono PCM from a pipe and yield float32 blocks
+
+    A reader thread drains the pipe into a bounded queue, so short stalls of
+    the consumer (inference) do not stall the producer (download and decode).
+    Once max_blocks are waiting, the reader blocks and the pipe throttles the
+    producer instead of buffering the whole recording in memory.
+
+    Args:
+        stream: Binary stream with s16le mono samples
+        block_s: Block length in seconds
+        sample_rate: Sample rate of the stream
+        max_blocks: Blocks read ahead of the consumer at most
+
+    Yields:
+        Mono float32 audio blocks
+    """
+    block_bytes = int(block_s * sample_rate) * 2
+    blocks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_blocks)
+    stop = threading.Event()
+
+    def put(data: Optional[bytes]) -> bool:
+        # Give up once the consumer is gone so the thread does not block forever
+        while not stop.is_set():
+            try:
+                blocks.put(data, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            while True:
+                data = stream.read(block_bytes)
+                if not data or not put(data):
+                    break
+        finally:
+            put(None)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    pending = b''
+    try:
+        while True:
+            data = blocks.get()
+            if data is None:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % 2
+            pending = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        stop.set()
+
+    thread.join()
+
+
+def format_segment_line(segment: Dict[str, Any]) -> str:
+    """
+    Format one segment as a JSON line
+
+    Args:
+        segment: Segment dict with start, end and text
+
+    Returns:
+        JSON line including the trailing newline
+    """
+    line = json.dumps(
+        {'start': segment['start'], 'end': segment['end'], 'text': segment['text']},
+        ensure_ascii=False
+    )
+    return line + '\n'
+
+
+def read_segment_lines(segments_file: Path) -> list:
+    """
+    Read the segments written so far from a .jsonl file
+
+    A partially written last line (the writer is still running) is skipped.
+
+    Args:
+        segments_file: Path to the .jsonl file
+
+    Returns:
+        List of segment dicts
+    """
+    segments = []
+    segments_file = Path(segments_file)
+    if not segments_file.exists():
+        return segments
+
+    with open(segments_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                segments.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return segments
@@ -5,23 +5,19 @@ Transcription module for YouTube videos using Whisper
 
 import os
 import sys
-import json
 import subprocess
+import time
 from pathlib import Path
 from datetime import datetime
 import re
 import tempfile
 import shutil
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Generator, Iterator, Callable, Tuple
 
-# Try to import optional dependencies
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
-    print("Warning: whisper not installed. Install with: pip install openai-whisper")
+import numpy as np
 
+# Try to import optional dependencies
 try:
     import yt_dlp
     YTDLP_AVAILABLE = True
@@ -29,118 +25,405 @@ except ImportError:
     YTDLP_AVAILABLE = False
     print("Warning: yt-dlp not installed. Install with: pip install yt-dlp")
 
+# Sibling modules must be importable when this file is loaded by path (ui.py)
+SCRIPTS_DIR = Path(__file__).parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from model_pool import get_model_pool  # noqa: E402
+from resources import get_allocator, current_threads  # noqa: E402
+from model_select import AUTO_MODEL, resolve_model, record_rtf  # noqa: E402
+from chunking import transcribe_chunked, SAMPLE_RATE  # noqa: E402
+from batching import BatchScheduler, get_scheduler  # noqa: E402
+from audio import decode_audio, iter_audio_blocks  # noqa: E402
+from vad import apply_vad, map_segments  # noqa: E402
+from backends import (  # noqa: E402
+    DEFAULT_BACKEND, DEFAULT_PRECISION, PRECISIONS,
+    available_backends, get_backend, load_model
+)
+from transcript_cache import TranscriptCache  # noqa: E402
+from postprocess import extract_video_id, save_video_info, load_video_info, AUDIO_DIR  # noqa: E402
+from sessions import get_session  # noqa: E402
+from downloads import download_options, BandwidthMeter  # noqa: E402
+from progress import ProgressTracker, ConsoleSink, JsonlSink  # noqa: E402
+from segment_store import segments_file, write_segments, SEGMENT_SUFFIX  # noqa: E402
+from streaming import (  # noqa: E402
+    iter_stream_segments,
+    iter_pcm_blocks,
+    format_segment_line,
+)
+
+# Model of the quick first pass in two-pass mode
+DEFAULT_DRAFT_MODEL = "tiny"
+
+
+def get_default_device() -> str:
+    """Return the device Whisper would pick by default"""
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def load_whisper_model(
+    model_name: str,
+    device: Optional[str] = None,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION
+):
+    """
+    Get a Whisper model from the process-wide model pool
+    
+    Args:
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to place the model on (default: cuda if available)
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        
+    Returns:
+        Loaded model with whisper's transcribe() interface
+    """
+    get_backend(backend)  # raises if the backend is not installed
+    
+    return get_model_pool().get(
+        model_name, device or get_default_device(), loader=load_model,
+        backend=backend, precision=precision
+    )
+
+
+@contextmanager
+def use_whisper_model(
+    model_name: str,
+    device: Optional[str] = None,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION
+) -> Iterator[Any]:
+    """
+    Hold a pooled Whisper model exclusively for the duration of a with block
+    
+    The block also holds a thread lease from the resource allocator, so
+    concurrent transcriptions split the cores instead of each using all.
+    
+    Args:
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        device: Device to place the model on (default: cuda if available)
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        
+    Yields:
+        Loaded model
+    """
+    get_backend(backend)  # raises if the backend is not installed
+    
+    # Limits are set before acquiring, so a model loaded now picks up the
+    # thread count, and restored once the block is done
+    with get_allocator().lease() as lease, lease.limits():
+        with get_model_pool().acquire(
+            model_name, device or get_default_device(), loader=load_model,
+            backend=backend, precision=precision
+        ) as model:
+            yield model
+
 
 def get_video_info(url: str) -> Optional[Dict[str, Any]]:
-    """Extract video information from YouTube URL"""
+    """Extract video information from YouTube URL, preferring the stored sidecar"""
     if not YTDLP_AVAILABLE:
         raise ImportError("yt-dlp is required but not installed")
     
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': False,
-    }
+    video_id = extract_video_id(url)
+    if video_id:
+        video_info = load_video_info(video_id)
+        if video_info:
+            return video_info
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            return {
-                'title': info.get('title', 'Unknown'),
-                'duration': info.get('duration', 0),
-                'uploader': info.get('uploader', 'Unknown'),
-                'upload_date': info.get('upload_date', ''),
-                'description': info.get('description', ''),
-                'view_count': info.get('view_count', 0),
-            }
+        info = get_ytdl_session().extract_info(url, download=False)
+        video_info = video_info_from(info)
+        save_video_info(video_info)
+        return video_info
     except Exception as e:
         print(f"Error getting video info: {e}")
         return None
 
 
-def download_youtube_audio(url: str, output_dir: Optional[str] = None) -> Optional[str]:
+def video_info_from(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a yt-dlp info dict to the metadata kept with a transcript"""
+    return {
+        'id': info.get('id'),
+        'webpage_url': info.get('webpage_url'),
+        'title': info.get('title', 'Unknown'),
+        'duration': info.get('duration', 0),
+        'uploader': info.get('uploader', 'Unknown'),
+        'upload_date': info.get('upload_date', ''),
+        'description': info.get('description', ''),
+        'view_count': info.get('view_count', 0),
+    }
+
+
+def get_ytdl_session(
+    audio_format: Optional[str] = None,
+    output_dir: Optional[Path] = None,
+    concurrency: Optional[int] = None
+) -> Any:
+    """
+    Return the calling thread's YoutubeDL for a download mode
+    
+    The session is kept across jobs, so extractor state and pooled HTTP
+    connections are reused. Files are named after the video ID, which lets
+    an interrupted download resume from its .part file.
+    
+    Args:
+        audio_format: Download mode (see AUDIO_FORMATS), None for metadata only
+        output_dir: Directory downloads are saved to
+        concurrency: Parallel fragments/connections (see downloads.py)
+        
+    Returns:
+        yt_dlp.YoutubeDL instance
+    """
+    def create():
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+        }
+        if audio_format is not None:
+            ydl_opts.update(AUDIO_FORMATS[audio_format])
+            ydl_opts.update(download_options(concurrency))
+            ydl_opts['outtmpl'] = str(Path(output_dir) / "%(id)s.%(ext)s")
+            ydl_opts['progress_hooks'] = [get_download_meter(audio_format, output_dir, concurrency)]
+        return yt_dlp.YoutubeDL(ydl_opts)
+    
+    return get_session(('yt-dlp', audio_format, str(output_dir), concurrency), create)
+
+
+def get_download_meter(
+    audio_format: str,
+    output_dir: Optional[Path] = None,
+    concurrency: Optional[int] = None
+) -> BandwidthMeter:
+    """Return the bandwidth meter hooked into the matching download session"""
+    return get_session(('bandwidth', audio_format, str(output_dir), concurrency), BandwidthMeter)
+
+
+# Download modes for download_youtube_audio:
+#   native  - keep the source opus/m4a stream as is, no re-encode
+#   pcm     - 16 kHz mono WAV, the format Whisper decodes to anyway
+#   archive - compact 32 kbps mono Opus for keeping audio
+#   mp3     - 192 kbps MP3 (previous default)
+AUDIO_FORMATS = {
+    'native': {
+        'format': 'bestaudio[acodec=opus]/bestaudio/best',
+        'postprocessors': [],
+    },
+    'pcm': {
+        'format': 'bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'wav',
+        }],
+        'postprocessor_args': {'extractaudio+ffmpeg_o': ['-ac', '1', '-ar', '16000']},
+    },
+    'archive': {
+        'format': 'bestaudio[acodec=opus]/bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'opus',
+            'preferredquality': '32',
+        }],
+        'postprocessor_args': {'extractaudio+ffmpeg_o': ['-ac', '1']},
+    },
+    'mp3': {
+        'format': 'bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }],
+    },
+}
+
+
+def download_youtube_audio(
+    url: str,
+    output_dir: Optional[str] = None,
+    audio_format: str = "native"
+) -> Optional[str]:
     """
     Download audio from YouTube video
     
     Args:
         url: YouTube video URL
         output_dir: Directory to save audio file
+        audio_format: Download mode (native, pcm, archive, mp3), see AUDIO_FORMATS
         
     Returns:
         Path to downloaded audio file or None if failed
     """
+    fetched = fetch_youtube_audio(url, output_dir, audio_format)
+    return fetched['audio'] if fetched else None
+
+
+def fetch_youtube_audio(
+    url: str,
+    output_dir: Optional[str] = None,
+    audio_format: str = "native",
+    concurrency: Optional[int] = None,
+    progress: Optional[ProgressTracker] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Resolve, download and describe a video in a single extraction
+    
+    The metadata is written to <video_id>.info.json next to the audio,
+    so later steps (Markdown, cache) do not query YouTube again. Fragments
+    are fetched in parallel and a partial download is resumed.
+    
+    Args:
+        url: YouTube video URL
+        output_dir: Directory to save audio file
+        audio_format: Download mode (native, pcm, archive, mp3), see AUDIO_FORMATS
+        concurrency: Parallel fragments/connections (default: DOWNLOAD_CONCURRENCY)
+        progress: Receives the yt-dlp progress of this download
+        
+    Returns:
+        Dict with 'audio' path, 'video_info' and 'download' bandwidth stats,
+        or None if failed
+    """
     if not YTDLP_AVAILABLE:
         raise ImportError("yt-dlp is required but not installed")
     
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio format: {audio_format}")
+    
     if output_dir is None:
-        output_dir = Path(__file__).parent.parent / "data" / "audio"
+        output_dir = AUDIO_DIR
     
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Generate unique filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_template = str(output_dir / f"audio_{timestamp}.%(ext)s")
-    
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
-        'outtmpl': output_template,
-        'quiet': True,
-        'no_warnings': True,
-    }
-    
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            print(f"Downloading audio from: {url}")
-            ydl.download([url])
-            
-            # Find the downloaded file
-            audio_file = output_template.replace('%(ext)s', 'mp3')
-            if Path(audio_file).exists():
-                print(f"Audio saved to: {audio_file}")
-                return audio_file
-            else:
-                # Try to find any audio file that was created
-                for ext in ['mp3', 'mp4', 'm4a', 'webm']:
-                    test_file = output_template.replace('%(ext)s', ext)
-                    if Path(test_file).exists():
-                        return test_file
-                
-                print("Error: Audio file not found after download")
-                return None
-                
+        ydl = get_ytdl_session(audio_format, output_dir, concurrency)
+        meter = get_download_meter(audio_format, output_dir, concurrency)
+        meter.reset(progress.download if progress else None)
+        if progress:
+            progress.stage("downloading", "Video wird heruntergeladen...")
+        print(f"Downloading audio ({audio_format}) from: {url}")
+        info = ydl.extract_info(url, download=True)
+        video_info = video_info_from(info)
+        save_video_info(video_info, output_dir)
+        if progress:
+            progress.set_duration(video_info['duration'])
+        
+        download = meter.report()
+        if download['bytes']:
+            print(f"Downloaded {download['bytes'] / 1e6:.1f} MB in {download['seconds']:.1f}s "
+                  f"({download['mbit_per_s']:.1f} Mbit/s)")
+        
+        # Final path after postprocessing, else any audio file that was created
+        candidates = [Path(d['filepath']) for d in info.get('requested_downloads') or [] if d.get('filepath')]
+        if info.get('id'):
+            candidates += sorted(output_dir.glob(f"{info['id']}.*"))
+        for path in candidates:
+            if path.exists() and not path.suffix.startswith(('.part', '.ytdl', '.aria2', '.json')):
+                print(f"Audio saved to: {path}")
+                return {'audio': str(path), 'video_info': video_info, 'download': download}
+        
+        print("Error: Audio file not found after download")
+        return None
+        
     except Exception as e:
         print(f"Error downloading audio: {e}")
         return None
 
 
+def save_transcription(
+    result: Dict[str, Any],
+    output_dir: Path,
+    language: Optional[str] = None,
+    timestamp: Optional[str] = None
+) -> str:
+    """
+    Save a transcription result as transcript text and a columnar segment file
+    
+    Args:
+        result: Result dict with 'text', 'segments' and 'language'
+        output_dir: Directory to save the files
+        language: Requested language, used if the result has none
+        timestamp: Timestamp used in the file names (default: now)
+        
+    Returns:
+        Path to transcript file
+    """
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    transcript_file = output_dir / f"transcript_{timestamp}.txt"
+    
+    with open(transcript_file, 'w', encoding='utf-8') as f:
+        f.write(result['text'])
+    
+    print(f"Transcript saved to: {transcript_file}")
+    
+    # Also save detailed segments (start, end, text, confidence columns)
+    metadata = {'language': result.get('language', language)}
+    if 'vad' in result:
+        metadata['vad'] = result['vad']
+    write_segments(segments_file(output_dir, timestamp), result['segments'], metadata)
+    
+    return str(transcript_file)
+
+
 def transcribe_with_whisper(
     audio_path: str,
     model_name: str = "base",
     language: str = "de",
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    device: Optional[str] = None,
+    chunked: bool = False,
+    workers: Optional[int] = None,
+    audio: Optional[np.ndarray] = None,
+    vad: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION,
+    progress: Optional[ProgressTracker] = None,
+    batched: bool = False,
+    windowed: bool = False,
+    duration_s: Optional[float] = None
 ) -> Optional[str]:
     """
     Transcribe audio file using Whisper
     
+    The file is decoded once into memory and the samples are handed to the
+    model directly, so Whisper does not run ffmpeg on the file again. In
+    windowed mode the file is instead read from ffmpeg window by window and
+    never held whole, so memory stays flat for recordings of many hours.
+    
     Args:
         audio_path: Path to audio file
-        model_name: Whisper model to use (tiny, base, small, medium, large)
+        model_name: Whisper model to use (tiny, base, small, medium, large, auto)
         language: Language code for transcription
         output_dir: Directory to save transcript
+        device: Device to run the model on (default: cuda if available)
+        chunked: Split the audio at silences and transcribe chunks in parallel
+        workers: Number of worker processes for chunked mode
+        audio: Already decoded 16 kHz mono samples of audio_path to reuse
+        vad: Drop silence and music before inference (see vad.py)
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        progress: Receives the decoded audio seconds (per chunk in chunked mode)
+        batched: Decode 30 s windows in batches, shared with other transcriptions
+            of the same model in this process (see batching.py); overrides chunked
+        windowed: Decode the file in bounded windows (see
+            transcribe_with_whisper_stream); vad, chunked and batched need the
+            whole audio and are not applied
+        duration_s: Known audio duration, used by the auto model and the ETA in
+            windowed mode
         
     Returns:
         Path to transcript file or None if failed
     """
-    if not WHISPER_AVAILABLE:
-        raise ImportError("whisper is required but not installed")
+    get_backend(backend)  # raises if the backend is not installed
     
     audio_path = Path(audio_path)
-    if not audio_path.exists():
+    if audio is None and not audio_path.exists():
         print(f"Error: Audio file not found: {audio_path}")
         return None
     
@@ -151,86 +434,733 @@ def transcribe_with_whisper(
     output_dir.mkdir(parents=True, exist_ok=True)
     
     try:
-        print(f"Loading Whisper model: {model_name}")
-        model = whisper.load_model(model_name)
-        
-        print(f"Transcribing audio file: {audio_path}")
-        result = model.transcribe(
-            str(audio_path),
-            language=language,
-            verbose=True,
-            fp16=False  # Disable FP16 for compatibility
+        if windowed and audio is None:
+            return run_stream(transcribe_with_whisper_stream(
+                audio_path, model_name, language, output_dir, device, backend=backend,
+                precision=precision, progress=progress, windowed=True, duration_s=duration_s
+            ))
+        
+        if audio is None:
+            audio = decode_audio(audio_path)
+        
+        device = device or get_default_device()
+        model_name = resolve_model(
+            model_name, len(audio) / SAMPLE_RATE, backend=backend, precision=precision, device=device
         )
         
-        # Save transcript
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        transcript_file = output_dir / f"transcript_{timestamp}.txt"
-        
-        with open(transcript_file, 'w', encoding='utf-8') as f:
-            f.write(result['text'])
-        
-        print(f"Transcript saved to: {transcript_file}")
-        
-        # Also save detailed segments
-        segments_file = output_dir / f"segments_{timestamp}.json"
-        segments_data = {
-            'text': result['text'],
-            'segments': [
-                {
-                    'start': seg['start'],
-                    'end': seg['end'],
-                    'text': seg['text']
-                }
-                for seg in result['segments']
-            ],
-            'language': result.get('language', language)
-        }
+        speech = audio
+        if vad:
+            speech, regions, vad_info = apply_vad(audio)
+        
+        decoded = 0.0
+        
+        def chunk_done(seconds):
+            nonlocal decoded
+            decoded += seconds
+            progress.decoded(decoded)
+        
+        if progress:
+            # Progress counts the audio that is actually decoded
+            progress.set_duration(len(speech) / SAMPLE_RATE)
+            progress.stage("transcribing", "Audio wird transkribiert...")
+        
+        if len(speech) == 0:
+            print("No speech found, skipping inference")
+            result = {'text': '', 'segments': [], 'language': language}
+        elif batched:
+            print(f"Transcribing audio file in batched windows: {audio_path}")
+            scheduler = get_batch_scheduler(model_name, device, backend, precision)
+            result = scheduler.transcribe(speech, language, on_window=chunk_done if progress else None)
+        elif chunked:
+            print(f"Transcribing audio file in chunks: {audio_path}")
+            result = transcribe_chunked(
+                speech,
+                model_name,
+                language,
+                device=device,
+                workers=workers,
+                backend=backend,
+                precision=precision,
+                on_chunk=chunk_done if progress else None
+            )
+        else:
+            print(f"Loading Whisper model: {model_name}")
+            with use_whisper_model(model_name, device, backend, precision) as model:
+                print(f"Transcribing audio file: {audio_path}")
+                start = time.time()
+                result = model.transcribe(
+                    speech,
+                    language=language,
+                    verbose=True,
+                    fp16=False  # Disable FP16 for compatibility
+                )
+                # Feeds the speed profile used by the auto model
+                record_rtf(
+                    model_name, len(speech) / SAMPLE_RATE, time.time() - start,
+                    current_threads(), backend, precision, device
+                )
+                # A single transcribe() call has no per-segment callback
+                if progress:
+                    progress.decoded(len(speech) / SAMPLE_RATE)
+        
+        if vad:
+            result['segments'] = map_segments(result['segments'], regions)
+            result['vad'] = vad_info
+        
+        return save_transcription(result, output_dir, language)
+        
+    except Exception as e:
+        print(f"Error during transcription: {e}")
+        return None
+
+
+def get_batch_scheduler(
+    model_name: str,
+    device: Optional[str] = None,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION
+) -> BatchScheduler:
+    """Return the process-wide batch scheduler of a model; it holds the model only while a batch runs"""
+    device = device or get_default_device()
+    
+    def record_batch(audio_seconds, decode_seconds):
+        record_rtf(model_name, audio_seconds, decode_seconds, current_threads(), backend, precision, device)
+    
+    return get_scheduler(
+        (model_name, device, backend, precision),
+        lambda: BatchScheduler(
+            lambda: use_whisper_model(model_name, device, backend, precision), on_batch=record_batch
+        )
+    )
+
+
+def transcribe_with_whisper_stream(
+    audio_path: str,
+    model_name: str = "base",
+    language: str = "de",
+    output_dir: Optional[str] = None,
+    device: Optional[str] = None,
+    audio: Optional[np.ndarray] = None,
+    vad: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION,
+    progress: Optional[ProgressTracker] = None,
+    windowed: bool = False,
+    duration_s: Optional[float] = None
+) -> Generator[Dict[str, Any], None, Optional[str]]:
+    """
+    Transcribe audio file using Whisper, yielding segments as they are decoded
+    
+    Segments are appended to segments_<timestamp>.jsonl while decoding runs.
+    When the audio is done, the usual transcript and segment files are written.
+    
+    In windowed mode ffmpeg's output is read block by block as the windows
+    are decoded, so only the current window is in memory (about 3 MB of
+    samples instead of 230 MB per hour of audio).
+    
+    Args:
+        audio_path: Path to audio file
+        model_name: Whisper model to use (tiny, base, small, medium, large)
+        language: Language code for transcription
+        output_dir: Directory to save transcript
+        device: Device to run the model on (default: cuda if available)
+        audio: Already decoded 16 kHz mono samples of audio_path to reuse
+        vad: Drop silence and music before inference (see vad.py); needs the
+            whole audio and is not applied in windowed mode
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        progress: Receives every decoded segment
+        windowed: Read the file from ffmpeg in bounded blocks instead of whole
+        duration_s: Known audio duration, used by the auto model and the ETA in
+            windowed mode
+        
+    Yields:
+        Segment dicts with start, end and text
+        
+    Returns:
+        Path to transcript file or None if failed (generator return value)
+    """
+    get_backend(backend)  # raises if the backend is not installed
+    
+    audio_path = Path(audio_path)
+    if audio is None and not audio_path.exists():
+        print(f"Error: Audio file not found: {audio_path}")
+        return None
+    
+    if output_dir is None:
+        output_dir = Path(__file__).parent.parent / "data" / "raw"
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    try:
+        print(f"Streaming transcription of: {audio_path}")
+        if windowed and audio is None:
+            blocks = iter_audio_blocks(audio_path)
+            vad = False
+        else:
+            if audio is None:
+                audio = decode_audio(audio_path)
+            blocks = [audio]
+            duration_s = len(audio) / SAMPLE_RATE
+        
+        device = device or get_default_device()
+        model_name = resolve_model(
+            model_name, duration_s, backend=backend, precision=precision, device=device
+        )
+        
+        if vad:
+            speech, regions, _ = apply_vad(audio)
+            blocks = [speech]
         
-        with open(segments_file, 'w', encoding='utf-8') as f:
-            json.dump(segments_data, f, ensure_ascii=False, indent=2)
+        decoded_samples = 0
+        decode_seconds = 0.0
         
-        return str(transcript_file)
+        def counted(blocks):
+            nonlocal decoded_samples
+            for block in blocks:
+                decoded_samples += len(block)
+                yield block
+        
+        def timed(segments):
+            # Only the time spent decoding counts, not the caller's work per segment
+            nonlocal decode_seconds
+            while True:
+                start = time.time()
+                segment = next(segments, None)
+                decode_seconds += time.time() - start
+                if segment is None:
+                    return
+                yield segment
+        
+        print(f"Loading Whisper model: {model_name}")
+        with use_whisper_model(model_name, device, backend, precision) as model:
+            segments = timed(iter_stream_segments(model, counted(blocks), language))
+            if vad:
+                segments = (map_segments([seg], regions)[0] for seg in segments)
+            if progress:
+                progress.set_duration(duration_s)
+                progress.stage("transcribing", "Audio wird transkribiert...")
+                segments = progress.track(segments)
+            transcript_path = yield from save_segment_stream(segments, output_dir, language)
+            if transcript_path:
+                # Feeds the speed profile used by the auto model
+                record_rtf(
+                    model_name, decoded_samples / SAMPLE_RATE, decode_seconds,
+                    current_threads(), backend, precision, device
+                )
+            return transcript_path
         
     except Exception as e:
         print(f"Error during transcription: {e}")
         return None
 
 
+def open_youtube_pcm_stream(
+    url: str,
+    audio_file: Optional[str] = None
+) -> Tuple[subprocess.Popen, subprocess.Popen]:
+    """
+    Start yt-dlp piping the audio stream through ffmpeg into 16 kHz mono PCM
+    
+    Args:
+        url: YouTube video URL
+        audio_file: Also copy the original audio stream into this file
+        
+    Returns:
+        Tuple of (yt-dlp process, ffmpeg process); read PCM from ffmpeg's stdout
+    """
+    # webm/opus can be decoded progressively from a pipe, unlike mp4 with a trailing index
+    ytdlp = subprocess.Popen(
+        [sys.executable, '-m', 'yt_dlp', '-q', '--no-warnings',
+         '-f', 'bestaudio[ext=webm]/bestaudio/best', '-o', '-', url],
+        stdout=subprocess.PIPE
+    )
+    
+    ffmpeg_cmd = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-i', 'pipe:0',
+        '-map', '0:a:0', '-f', 's16le', '-ac', '1', '-ar', '16000', 'pipe:1'
+    ]
+    if audio_file:
+        ffmpeg_cmd += ['-map', '0:a:0', '-c:a', 'copy', '-y', str(audio_file)]
+    
+    ffmpeg = subprocess.Popen(ffmpeg_cmd, stdin=ytdlp.stdout, stdout=subprocess.PIPE)
+    # Let yt-dlp receive SIGPIPE if ffmpeg exits early
+    ytdlp.stdout.close()
+    return ytdlp, ffmpeg
+
+
+def transcribe_youtube_stream(
+    url: str,
+    model_name: str = "base",
+    language: str = "de",
+    output_dir: Optional[str] = None,
+    device: Optional[str] = None,
+    audio_file: Optional[str] = None,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION,
+    progress: Optional[ProgressTracker] = None
+) -> Generator[Dict[str, Any], None, Optional[str]]:
+    """
+    Transcribe a YouTube video while it is still downloading
+    
+    The first windows are decoded while later bytes are still being fetched,
+    so wall-clock time approaches max(download, inference).
+    
+    Args:
+        url: YouTube video URL
+        model_name: Whisper model to use
+        language: Language code for transcription
+        output_dir: Directory to save transcript
+        device: Device to run the model on (default: cuda if available)
+        audio_file: Also keep the original audio stream in this file
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        progress: Receives every decoded segment (set its duration for an ETA)
+        
+    Yields:
+        Segment dicts with start, end and text
+        
+    Returns:
+        Path to transcript file or None if failed (generator return value)
+    """
+    get_backend(backend)  # raises if the backend is not installed
+    if not YTDLP_AVAILABLE:
+        raise ImportError("yt-dlp is required but not installed")
+    
+    if output_dir is None:
+        output_dir = Path(__file__).parent.parent / "data" / "raw"
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    ytdlp = ffmpeg = None
+    try:
+        if model_name == AUTO_MODEL:
+            video_info = get_video_info(url) or {}
+            model_name = resolve_model(
+                model_name, video_info.get('duration'), backend=backend, precision=precision,
+                device=device or get_default_device()
+            )
+        
+        print(f"Loading Whisper model: {model_name}")
+        with use_whisper_model(model_name, device, backend, precision) as model:
+            print(f"Downloading and transcribing: {url}")
+            ytdlp, ffmpeg = open_youtube_pcm_stream(url, audio_file)
+            blocks = iter_pcm_blocks(ffmpeg.stdout)
+            
+            segments = iter_stream_segments(model, blocks, language)
+            if progress:
+                progress.stage("transcribing", "Audio wird geladen und transkribiert...")
+                segments = progress.track(segments)
+            transcript_path = yield from save_segment_stream(segments, output_dir, language)
+        
+        if ytdlp.wait() != 0 or ffmpeg.wait() != 0:
+            raise RuntimeError(
+                f"Audio stream failed (yt-dlp exit {ytdlp.returncode}, ffmpeg exit {ffmpeg.returncode})"
+            )
+        
+        return transcript_path
+        
+    except Exception as e:
+        print(f"Error in pipelined transcription: {e}")
+        return None
+    
+    finally:
+        for process in (ytdlp, ffmpeg):
+            if process and process.poll() is None:
+                process.kill()
+
+
+def save_segment_stream(
+    segments: Iterator[Dict[str, Any]],
+    output_dir: Path,
+    language: Optional[str] = None
+) -> Generator[Dict[str, Any], None, str]:
+    """
+    Pass segments through while appending them to segments_<timestamp>.jsonl
+    
+    The .jsonl file only shows the progress of a running transcription
+    (read_segment_lines). When the segments are exhausted, the usual
+    transcript and segment files are written and the .jsonl file is
+    removed; it is left behind only if decoding is interrupted.
+    
+    Args:
+        segments: Iterator of decoded segments
+        output_dir: Directory to save the files
+        language: Language code for transcription
+        
+    Yields:
+        The segments, after they were written
+        
+    Returns:
+        Path to transcript file (generator return value)
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    lines_file = output_dir / f"segments_{timestamp}.jsonl"
+    
+    collected = []
+    with open(lines_file, 'w', encoding='utf-8') as f:
+        for segment in segments:
+            f.write(format_segment_line(segment))
+            f.flush()
+            collected.append(segment)
+            yield segment
+    
+    result = {
+        'text': ''.join(seg['text'] for seg in collected),
+        'segments': collected,
+        'language': language
+    }
+    transcript_path = save_transcription(result, output_dir, language, timestamp)
+    lines_file.unlink()
+    return transcript_path
+
+
+def run_stream(
+    stream: Generator[Dict[str, Any], None, Optional[str]],
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Optional[str]:
+    """
+    Consume a segment stream and return its transcript path
+    
+    Args:
+        stream: Generator from one of the *_stream functions
+        on_segment: Called with every segment as it arrives
+        
+    Returns:
+        Path to transcript file or None if failed
+    """
+    while True:
+        try:
+            segment = next(stream)
+        except StopIteration as done:
+            return done.value
+        if on_segment:
+            on_segment(segment)
+
+
+def transcribe_two_pass(
+    audio_path: str,
+    model_name: str = "medium",
+    language: str = "de",
+    draft_model: str = DEFAULT_DRAFT_MODEL,
+    output_dir: Optional[str] = None,
+    device: Optional[str] = None,
+    chunked: bool = False,
+    vad: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION,
+    on_segment: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_draft: Optional[Callable[[str], None]] = None,
+    progress: Optional[ProgressTracker] = None
+) -> Optional[str]:
+    """
+    Transcribe with a small draft model first, then refine with model_name
+    
+    The audio is decoded once and shared by both passes. The draft is saved
+    as usual and handed to on_draft; the refined transcript and segments then
+    atomically replace the draft files, so the draft path stays valid.
+    
+    Args:
+        audio_path: Path to audio file
+        model_name: Whisper model of the final transcript
+        language: Language code for transcription
+        draft_model: Fast model for the draft (tiny or base)
+        output_dir: Directory to save transcript
+        device: Device to run the model on (default: cuda if available)
+        chunked: Refine in parallel chunks (the draft is always single-pass)
+        vad: Drop silence and music before inference (see vad.py)
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        on_segment: Called with every segment of the draft as it is decoded
+        on_draft: Called with the draft transcript path before the refinement starts
+        progress: Receives the decoding progress of each pass
+    
+    Returns:
+        Path to the refined transcript file or None if failed (a failed
+        refinement leaves the draft in place, but it is not returned as
+        a model_name transcript)
+    """
+    if output_dir is None:
+        output_dir = Path(__file__).parent.parent / "data" / "raw"
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    try:
+        audio = decode_audio(audio_path)
+    except Exception as e:
+        print(f"Error decoding audio: {e}")
+        return None
+    
+    draft_path = run_stream(
+        transcribe_with_whisper_stream(
+            audio_path, draft_model, language, output_dir, device, audio=audio, vad=vad,
+            backend=backend, precision=precision, progress=progress
+        ),
+        on_segment
+    )
+    if not draft_path:
+        return None
+    
+    print(f"Draft ready ({draft_model}): {draft_path}")
+    if on_draft:
+        on_draft(draft_path)
+    
+    # Written next to the draft so os.replace() stays on one file system
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix=".refine_") as tmp_dir:
+        refined_path = transcribe_with_whisper(
+            audio_path, model_name, language, tmp_dir, device, chunked=chunked, audio=audio,
+            vad=vad, backend=backend, precision=precision, progress=progress
+        )
+        if not refined_path:
+            print(f"Error: Refinement with {model_name} failed, draft kept at {draft_path}")
+            return None
+        
+        # Segments first: readers open the transcript and look up its segments
+        os.replace(segments_path_for(refined_path), segments_path_for(draft_path))
+        os.replace(refined_path, draft_path)
+    
+    print(f"Draft replaced by {model_name} transcript: {draft_path}")
+    return draft_path
+
+
+def segments_path_for(transcript_path: str) -> Path:
+    """Return the segment file written next to a transcript file (JSON for older transcripts)"""
+    transcript_path = Path(transcript_path)
+    name = transcript_path.stem.replace('transcript_', 'segments_', 1)
+    columnar = transcript_path.with_name(f"{name}{SEGMENT_SUFFIX}")
+    if columnar.exists():
+        return columnar
+    return transcript_path.with_name(f"{name}.json")
+
+
+def cache_model_name(
+    model_name: str,
+    vad: bool = False,
+    backend: str = "whisper",
+    precision: Optional[str] = None
+) -> str:
+    """Return the model name a transcript is cached under; other engines, weights and VAD output are kept apart"""
+    if backend != "whisper":
+        model_name = f"{backend}:{model_name}"
+    if precision:
+        model_name = f"{model_name}@{precision}"
+    return f"{model_name}+vad" if vad else model_name
+
+
+def get_cached_transcription(
+    url: str,
+    model_name: str = "base",
+    language: str = "de",
+    vad: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION
+) -> Optional[Dict[str, Any]]:
+    """
+    Look up a finished transcription of a video in the transcript cache
+    
+    Args:
+        url: YouTube video URL
+        model_name: Whisper model used
+        language: Language code for transcription
+        vad: Whether the transcript was made with the VAD pre-pass
+        backend: Inference backend used
+        precision: Weight format used
+        
+    Returns:
+        Result dict like transcribe_youtube() with 'cached': True, or None
+    """
+    video_id = extract_video_id(url)
+    if not video_id:
+        return None
+    
+    model_name = cache_model_name(model_name, vad, backend, precision)
+    entry = TranscriptCache().get(video_id, model_name, language)
+    if entry is None or 'transcript' not in entry['artifacts']:
+        return None
+    
+    print(f"Using cached transcript for {video_id} ({model_name}, {language})")
+    return {
+        'audio': None,
+        'transcript': entry['artifacts']['transcript'],
+        'segments': entry['artifacts'].get('segments'),
+        'video_info': entry.get('video_info'),
+        'cached': True
+    }
+
+
+def cache_transcription(
+    url: str,
+    model_name: str,
+    language: str,
+    transcript_path: str,
+    video_info: Optional[Dict[str, Any]] = None,
+    vad: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION
+) -> Optional[Dict[str, Any]]:
+    """
+    Store a finished transcription in the transcript cache
+    
+    Args:
+        url: YouTube video URL
+        model_name: Whisper model used
+        language: Language code for transcription
+        transcript_path: Path to the transcript file
+        video_info: Video metadata
+        vad: Whether the transcript was made with the VAD pre-pass
+        backend: Inference backend used
+        precision: Weight format used
+        
+    Returns:
+        Cache manifest or None if the URL has no video ID
+    """
+    video_id = extract_video_id(url)
+    if not video_id:
+        return None
+    
+    artifacts = {
+        'transcript': transcript_path,
+        'segments': str(segments_path_for(transcript_path)),
+    }
+    try:
+        return TranscriptCache().put(
+            video_id, cache_model_name(model_name, vad, backend, precision), language, artifacts, video_info
+        )
+    except OSError as e:
+        print(f"Warning: Could not cache transcript: {e}")
+        return None
+
+
 def transcribe_youtube(
     url: str,
     model_name: str = "base",
     language: str = "de",
-    keep_audio: bool = False
+    keep_audio: bool = False,
+    chunked: bool = False,
+    pipelined: bool = False,
+    use_cache: bool = True,
+    vad: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    precision: Optional[str] = DEFAULT_PRECISION,
+    budget_s: Optional[float] = None,
+    progress: Optional[ProgressTracker] = None,
+    draft_model: Optional[str] = None,
+    batched: bool = False,
+    windowed: bool = False
 ) -> Optional[Dict[str, str]]:
     """
     Complete pipeline to transcribe a YouTube video
     
     Args:
         url: YouTube video URL
-        model_name: Whisper model to use
+        model_name: Whisper model to use, or auto to pick one from the video duration
         language: Language code for transcription
         keep_audio: Whether to keep the audio file after transcription
+        chunked: Transcribe silence-bounded chunks in parallel processes
+        pipelined: Start transcribing while the audio is still downloading
+        use_cache: Return a cached transcript of the same video, model and language
+        vad: Drop silence and music before inference; not applied in pipelined
+            or windowed mode
+        backend: Inference backend (see backends.py)
+        precision: Weight format (fp32, int8, bf16), None for the backend default
+        budget_s: Latency budget in seconds for the auto model
+        progress: Receives download and decoding progress
+        draft_model: Write a quick draft with this model first, then replace
+            it (see transcribe_two_pass); not applied in pipelined or windowed mode
+        batched: Decode 30 s windows in batched model calls (see batching.py)
+        windowed: Decode the downloaded file in bounded windows instead of
+            holding it in memory whole (for recordings of many hours)
         
     Returns:
         Dictionary with paths to audio and transcript files
     """
     try:
-        # Get video info
-        video_info = get_video_info(url)
-        if video_info:
-            print(f"Video: {video_info['title']}")
-            print(f"Duration: {video_info['duration']}s")
+        # Both need the whole decoded audio in memory
+        vad = vad and not (pipelined or windowed)
+        
+        video_info = None
+        if model_name == AUTO_MODEL:
+            # The duration decides the model, so it is needed before the cache
+            video_info = get_video_info(url)
+            model_name = resolve_model(
+                model_name, (video_info or {}).get('duration'), budget_s,
+                backend=backend, precision=precision, device=get_default_device()
+            )
+        
+        if use_cache:
+            cached = get_cached_transcription(
+                url, model_name, language, vad=vad,
+                backend=backend, precision=precision
+            )
+            if cached:
+                return cached
+        
+        if pipelined:
+            # The stream bypasses the extraction, so metadata is fetched on its own
+            video_info = video_info or get_video_info(url)
+            if video_info:
+                print(f"Video: {video_info['title']}")
+                print(f"Duration: {video_info['duration']}s")
+                if progress:
+                    progress.set_duration(video_info['duration'])
+            
+            # Download and transcription overlap, no separate download step
+            audio_path = None
+            if keep_audio:
+                AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+                name = (video_info or {}).get('id') or f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                audio_path = str(AUDIO_DIR / f"{name}.mka")
+            
+            transcript_path = run_stream(transcribe_youtube_stream(
+                url, model_name, language, audio_file=audio_path,
+                backend=backend, precision=precision, progress=progress
+            ))
+            if not transcript_path:
+                return None
+            
+            cache_transcription(
+                url, model_name, language, transcript_path, video_info,
+                backend=backend, precision=precision
+            )
+            return {
+                'audio': audio_path,
+                'transcript': transcript_path,
+                'video_info': video_info
+            }
         
-        # Download audio
-        audio_path = download_youtube_audio(url)
-        if not audio_path:
+        # Download audio and metadata in one extraction; the native stream
+        # needs no encode, kept audio is stored as compact mono Opus
+        audio_format = "archive" if keep_audio else "native"
+        fetched = fetch_youtube_audio(url, audio_format=audio_format, progress=progress)
+        if not fetched:
             return None
+        audio_path, video_info = fetched['audio'], fetched['video_info']
+        print(f"Video: {video_info['title']}")
+        print(f"Duration: {video_info['duration']}s")
         
         # Transcribe
-        transcript_path = transcribe_with_whisper(audio_path, model_name, language)
+        if draft_model and draft_model != model_name and not windowed:
+            transcript_path = transcribe_two_pass(
+                audio_path, model_name, language, draft_model, chunked=chunked, vad=vad,
+                backend=backend, precision=precision, progress=progress
+            )
+        else:
+            transcript_path = transcribe_with_whisper(
+                audio_path, model_name, language, chunked=chunked, vad=vad,
+                backend=backend, precision=precision, progress=progress, batched=batched,
+                windowed=windowed, duration_s=video_info.get('duration')
+            )
         if not transcript_path:
             return None
         
+        cache_transcription(
+            url, model_name, language, transcript_path, video_info, vad=vad,
+            backend=backend, precision=precision
+        )
+        
         # Clean up audio if requested
         if not keep_audio and audio_path:
             try:
@@ -242,7 +1172,8 @@ def transcribe_youtube(
         return {
             'audio': audio_path if keep_audio else None,
             'transcript': transcript_path,
-            'video_info': video_info
+            'video_info': video_info,
+            'download': fetched['download']
         }
         
     except Exception as e:
@@ -252,33 +1183,79 @@ def transcribe_youtube(
 
 def main():
     """Main function for CLI usage"""
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe.py <youtube_url> [model] [language]")
-        print("Models: tiny, base, small, medium, large")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    options = dict(flag[2:].split('=', 1) for flag in flags if '=' in flag)
+    
+    # A CLI run is the only job in its process and may use every core
+    os.environ.setdefault('TRANSCRIBE_MAX_JOBS', '1')
+    
+    if len(args) < 1:
+        print("Usage: python transcribe.py <youtube_url> [model] [language] [--chunked] [--pipelined] [--vad] [--no-cache] [--backend=NAME] [--precision=NAME] [--budget=SECONDS] [--draft[=MODEL]] [--batched] [--windowed]")
+        print("Models: tiny, base, small, medium, large, auto (largest model that finishes within the budget)")
         print("Example: python transcribe.py https://youtube.com/watch?v=... base de")
+        print("  --chunked    Split at silences and transcribe chunks in parallel")
+        print("  --pipelined  Start transcribing while the audio is still downloading")
+        print("  --vad        Skip silence and music before transcribing")
+        print("  --no-cache   Transcribe again even if a cached transcript exists")
+        print(f"  --backend    Inference engine: {', '.join(available_backends())} (default: {DEFAULT_BACKEND})")
+        print(f"  --precision  Weight format: {', '.join(PRECISIONS)} (default: backend default)")
+        print("  --budget     Latency budget in seconds for the auto model")
+        print(f"  --draft      Write a quick draft first (default model: {DEFAULT_DRAFT_MODEL}), then refine")
+        print("  --batched    Decode 30 s windows in batches instead of one after another")
+        print("  --windowed   Read the audio in windows instead of whole (flat memory for long recordings)")
         sys.exit(1)
     
-    url = sys.argv[1]
-    model = sys.argv[2] if len(sys.argv) > 2 else "base"
-    language = sys.argv[3] if len(sys.argv) > 3 else "de"
+    url = args[0]
+    model = args[1] if len(args) > 1 else "base"
+    language = args[2] if len(args) > 2 else "de"
+    chunked = '--chunked' in flags
+    batched = '--batched' in flags
+    windowed = '--windowed' in flags
+    pipelined = '--pipelined' in flags
+    use_cache = '--no-cache' not in flags
+    vad = '--vad' in flags
+    backend = options.get('backend', DEFAULT_BACKEND)
+    precision = options.get('precision', DEFAULT_PRECISION)
+    if precision is not None and precision not in PRECISIONS:
+        print(f"Error: Unknown precision: {precision}")
+        sys.exit(1)
+    budget_s = float(options['budget']) if 'budget' in options else None
+    draft_model = options.get('draft', DEFAULT_DRAFT_MODEL if '--draft' in flags else None)
     
     # Check dependencies
     if not YTDLP_AVAILABLE:
         print("Error: yt-dlp is not installed. Run: pip install yt-dlp")
         sys.exit(1)
     
-    if not WHISPER_AVAILABLE:
-        print("Error: whisper is not installed. Run: pip install openai-whisper")
+    try:
+        get_backend(backend)
+    except (ValueError, ImportError) as e:
+        print(f"Error: {e}")
         sys.exit(1)
     
+    # Progress goes to the terminal and to logs/progress.jsonl
+    progress = ProgressTracker(sinks=[ConsoleSink(), JsonlSink(url=url)])
+    
     # Run transcription
-    result = transcribe_youtube(url, model, language, keep_audio=True)
+    result = transcribe_youtube(
+        url, model, language, keep_audio=True, chunked=chunked, pipelined=pipelined,
+        use_cache=use_cache, vad=vad, backend=backend, precision=precision, budget_s=budget_s,
+        progress=progress, draft_model=draft_model, batched=batched, windowed=windowed
+    )
     
     if result:
-        print("\nTranscription completed successfully!")
+        progress.finish()
+        if result.get('cached'):
+            print("\nTranscript loaded from cache!")
+        else:
+            print("\nTranscription completed successfully!")
         print(f"Transcript: {result['transcript']}")
         if result['audio']:
             print(f"Audio: {result['audio']}")
+        stats = get_model_pool().stats()
+        print(f"Model pool: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['used_mb']:.0f}/{stats['budget_mb']:.0f} MB")
     else:
         print("\nTranscription failed!")
         sys.exit(1)
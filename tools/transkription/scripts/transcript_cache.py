@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of transcription results
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# Bump when a change to the pipeline makes old transcripts stale
+PIPELINE_VERSION = "1"
+
+MANIFEST_NAME = "manifest.json"
+
+
+def make_cache_key(
+    video_id: str,
+    model_name: str,
+    language: Optional[str],
+    pipeline_version: str = PIPELINE_VERSION
+) -> str:
+    """
+    Build the content address of a transcription
+
+    Args:
+        video_id: Canonical YouTube video ID
+        model_name: Whisper model used
+        language: Language code (None for auto-detect)
+        pipeline_version: Version of the transcription pipeline
+
+    Returns:
+        Hex digest used as cache directory name
+    """
+    raw = json.dumps([video_id, model_name, language or "auto", pipeline_version])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Persistent cache of transcript artifacts keyed by video, model and language
+
+    Every entry is a directory named by its key holding copies of the
+    artifacts and a manifest. Entries are never dropped implicitly; use
+    invalidate() and evict() to remove them.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = Path(__file__).parent.parent / "data" / "cache"
+        self.cache_dir = Path(cache_dir)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def _read_manifest(self, entry_dir: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(entry_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_manifest(self, entry_dir: Path, manifest: Dict[str, Any]):
+        # A unique temporary name per writer, so concurrent lookups of one
+        # entry never write into or replace each other's half-written file
+        with tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=entry_dir, prefix=f"{MANIFEST_NAME}.", suffix=".tmp", delete=False
+        ) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        try:
+            os.replace(f.name, entry_dir / MANIFEST_NAME)
+        except OSError:
+            Path(f.name).unlink(missing_ok=True)
+            raise
+
+    def get(
+        self,
+        video_id: str,
+        model_name: str,
+        language: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached transcription
+
+        Args:
+            video_id: Canonical YouTube video ID
+            model_name: Whisper model used
+            language: Language code
+
+        Returns:
+            Manifest with absolute artifact paths, or None on a miss
+        """
+        entry_dir = self._entry_dir(make_cache_key(video_id, model_name, language))
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None:
+            return None
+
+        artifacts = {
+            name: str(entry_dir / file_name)
+            for name, file_name in manifest['artifacts'].items()
+        }
+        if not all(Path(path).exists() for path in artifacts.values()):
+            return None
+
+        # Only orders eviction; a hit must not fail because the entry was
+        # replaced or removed meanwhile, or the cache is read-only
+        manifest['last_access'] = time.time()
+        try:
+            self._write_manifest(entry_dir, manifest)
+        except OSError as e:
+            print(f"Warning: Could not update last access of cache entry {entry_dir.name}: {e}")
+
+        result = dict(manifest)
+        result['artifacts'] = artifacts
+        return result
+
+    def put(
+        self,
+        video_id: str,
+        model_name: str,
+        language: Optional[str],
+        artifacts: Dict[str, str],
+        video_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Store copies of transcription artifacts
+
+        Args:
+            video_id: Canonical YouTube video ID
+            model_name: Whisper model used
+            language: Language code
+            artifacts: Mapping of artifact name (e.g. 'transcript') to file path
+            video_info: Video metadata to keep with the entry
+
+        Returns:
+            Manifest with absolute artifact paths
+        """
+        key = make_cache_key(video_id, model_name, language)
+        entry_dir = self._entry_dir(key)
+        tmp_dir = self.cache_dir / f"{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        stored = {}
+        for name, path in artifacts.items():
+            if path and Path(path).exists():
+                shutil.copy2(path, tmp_dir / Path(path).name)
+                stored[name] = Path(path).name
+
+        now = time.time()
+        manifest = {
+            'key': key,
+            'video_id': video_id,
+            'model_name': model_name,
+            'language': language,
+            'pipeline_version': PIPELINE_VERSION,
+            'artifacts': stored,
+            'video_info': video_info,
+            'created': now,
+            'last_access': now,
+        }
+        self._write_manifest(tmp_dir, manifest)
+
+        # Swap the complete entry in so readers never see a partial one
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+
+        result = dict(manifest)
+        result['artifacts'] = {name: str(entry_dir / file_name) for name, file_name in stored.items()}
+        return result
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        List all cache entries with their size
+
+        Returns:
+            Manifests, least recently used first
+        """
+        if not self.cache_dir.exists():
+            return []
+
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if not entry_dir.is_dir() or '.tmp-' in entry_dir.name:
+                continue
+            manifest = self._read_manifest(entry_dir)
+            if manifest is None:
+                continue
+            manifest['size_bytes'] = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+            entries.append(manifest)
+
+        entries.sort(key=lambda m: m.get('last_access', 0))
+        return entries
+
+    def invalidate(
+        self,
+        video_id: Optional[str] = None,
+        model_name: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> int:
+        """
+        Remove entries matching all given criteria (None matches everything)
+
+        Args:
+            video_id: Only entries of this video
+            model_name: Only entries of this model
+            language: Only entries of this language
+
+        Returns:
+            Number of removed entries
+        """
+        removed = 0
+        for manifest in self.entries():
+            if video_id is not None and manifest.get('video_id') != video_id:
+                continue
+            if model_name is not None and manifest.get('model_name') != model_name:
+                continue
+            if language is not None and manifest.get('language') != language:
+                continue
+            shutil.rmtree(self._entry_dir(manifest['key']), ignore_errors=True)
+            removed += 1
+        return removed
+
+    def evict(
+        self,
+        max_entries: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+        max_size_mb: Optional[float] = None
+    ) -> int:
+        """
+        Remove least recently used entries until all limits hold
+
+        Entries from other pipeline versions are always removed.
+
+        Args:
+            max_entries: Keep at most this many entries
+            max_age_days: Remove entries not accessed for this many days
+            max_size_mb: Keep the total size below this many MB
+
+        Returns:
+            Number of removed entries
+        """
+        entries = self.entries()
+        keep = []
+        removed = 0
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+
+        for manifest in entries:
+            stale_version = manifest.get('pipeline_version') != PIPELINE_VERSION
+            too_old = cutoff is not None and manifest.get('last_access', 0) < cutoff
+            if stale_version or too_old:
+                shutil.rmtree(self._entry_dir(manifest['key']), ignore_errors=True)
+                removed += 1
+            else:
+                keep.append(manifest)
+
+        total_bytes = sum(m['size_bytes'] for m in keep)
+        while keep and (
+            (max_entries is not None and len(keep) > max_entries)
+            or (max_size_mb is not None and total_bytes > max_size_mb * 1024 * 1024)
+        ):
+            manifest = keep.pop(0)
+            total_bytes -= manifest['size_bytes']
+            shutil.rmtree(self._entry_dir(manifest['key']), ignore_errors=True)
+            removed += 1
+
+        return removed
+
+
+def main():
+    """Main function for CLI usage"""
+    usage = (
+        "Usage: python transcript_cache.py list\n"
+        "       python transcript_cache.py invalidate <video_id> [model] [language]\n"
+        "       python transcript_cache.py evict [--max-entries N] [--max-age-days D] [--max-size-mb M]\n"
+        "       python transcript_cache.py clear"
+    )
+    if len(sys.argv) < 2:
+        print(usage)
+        sys.exit(1)
+
+    cache = TranscriptCache()
+    command = sys.argv[1]
+
+    if command == "list":
+        entries = cache.entries()
+        for manifest in entries:
+            title = (manifest.get('video_info') or {}).get('title', '')
+            print(f"{manifest['video_id']}  {manifest['model_name']:<8} {manifest.get('language') or 'auto':<4} "
+                  f"{manifest['size_bytes'] / 1024:8.0f} KB  {title}")
+        print(f"{len(entries)} entries in {cache.cache_dir}")
+
+    elif command == "invalidate" and len(sys.argv) > 2:
+        args = sys.argv[2:] + [None, None]
+        removed = cache.invalidate(args[0], args[1], args[2])
+        print(f"Removed {removed} entries")
+
+    elif command == "evict":
+        limits = {'--max-entries': None, '--max-age-days': None, '--max-size-mb': None}
+        args = sys.argv[2:]
+        for flag, value in zip(args[::2], args[1::2]):
+            if flag not in limits:
+                print(usage)
+                sys.exit(1)
+            limits[flag] = float(value)
+        max_entries = limits['--max-entries']
+        removed = cache.evict(
+            max_entries=int(max_entries) if max_entries is not None else None,
+            max_age_days=limits['--max-age-days'],
+            max_size_mb=limits['--max-size-mb']
+        )
+        print(f"Removed {removed} entries")
+
+    elif command == "clear":
+        removed = cache.invalidate()
+        print(f"Removed {removed} entries")
+
+    else:
+        print(usage)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
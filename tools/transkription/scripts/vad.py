@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Voice-activity detection that removes silence and music before inference
+"""
+
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+from chunking import SAMPLE_RATE
+
+# Frame decisions are made on 30 ms frames
+FRAME_SECONDS = 0.03
+
+# Telephone band, where most of the speech energy sits
+SPEECH_BAND_HZ = (300, 3400)
+
+# Frames whose spectra are computed at once (10k frames = 5 min of audio,
+# about 20 MB of spectra instead of several GB for a long recording)
+FEATURE_BLOCK_FRAMES = 10000
+
+
+def frame_features(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_s: float = FRAME_SECONDS,
+    block_frames: int = FEATURE_BLOCK_FRAMES
+) -> Dict[str, np.ndarray]:
+    """
+    Compute per-frame energy and spectral features, vectorized per block of frames
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        frame_s: Frame length in seconds
+        block_frames: Frames processed at once; bounds the memory of the spectra
+
+    Returns:
+        Dict with arrays 'energy_db', 'band_ratio' (share of energy in the
+        speech band) and 'flatness' (spectral flatness inside the speech band,
+        near 0 for voiced speech and tones, about 0.56 for white noise)
+    """
+    frame_len = max(1, int(sample_rate * frame_s))
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return {'energy_db': empty, 'band_ratio': empty, 'flatness': empty}
+
+    n_fft = 1 << (frame_len - 1).bit_length()
+    window = np.hanning(frame_len).astype(np.float32)
+    freqs = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    blocks = {'energy_db': [], 'band_ratio': [], 'flatness': []}
+    for start in range(0, n_frames, max(1, block_frames)):
+        block = frames[start:start + max(1, block_frames)]
+        rms = np.sqrt(np.mean(np.square(block, dtype=np.float32), axis=1))
+        blocks['energy_db'].append(20 * np.log10(rms + 1e-10))
+
+        power = np.abs(np.fft.rfft(block * window, n=n_fft, axis=1)) ** 2
+        band_power = power[:, band] + 1e-12
+        blocks['band_ratio'].append(band_power.sum(axis=1) / (power.sum(axis=1) + 1e-12))
+        blocks['flatness'].append(np.exp(np.mean(np.log(band_power), axis=1)) / np.mean(band_power, axis=1))
+
+    return {name: np.concatenate(values) for name, values in blocks.items()}
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Return (start, end) index spans where mask is True"""
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    margin_db: float = 12.0,
+    min_energy_db: float = -55.0,
+    min_band_ratio: float = 0.5,
+    max_flatness: float = 0.4,
+    min_speech_s: float = 0.25,
+    min_silence_s: float = 1.0,
+    pad_s: float = 0.2
+) -> List[Tuple[int, int]]:
+    """
+    Find speech regions in audio
+
+    A frame counts as speech when it is clearly above the noise floor, most
+    of its energy lies in the speech band and that band is not noise-like.
+    Pauses shorter than min_silence_s stay inside a region, so only longer
+    stretches of silence, noise or music are removed.
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        margin_db: Required level above the noise floor (10th percentile)
+        min_energy_db: Absolute level below which a frame is never speech
+        min_band_ratio: Minimum share of energy in the speech band
+        max_flatness: Maximum spectral flatness in the speech band
+        min_speech_s: Drop speech regions shorter than this
+        min_silence_s: Only remove non-speech stretches at least this long
+        pad_s: Audio kept around every region so word edges are not clipped
+
+    Returns:
+        Sorted, non-overlapping (start, end) sample spans
+    """
+    features = frame_features(audio, sample_rate)
+    energy_db = features['energy_db']
+    if len(energy_db) == 0:
+        return []
+
+    floor_db = float(np.percentile(energy_db, 10))
+    speech = (
+        (energy_db > max(floor_db + margin_db, min_energy_db))
+        & (features['band_ratio'] >= min_band_ratio)
+        & (features['flatness'] <= max_flatness)
+    )
+
+    frame_len = max(1, int(sample_rate * FRAME_SECONDS))
+    min_gap = int(min_silence_s / FRAME_SECONDS)
+    min_run = int(min_speech_s / FRAME_SECONDS)
+    pad = int(pad_s * sample_rate)
+
+    # Bridge short pauses, then drop isolated blips
+    for start, end in _runs(~speech):
+        if end - start < min_gap and start > 0 and end < len(speech):
+            speech[start:end] = True
+
+    regions = []
+    for start, end in _runs(speech):
+        if end - start < min_run:
+            continue
+        start = max(0, start * frame_len - pad)
+        end = min(len(audio), end * frame_len + pad)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    return regions
+
+
+def extract_speech(audio: np.ndarray, regions: List[Tuple[int, int]]) -> np.ndarray:
+    """
+    Concatenate the speech regions of audio
+
+    Args:
+        audio: Mono float32 audio
+        regions: (start, end) sample spans from detect_speech()
+
+    Returns:
+        Float32 audio containing only the regions
+    """
+    if not regions:
+        return np.zeros(0, dtype=np.float32)
+    if len(regions) == 1 and regions[0] == (0, len(audio)):
+        return audio
+    return np.concatenate([audio[start:end] for start, end in regions])
+
+
+def map_times(
+    times: np.ndarray,
+    regions: List[Tuple[int, int]],
+    sample_rate: int = SAMPLE_RATE,
+    is_end: bool = False
+) -> np.ndarray:
+    """
+    Map times on the speech-only timeline back to the original timeline
+
+    Args:
+        times: Times in seconds within the extracted speech audio
+        regions: (start, end) sample spans the speech audio was built from
+        sample_rate: Sample rate of the audio
+        is_end: Map a time on a region boundary to the end of the earlier
+            region instead of the start of the later one
+
+    Returns:
+        Times in seconds in the original audio
+    """
+    starts = np.array([start for start, _ in regions], dtype=np.float64)
+    ends = np.array([end for _, end in regions], dtype=np.float64)
+    lengths = ends - starts
+    speech_starts = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+
+    samples = np.asarray(times, dtype=np.float64) * sample_rate
+    side = 'left' if is_end else 'right'
+    index = np.clip(np.searchsorted(speech_starts, samples, side=side) - 1, 0, len(regions) - 1)
+    original = starts[index] + np.minimum(samples - speech_starts[index], lengths[index])
+    return original / sample_rate
+
+
+def map_segments(
+    segments: List[Dict[str, Any]],
+    regions: List[Tuple[int, int]],
+    sample_rate: int = SAMPLE_RATE
+) -> List[Dict[str, Any]]:
+    """
+    Move segment (and word) timestamps back onto the original timeline
+
+    Args:
+        segments: Whisper segments of the speech-only audio
+        regions: (start, end) sample spans the speech audio was built from
+        sample_rate: Sample rate of the audio
+
+    Returns:
+        New segment dicts with original timestamps
+    """
+    if not segments or not regions:
+        return [dict(seg) for seg in segments]
+
+    starts = map_times([seg['start'] for seg in segments], regions, sample_rate)
+    ends = map_times([seg['end'] for seg in segments], regions, sample_rate, is_end=True)
+
+    mapped = []
+    for seg, start, end in zip(segments, starts, ends):
+        seg = dict(seg, start=float(start), end=float(end))
+        if seg.get('words'):
+            word_starts = map_times([w['start'] for w in seg['words']], regions, sample_rate)
+            word_ends = map_times([w['end'] for w in seg['words']], regions, sample_rate, is_end=True)
+            seg['words'] = [
+                dict(word, start=float(ws), end=float(we))
+                for word, ws, we in zip(seg['words'], word_starts, word_ends)
+            ]
+        mapped.append(seg)
+    return mapped
+
+
+def vad_report(
+    total_samples: int,
+    regions: List[Tuple[int, int]],
+    sample_rate: int = SAMPLE_RATE
+) -> Dict[str, Any]:
+    """
+    Summarize how much audio the VAD removed
+
+    Args:
+        total_samples: Length of the original audio
+        regions: Speech regions that were kept
+        sample_rate: Sample rate of the audio
+
+    Returns:
+        Dict with total, speech and skipped seconds and the skipped share
+    """
+    total_s = total_samples / sample_rate
+    speech_s = sum(end - start for start, end in regions) / sample_rate
+    return {
+        'total_seconds': total_s,
+        'speech_seconds': speech_s,
+        'skipped_seconds': total_s - speech_s,
+        'skipped_ratio': (total_s - speech_s) / total_s if total_s else 0.0,
+        'regions': len(regions),
+    }
+
+
+def apply_vad(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    **options
+) -> Tuple[np.ndarray, List[Tuple[int, int]], Dict[str, Any]]:
+    """
+    Run the VAD pre-pass on audio
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of the audio
+        **options: Thresholds passed to detect_speech()
+
+    Returns:
+        Tuple of (speech-only audio, speech regions, report)
+    """
+    regions = detect_speech(audio, sample_rate, **options)
+    report = vad_report(len(audio), regions, sample_rate)
+    print(f"VAD: skipping {report['skipped_seconds']:.0f}s of {report['total_seconds']:.0f}s "
+          f"({report['skipped_ratio']:.0%}), {report['regions']} speech regions")
+    return extract_speech(audio, regions), regions, report
@@ -0,0 +1,681 @@
+#!/usr/bin/env python3
+"""
+Worker processes that run transcription jobs from the job queue
+"""
+
+import gc
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# Sibling modules must be importable when this file is loaded by path (ui.py)
+SCRIPTS_DIR = Path(__file__).parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from jobs import JobQueue, DEFAULT_STALE_SECONDS, DEFAULT_MAX_ATTEMPTS  # noqa: E402
+from resources import available_cores, detect_cpu_count, apply_thread_limits  # noqa: E402
+from progress import ProgressTracker, JsonlSink  # noqa: E402
+from admission import (  # noqa: E402
+    PROCESS_BASE_MB, memory_budget_mb, admission_policy, plan_admission, estimate_job_mb,
+    read_process_memory
+)
+
+# Seconds between polls of an empty queue
+DEFAULT_POLL_SECONDS = 2.0
+
+# Seconds between heartbeats of a worker and its running job
+HEARTBEAT_SECONDS = 15.0
+
+# Log of workers started in the background by the UI (TRANSCRIBE_WORKER_LOG overrides it)
+WORKER_LOG = Path(__file__).parent.parent / "logs" / "worker.log"
+
+
+def run_job(queue: JobQueue, job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the full pipeline of one job: transcribe, fix names, create markdown
+
+    Progress events (stage, download, decoded audio, RTF, ETA) are stored
+    with the job and logged to logs/progress.jsonl. In single-pass mode every
+    decoded segment is stored so the UI can show the text before the job
+    finishes. With a 'draft_model' option the draft is fixed, formatted and
+    published with the job first; the final result replaces it.
+
+    Args:
+        queue: Job queue the job came from
+        job: Claimed job
+
+    Returns:
+        Result dict with 'transcript', 'fixed', 'markdown', 'model', 'cached'
+        and 'download'
+
+    Raises:
+        RuntimeError: If a pipeline step failed
+    """
+    from transcribe import (
+        AUTO_MODEL, resolve_model, get_video_info, get_default_device,
+        get_cached_transcription, cache_transcription, fetch_youtube_audio,
+        transcribe_with_whisper, transcribe_with_whisper_stream, transcribe_youtube_stream, run_stream,
+        transcribe_two_pass, segments_path_for
+    )
+    from fix_names import fix_names_in_transcript
+    from postprocess import create_markdown_output, extract_video_id
+
+    job_id, url, options = job['id'], job['url'], job['options']
+    model = options.get('model', 'base')
+    language = options.get('language', 'de')
+    chunked = options.get('chunked', False)
+    batched = options.get('batched', False)
+    pipelined = options.get('pipelined', False) and not chunked
+    # Windowed decoding never holds the whole audio, which chunks, batches,
+    # VAD and the two-pass refinement need
+    windowed = options.get('windowed', False) and not pipelined
+    chunked = chunked and not windowed
+    batched = batched and not windowed
+    vad = options.get('vad', False) and not (pipelined or windowed)
+    backend = options.get('backend', 'whisper')
+    precision = options.get('precision')
+    draft_model = None if windowed else options.get('draft_model')
+
+    if model == AUTO_MODEL:
+        video_info = get_video_info(url) or {}
+        model = resolve_model(
+            model, video_info.get('duration'), options.get('budget_s'),
+            backend=backend, precision=precision, device=get_default_device()
+        )
+
+    progress = ProgressTracker(sinks=[queue.progress_sink(job_id), JsonlSink(job=job_id, url=url)])
+    count = 0
+
+    def store_segment(segment: Dict[str, Any]):
+        nonlocal count
+        queue.add_segment(job_id, count, segment)
+        count += 1
+
+    video_info = None
+    download = None
+    cached = None
+    draft_files: List[str] = []
+
+    def publish_draft(draft_path: str):
+        fixed = fix_names_in_transcript(draft_path) or draft_path
+        markdown = create_markdown_output(fixed, url, video_info)
+        draft_files.extend(path for path in (fixed, markdown) if path and path != draft_path)
+        queue.publish_draft(job_id, {
+            'transcript': draft_path,
+            'fixed': fixed,
+            'markdown': markdown,
+            'model': draft_model,
+        })
+
+    if options.get('use_cache', True):
+        cached = get_cached_transcription(url, model, language, vad=vad, backend=backend, precision=precision)
+
+    budget_mb = memory_budget_mb()
+    if not cached and budget_mb:
+        video_info = get_video_info(url)
+        model = admit_job(
+            queue, job['worker'], model, budget_mb, progress,
+            duration_s=(video_info or {}).get('duration'), backend=backend, precision=precision,
+            chunked=chunked, pipelined=pipelined, windowed=windowed, draft_model=draft_model
+        )
+
+    if cached:
+        progress.stage("transcribing", "Transkript aus dem Cache geladen")
+        transcript_path = cached['transcript']
+        video_info = cached.get('video_info')
+    elif pipelined:
+        # The duration gives the progress bar and ETA while the stream runs
+        video_info = get_video_info(url)
+        progress.set_duration((video_info or {}).get('duration'))
+        transcript_path = run_stream(
+            transcribe_youtube_stream(
+                url, model, language, backend=backend, precision=precision, progress=progress
+            ),
+            store_segment
+        )
+    else:
+        fetched = fetch_youtube_audio(url, progress=progress)
+        if not fetched:
+            raise RuntimeError("Download failed")
+        video_info, download = fetched['video_info'], fetched['download']
+
+        if draft_model and draft_model != model:
+            # The draft streams its segments; the refinement runs after it on the same audio
+            transcript_path = transcribe_two_pass(
+                fetched['audio'], model, language, draft_model, chunked=chunked, vad=vad,
+                backend=backend, precision=precision, on_segment=store_segment,
+                on_draft=publish_draft, progress=progress
+            )
+        elif chunked or batched:
+            # Chunks and batches finish out of order, so only single-pass mode streams
+            transcript_path = transcribe_with_whisper(
+                fetched['audio'], model, language, chunked=chunked, vad=vad, backend=backend,
+                precision=precision, progress=progress, batched=batched
+            )
+        else:
+            transcript_path = run_stream(
+                transcribe_with_whisper_stream(
+                    fetched['audio'], model, language, vad=vad, backend=backend,
+                    precision=precision, progress=progress, windowed=windowed,
+                    duration_s=video_info.get('duration')
+                ),
+                store_segment
+            )
+
+    if not transcript_path:
+        raise RuntimeError("Transcription failed")
+
+    if not cached:
+        cache_transcription(
+            url, model, language, transcript_path, video_info, vad=vad, backend=backend, precision=precision
+        )
+
+    progress.stage("fixing", "Namen werden korrigiert...")
+    fixed_path = fix_names_in_transcript(transcript_path) or transcript_path
+
+    progress.stage("formatting", "Markdown wird erstellt...")
+    markdown_path = create_markdown_output(fixed_path, url, video_info)
+    if not markdown_path:
+        raise RuntimeError("Markdown creation failed")
+
+    # The draft's transcript was replaced in place; its derived files are stale
+    for path in draft_files:
+        if path not in (fixed_path, markdown_path):
+            Path(path).unlink(missing_ok=True)
+
+    # Cached segments are already indexed under their original file
+    index_paths = [markdown_path] if cached else [segments_path_for(transcript_path), markdown_path]
+    index_transcript(index_paths, extract_video_id(url), (video_info or {}).get('title'))
+    progress.finish("Transkription abgeschlossen")
+
+    return {
+        'transcript': transcript_path,
+        'fixed': fixed_path,
+        'markdown': markdown_path,
+        'model': model,
+        'cached': bool(cached),
+        'download': download,
+    }
+
+
+def admit_job(
+    queue: JobQueue,
+    worker_id: str,
+    model: str,
+    budget_mb: float,
+    progress: ProgressTracker,
+    poll_s: float = DEFAULT_POLL_SECONDS,
+    **estimate_options
+) -> str:
+    """
+    Wait until a job fits into the memory budget and reserve its memory
+
+    While waiting, the job is in stage 'waiting', which also makes idle
+    workers drop their cached models (see work()).
+
+    Args:
+        queue: Job queue that holds the reservations
+        worker_id: Worker running the job
+        model: Requested model
+        budget_mb: Memory of all workers together (MAX_MEMORY_MB)
+        progress: Receives the waiting stage
+        poll_s: Seconds between checks
+        **estimate_options: duration_s, backend, ... for estimate_job_mb()
+
+    Returns:
+        Model to run; smaller than requested if the request can never fit
+        (or, with TRANSCRIBE_ADMISSION=downgrade, does not fit now)
+
+    Raises:
+        RuntimeError: If not even the smallest model fits the budget
+    """
+    from model_pool import get_model_pool
+
+    pool = get_model_pool()
+    policy = admission_policy()
+    # Weights inherited from a fork server are already paid for by the server
+    shared_models = [entry['model_name'] for entry in pool.loaded_models() if entry['shared']]
+    while True:
+        # Cached models skip the load peak; re-read as waiting evicts them
+        loaded_models = [entry['model_name'] for entry in pool.loaded_models()]
+        free_mb = budget_mb - queue.reserved_mb(exclude=worker_id)
+        plan = plan_admission(
+            model, budget_mb, free_mb, policy, shared_models, loaded_models, **estimate_options
+        )
+        if plan['action'] == 'reject':
+            raise RuntimeError(
+                f"Not enough memory: {plan['model']} needs about {plan['memory_mb']:.0f} MB, "
+                f"MAX_MEMORY_MB is {budget_mb:.0f}"
+            )
+
+        if plan['action'] == 'run':
+            # Cached models of earlier jobs are not part of the estimate
+            if not any(entry['model_name'] == plan['model'] for entry in pool.loaded_models()):
+                release_models(queue, worker_id)
+            if queue.reserve_memory(worker_id, plan['memory_mb'], budget_mb):
+                if plan['downgraded']:
+                    print(f"Not enough memory for {model}, using {plan['model']}")
+                return plan['model']
+
+        progress.stage(
+            "waiting",
+            f"Wartet auf freien Speicher: {plan['model']} braucht ca. {plan['memory_mb']:.0f} MB, "
+            f"{max(0.0, free_mb):.0f} MB frei"
+        )
+        time.sleep(poll_s)
+
+
+def release_models(queue: JobQueue, worker_id: str):
+    """Drop the worker's own cached models and lower its reservation to the bare process"""
+    from model_pool import get_model_pool
+
+    # Weights shared with a fork server would not be freed
+    get_model_pool().evict(keep_shared=True)
+    hold_models(queue, worker_id)
+
+
+def hold_models(queue: JobQueue, worker_id: str):
+    """Lower the worker's reservation after a job to the models it keeps cached"""
+    from model_pool import get_model_pool
+
+    pool = get_model_pool()
+    stats = pool.stats()
+    queue.set_memory(worker_id, PROCESS_BASE_MB + stats['used_mb'] - stats['shared_mb'])
+    queue.set_models(worker_id, [entry['model_name'] for entry in pool.loaded_models()])
+
+
+def memory_report() -> Dict[str, Optional[float]]:
+    """Return RSS and USS of this process for the worker heartbeat"""
+    usage = read_process_memory() or {}
+    return {'rss_mb': usage.get('rss_mb'), 'uss_mb': usage.get('uss_mb')}
+
+
+def warm_worker(queue: JobQueue, worker_id: str, models: List[str], budget_mb: Optional[float] = None):
+    """
+    Load the prewarm models before the first job and mark the worker warm
+
+    Args:
+        queue: Job queue the worker reports to
+        worker_id: Worker name in the queue
+        models: Models to load (see prewarm.py)
+        budget_mb: Memory budget of all workers, None for no limit
+    """
+    from backends import DEFAULT_BACKEND, DEFAULT_PRECISION
+    from model_pool import get_model_pool
+    from prewarm import warm_models
+
+    def fits(model: str) -> bool:
+        if not budget_mb:
+            return True
+        # Weights and runtime buffers only; the audio comes with a job
+        model_mb = estimate_job_mb(
+            model, duration_s=0, backend=DEFAULT_BACKEND, precision=DEFAULT_PRECISION
+        ) - PROCESS_BASE_MB
+        held_mb = PROCESS_BASE_MB + get_model_pool().stats()['used_mb']
+        return queue.reserve_memory(worker_id, held_mb + model_mb, budget_mb)
+
+    if models:
+        warm_models(models, fits)
+    # Also reports models inherited from a fork server
+    hold_models(queue, worker_id)
+    queue.mark_warm(worker_id)
+
+
+def index_transcript(paths: List[Path], video_id: Optional[str], title: Optional[str]):
+    """Add the files of a finished job to the search index; a failure only warns"""
+    from search_index import SearchIndex
+
+    try:
+        index = SearchIndex()
+        for path in paths:
+            if Path(path).exists():
+                index.add_file(path, video_id, title)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"Warning: Could not index transcript: {e}")
+
+
+def work(
+    worker_id: Optional[str] = None,
+    poll_s: float = DEFAULT_POLL_SECONDS,
+    once: bool = False,
+    stale_s: float = DEFAULT_STALE_SECONDS,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    queue: Optional[JobQueue] = None,
+    prewarm: Optional[List[str]] = None
+) -> int:
+    """
+    Claim and run jobs until stopped
+
+    A background thread keeps the heartbeat of the worker and of its running
+    job fresh. On SIGTERM or Ctrl+C the running job goes back to the queue.
+    Before the first job the worker loads the prewarm models.
+
+    Args:
+        worker_id: Name in the queue (default: host:pid)
+        poll_s: Seconds to sleep while the queue is empty
+        once: Return as soon as the queue is empty
+        stale_s: Heartbeat age after which another worker's job is taken back
+        max_attempts: Attempts before a job that keeps losing its worker fails
+        queue: Job queue (default: JobQueue())
+        prewarm: Models to load at start (default: TRANSCRIBE_PREWARM_MODELS)
+
+    Returns:
+        Number of jobs run
+    """
+    if worker_id is None:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    if queue is None:
+        queue = JobQueue()
+
+    current: Dict[str, Optional[int]] = {'job': None}
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                queue.worker_alive(worker_id, os.getpid(), **memory_report())
+                if current['job'] is not None:
+                    queue.report(current['job'])
+            except Exception as e:
+                print(f"Warning: Heartbeat failed: {e}")
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, terminate)
+
+    queue.worker_alive(worker_id, os.getpid(), **memory_report())
+    queue.set_memory(worker_id, PROCESS_BASE_MB)
+    threading.Thread(target=heartbeat, daemon=True).start()
+    budget_mb = memory_budget_mb()
+
+    done = 0
+    try:
+        if prewarm is None:
+            from prewarm import prewarm_models
+            prewarm = prewarm_models()
+        warm_worker(queue, worker_id, prewarm, budget_mb)
+
+        while True:
+            recovered = queue.requeue_stale(stale_s, max_attempts)
+            if recovered:
+                print(f"Requeued {recovered} jobs of lost workers")
+
+            job = queue.claim(worker_id)
+            if job is None:
+                if once:
+                    break
+                # Cached models of an idle worker must not block a waiting job
+                if budget_mb and queue.waiting_for_memory():
+                    release_models(queue, worker_id)
+                time.sleep(poll_s)
+                continue
+
+            print(f"[{worker_id}] Job {job['id']}: {job['url']}")
+            current['job'] = job['id']
+            try:
+                queue.complete(job['id'], run_job(queue, job))
+                print(f"[{worker_id}] Job {job['id']} done")
+            except (KeyboardInterrupt, SystemExit):
+                queue.release(job['id'])
+                print(f"[{worker_id}] Job {job['id']} returned to the queue")
+                raise
+            except Exception as e:
+                queue.fail(job['id'], str(e))
+                print(f"[{worker_id}] Job {job['id']} failed: {e}")
+            finally:
+                current['job'] = None
+                hold_models(queue, worker_id)
+            done += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        queue.worker_gone(worker_id)
+
+    return done
+
+
+def _worker_main(index: int, cores: List[int], poll_s: float, once: bool):
+    """Entry point of a spawned worker process"""
+    # Each worker runs one job at a time on its own slice of the cores
+    os.environ['TRANSCRIBE_MAX_JOBS'] = '1'
+    if cores:
+        apply_thread_limits(len(cores), cores)
+    work(f"{socket.gethostname()}:{os.getpid()}:{index}", poll_s, once)
+
+
+def _fork_worker_main(index: int, cores: List[int], poll_s: float, once: bool):
+    """Entry point of a worker process forked from the fork server"""
+    from model_pool import get_model_pool
+
+    # The inherited models belong to the server; this worker only reads them
+    get_model_pool().mark_shared()
+    os.environ['TRANSCRIBE_MAX_JOBS'] = '1'
+    apply_thread_limits(len(cores) or 1, cores or None)
+    work(f"{socket.gethostname()}:{os.getpid()}:{index}", poll_s, once, prewarm=[])
+
+
+def run_fork_server(
+    workers: int = 1,
+    poll_s: float = DEFAULT_POLL_SECONDS,
+    once: bool = False,
+    models: Optional[List[str]] = None
+) -> int:
+    """
+    Load the models once, then fork workers that share their weights
+
+    The server loads the models single-threaded (OpenMP thread pools do not
+    survive a fork), moves its heap into the permanent GC generation with
+    gc.freeze() so the workers' collections do not write to the inherited
+    objects, and forks the workers. Inference only reads the weights, so
+    their pages stay shared copy-on-write: each worker costs its unique
+    memory (USS, reported with its heartbeat), not a copy of the model. A
+    worker that dies is forked again from the loaded server.
+
+    Args:
+        workers: Number of worker processes
+        poll_s: Seconds to sleep while the queue is empty
+        once: Stop when the queue is empty
+        models: Models to share (default: TRANSCRIBE_PREWARM_MODELS)
+
+    Returns:
+        0 (jobs are counted by the workers)
+    """
+    from transcribe import get_default_device
+    from prewarm import prewarm_models
+
+    if not hasattr(os, 'fork') or get_default_device() != "cpu":
+        # CUDA cannot be used in a forked child; the weights would be on the GPU anyway
+        print("Warning: Fork server needs a CPU-only system with fork(), starting spawned workers")
+        return run_workers(workers, poll_s, once)
+
+    queue = JobQueue()
+    server_id = f"{socket.gethostname()}:{os.getpid()}:server"
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    # No threads in the server: a fork while another thread holds a lock
+    # (SQLite, stdout, allocator) would leave that lock held in the child
+    apply_thread_limits(1, set_env=False)
+    queue.worker_alive(server_id, os.getpid(), **memory_report())
+    warm_worker(queue, server_id, prewarm_models() if models is None else models, memory_budget_mb())
+
+    context = multiprocessing.get_context("fork")
+    slices = split_cores(available_cores()[:detect_cpu_count()], workers)
+
+    def fork(index: int) -> multiprocessing.Process:
+        # Objects the server allocated so far are never collected, so never touched
+        gc.freeze()
+        process = context.Process(target=_fork_worker_main, args=(index, slices[index], poll_s, once))
+        process.start()
+        return process
+
+    processes = {index: fork(index) for index in range(workers)}
+    try:
+        while processes:
+            time.sleep(min(poll_s, HEARTBEAT_SECONDS))
+            queue.worker_alive(server_id, os.getpid(), **memory_report())
+            for index, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                if once or process.exitcode == 0:
+                    del processes[index]
+                else:
+                    print(f"[{server_id}] Worker {index} exited with {process.exitcode}, forking a new one")
+                    processes[index] = fork(index)
+    except KeyboardInterrupt:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join()
+    finally:
+        queue.worker_gone(server_id)
+    return 0
+
+
+def split_cores(cores: List[int], workers: int) -> List[List[int]]:
+    """
+    Divide cores into contiguous, nearly equal slices
+
+    Args:
+        cores: Usable core IDs
+        workers: Number of slices
+
+    Returns:
+        One core list per worker; empty lists if there are fewer cores than workers
+    """
+    if workers > len(cores):
+        return [[] for _ in range(workers)]
+    size, extra = divmod(len(cores), workers)
+    slices = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(cores[start:end])
+        start = end
+    return slices
+
+
+def run_workers(
+    workers: int = 1,
+    poll_s: float = DEFAULT_POLL_SECONDS,
+    once: bool = False,
+    fork_server: bool = False
+) -> int:
+    """
+    Run workers until stopped; more than one runs in separate processes
+
+    Args:
+        workers: Number of worker processes
+        poll_s: Seconds to sleep while the queue is empty
+        once: Stop when the queue is empty
+        fork_server: Fork the workers from a process that loaded the models
+            once, so they share the weights (see run_fork_server)
+
+    Returns:
+        Number of jobs run (single worker only, else 0)
+    """
+    if fork_server:
+        return run_fork_server(workers, poll_s, once)
+    if workers <= 1:
+        os.environ.setdefault('TRANSCRIBE_MAX_JOBS', '1')
+        return work(poll_s=poll_s, once=once)
+
+    # spawn avoids inheriting torch's thread pools from the parent process
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_worker_main, args=(i, cores, poll_s, once), daemon=False)
+        for i, cores in enumerate(split_cores(available_cores()[:detect_cpu_count()], workers))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+    return 0
+
+
+def ensure_workers(
+    queue: JobQueue,
+    stale_seconds: float = 60,
+    log_path: Optional[Path] = None
+) -> bool:
+    """
+    Start worker processes in the background unless workers are running already
+
+    Args:
+        queue: Job queue the workers report to
+        stale_seconds: Heartbeat age after which a worker is gone
+        log_path: File that receives the workers' output (default:
+            TRANSCRIBE_WORKER_LOG or logs/worker.log of the tool)
+
+    Returns:
+        True if workers were started
+    """
+    if queue.live_workers(stale_seconds=stale_seconds):
+        return False
+
+    if log_path is None:
+        log_path = Path(os.getenv('TRANSCRIBE_WORKER_LOG') or WORKER_LOG)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'a', encoding='utf-8') as log_file:
+        # A new session keeps the workers running when the app restarts
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__))],
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            env={**os.environ, 'TRANSCRIBE_JOBS_DB': str(queue.db_path)}
+        )
+    return True
+
+
+def main():
+    """Main function for CLI usage"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    options = dict(flag[2:].split('=', 1) for flag in flags if '=' in flag)
+
+    if args or '--help' in flags:
+        print("Usage: python worker.py [--workers=N] [--poll=SECONDS] [--once] [--fork-server]")
+        print("  --workers  Worker processes (default: TRANSCRIBE_WORKERS or 1)")
+        print(f"  --poll     Seconds between polls of an empty queue (default: {DEFAULT_POLL_SECONDS})")
+        print("  --once     Exit when the queue is empty")
+        print("  --fork-server  Load TRANSCRIBE_PREWARM_MODELS once and fork workers that share")
+        print("                 the weights (default: TRANSCRIBE_FORK_SERVER=1)")
+        sys.exit(1)
+
+    workers = int(options.get('workers', os.getenv('TRANSCRIBE_WORKERS', 1)))
+    poll_s = float(options.get('poll', DEFAULT_POLL_SECONDS))
+    once = '--once' in flags
+    fork_server = '--fork-server' in flags or os.getenv('TRANSCRIBE_FORK_SERVER') == '1'
+
+    mode = " forked from a fork server" if fork_server else ""
+    print(f"Starting {workers} worker(s){mode}, queue: {JobQueue().db_path}")
+    done = run_workers(workers, poll_s, once, fork_server)
+    if once and workers <= 1 and not fork_server:
+        print(f"Queue empty, {done} jobs run")
+
+
+if __name__ == "__main__":
+    main()
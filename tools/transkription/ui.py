@@ -13,6 +13,18 @@ import importlib.util
 tool_path = Path(__file__).parent
 sys.path.insert(0, str(tool_path))
 
+# Seconds between polls of a running job
+JOB_POLL_SECONDS = 1.0
+
+# Workers without a heartbeat for this long are considered gone
+WORKER_STALE_SECONDS = 60
+
+# Hits shown in the search panel
+SEARCH_LIMIT = 20
+
+# Model of the quick draft shown while the selected model refines it
+DRAFT_MODEL = "tiny"
+
 # Robust module import function
 def import_module_from_path(module_name, file_path):
     """Import a module from a specific file path"""
@@ -60,17 +72,89 @@ def render():
     with col2:
         whisper_model = st.selectbox(
             "Whisper Modell",
-            ["tiny", "base", "small", "medium", "large"],
-            index=1,
-            help="Gr??ere Modelle sind genauer, aber langsamer"
+            ["auto", "tiny", "base", "small", "medium", "large"],
+            index=2,
+            help="Gr??ere Modelle sind genauer, aber langsamer. "
+                 "auto waehlt das genaueste Modell, das im Zeitbudget fertig wird"
+        )
+        budget_minutes = None
+        if whisper_model == "auto":
+            budget_minutes = st.number_input(
+                "Zeitbudget (Minuten)",
+                min_value=1,
+                value=10,
+                help="So lange darf die Transkription hoechstens dauern"
+            )
+        backend = st.selectbox(
+            "Engine",
+            get_backends(),
+            help="faster-whisper (CTranslate2 int8) ist auf CPU deutlich schneller"
+        )
+        precision = st.selectbox(
+            "Gewichte",
+            [None, "int8", "bf16", "fp32"],
+            format_func=lambda value: value or "Standard",
+            help="int8 und bf16 brauchen weniger Speicher (nur CPU)"
+        )
+    
+    opt1, opt2, opt3, opt4, opt5, opt6 = st.columns(6)
+    with opt1:
+        chunked = st.checkbox(
+            "Parallele Verarbeitung",
+            value=False,
+            help="Teilt lange Videos an Sprechpausen und transkribiert die Teile parallel"
+        )
+    with opt2:
+        pipelined = st.checkbox(
+            "Transkription beim Download",
+            value=False,
+            disabled=chunked,
+            help="Beginnt schon mit der Transkription, solange das Audio noch geladen wird"
+        )
+    with opt3:
+        use_cache = st.checkbox(
+            "Cache nutzen",
+            value=True,
+            help="Verwendet ein vorhandenes Transkript desselben Videos mit gleichem Modell"
+        )
+    with opt4:
+        vad = st.checkbox(
+            "Stille ueberspringen",
+            value=False,
+            disabled=pipelined and not chunked,
+            help="Entfernt Stille und Musik vor der Transkription (nicht beim Download-Modus)"
+        )
+    with opt5:
+        draft = st.checkbox(
+            "Schneller Entwurf",
+            value=False,
+            disabled=(pipelined and not chunked) or whisper_model == DRAFT_MODEL,
+            help=f"Zeigt sofort ein grobes Transkript ({DRAFT_MODEL}), das durch das gewaehlte Modell "
+                 "ersetzt wird, sobald es fertig ist (nicht beim Download-Modus)"
+        )
+    with opt6:
+        windowed = st.checkbox(
+            "Speicherschonend",
+            value=False,
+            disabled=pipelined and not chunked,
+            help="Liest das Audio abschnittsweise statt ganz in den Speicher, fuer Aufnahmen "
+                 "von vielen Stunden (ohne Parallele Verarbeitung, Stille ueberspringen und Entwurf)"
         )
     
     # Process button
     if st.button("? Transkription starten", type="primary", disabled=not youtube_url):
         if validate_youtube_url(youtube_url):
-            process_video(youtube_url, whisper_model)
+            if whisper_model == "auto":
+                whisper_model = choose_auto_model(youtube_url, budget_minutes * 60, backend, precision)
+            process_video(
+                youtube_url, whisper_model, chunked, pipelined and not chunked, use_cache, vad,
+                backend, precision, DRAFT_MODEL if draft else None, windowed
+            )
         else:
             st.error("? Ung?ltige YouTube URL")
+    elif st.session_state.get('job_id'):
+        # Reruns interrupt polling; the job itself keeps running in the worker
+        follow_job(get_job_queue(), st.session_state.job_id)
     
     # Status display
     if st.session_state.transcription_status:
@@ -84,6 +168,14 @@ def render():
     with st.expander("? Glossar verwalten"):
         manage_glossary()
     
+    # Full-text search over all transcripts
+    with st.expander("? Archiv durchsuchen"):
+        search_archive()
+    
+    # Queued and finished jobs
+    with st.expander("? Auftraege"):
+        show_jobs()
+    
     # Recent transcriptions
     with st.expander("? Letzte Transkriptionen"):
         show_recent_transcriptions()
@@ -129,8 +221,9 @@ def validate_youtube_url(url):
     )
     return youtube_regex.match(url) is not None
 
-def process_video(url, model):
-    """Process video transcription"""
+def process_video(url, model, chunked=False, pipelined=False, use_cache=True, vad=False, backend="whisper",
+                  precision=None, draft_model=None, windowed=False):
+    """Queue a video for transcription and follow the job"""
     st.session_state.transcription_status = "starting"
     st.session_state.current_transcript = None
     st.session_state.fixed_transcript = None
@@ -138,48 +231,225 @@ def process_video(url, model):
     # Create necessary directories
     create_directories()
     
-    # Start transcription process
+    try:
+        queue = get_job_queue()
+        job_id = queue.submit(url, {
+            "model": model,
+            "language": "de",
+            "chunked": chunked,
+            "pipelined": pipelined,
+            "use_cache": use_cache,
+            "vad": vad and not pipelined,
+            "backend": backend,
+            "precision": precision,
+            "draft_model": None if pipelined else draft_model,
+            "windowed": windowed and not pipelined
+        })
+        st.session_state.job_id = job_id
+        ensure_worker(queue)
+    except Exception as e:
+        st.error(f"? Fehler: {str(e)}")
+        st.session_state.transcription_status = None
+        log_error(f"Job submit error: {str(e)}")
+        return
+    
+    follow_job(queue, job_id)
+
+def follow_job(queue, job_id):
+    """Poll a job until it finishes, showing its stage and the text decoded so far"""
+    status_area = st.empty()
+    live_area = st.empty()
+    live_segments = []
+    draft_shown = False
+    
     with st.spinner("Verarbeitung l?uft..."):
         try:
-            # Step 1: Download audio
-            update_status("downloading", "Video wird heruntergeladen...")
-            audio_path = download_audio(url)
-            
-            if not audio_path:
-                st.error("? Fehler beim Download")
-                st.session_state.transcription_status = None
-                return
-            
-            # Step 2: Transcribe
-            update_status("transcribing", "Audio wird transkribiert...")
-            transcript_path = transcribe_audio(audio_path, model)
-            
-            if not transcript_path:
-                st.error("? Fehler bei der Transkription")
-                st.session_state.transcription_status = None
-                return
-            
-            # Step 3: Fix names
-            update_status("fixing", "Namen werden korrigiert...")
-            fixed_path = fix_transcript(transcript_path)
-            
-            # Step 4: Create markdown
-            update_status("formatting", "Markdown wird erstellt...")
-            markdown_path = create_markdown(fixed_path, url)
-            
-            # Load results
-            with open(transcript_path, 'r', encoding='utf-8') as f:
-                st.session_state.current_transcript = f.read()
-            
-            with open(markdown_path, 'r', encoding='utf-8') as f:
-                st.session_state.fixed_transcript = f.read()
-            
-            update_status("complete", "? Transkription abgeschlossen!")
-            
+            while True:
+                job = queue.get(job_id)
+                if job is None:
+                    st.error("? Auftrag nicht gefunden")
+                    st.session_state.transcription_status = None
+                    st.session_state.job_id = None
+                    return
+                
+                if job["status"] in ("done", "failed"):
+                    st.session_state.job_id = None
+                
+                if job["status"] == "done":
+                    live_area.empty()
+                    load_job_results(job)
+                    update_status("complete", "? Transkription abgeschlossen!")
+                    status_area.empty()
+                    return
+                
+                if job["status"] == "failed":
+                    live_area.empty()
+                    st.error(f"? Fehler: {job['error']}")
+                    st.session_state.transcription_status = None
+                    return
+                
+                if job["status"] == "queued":
+                    update_status("queued", f"Auftrag {job_id} wartet auf einen Worker...")
+                else:
+                    update_status(job["stage"] or "starting", job["message"] or "Verarbeitung startet...")
+                with status_area.container():
+                    display_status()
+                    display_progress(job["progress"])
+                
+                if job["draft"] and not draft_shown:
+                    # Stays visible until the refined transcript replaces it
+                    draft_shown = True
+                    with live_area.container():
+                        display_draft(job)
+                
+                new_segments = queue.segments(job_id, after=len(live_segments) - 1)
+                if new_segments and not draft_shown:
+                    live_segments.extend(new_segments)
+                    with live_area.container():
+                        display_results(live_segments)
+                
+                time.sleep(JOB_POLL_SECONDS)
         except Exception as e:
             st.error(f"? Fehler: {str(e)}")
             st.session_state.transcription_status = None
-            log_error(f"Process error: {str(e)}")
+            st.session_state.job_id = None
+            log_error(f"Job poll error: {str(e)}")
+
+def display_draft(job):
+    """Show the draft of a two-pass job while the selected model refines it"""
+    draft = job["draft"]
+    st.info(
+        f"Entwurf mit {draft['model']} - wird durch das Transkript mit "
+        f"{job['options'].get('model')} ersetzt, sobald es fertig ist"
+    )
+    with open(draft["markdown"], 'r', encoding='utf-8') as f:
+        st.markdown(f.read())
+
+def display_progress(event):
+    """Show a progress event of a job as progress bar with download, speed, RTF and ETA"""
+    if not event:
+        return
+    
+    if event["fraction"] is not None:
+        st.progress(event["fraction"])
+    
+    parts = []
+    if event["stage"] == "downloading":
+        part = f"{event['downloaded_bytes'] / 1e6:.1f} MB"
+        if event["total_bytes"]:
+            part += f" von {event['total_bytes'] / 1e6:.1f} MB"
+        parts.append(part)
+        if event["download_speed"]:
+            parts.append(f"{event['download_speed'] * 8 / 1e6:.1f} Mbit/s")
+    elif event["audio_seconds"]:
+        parts.append(f"{event['audio_seconds']:.0f} s Audio transkribiert")
+    if event["rtf"] is not None:
+        parts.append(f"Echtzeitfaktor {event['rtf']:.2f}")
+    if event["eta_seconds"] is not None:
+        minutes, seconds = divmod(int(event["eta_seconds"]), 60)
+        parts.append(f"noch ca. {minutes}:{seconds:02d} min")
+    if parts:
+        st.caption(" | ".join(parts))
+
+def load_job_results(job):
+    """Load the transcript and markdown of a finished job into the session"""
+    result = job["result"]
+    with open(result["transcript"], 'r', encoding='utf-8') as f:
+        st.session_state.current_transcript = f.read()
+    
+    with open(result["markdown"], 'r', encoding='utf-8') as f:
+        st.session_state.fixed_transcript = f.read()
+    
+    download = result.get("download")
+    if download and download["bytes"]:
+        st.caption(f"Download: {download['bytes'] / 1e6:.1f} MB mit {download['mbit_per_s']:.1f} Mbit/s")
+
+def get_job_queue():
+    """Open the persistent job queue"""
+    jobs_module = import_module_from_path(
+        "jobs", 
+        tool_path / "scripts" / "jobs.py"
+    )
+    if jobs_module:
+        return jobs_module.JobQueue()
+    raise ImportError("Could not import jobs module")
+
+def ensure_worker(queue):
+    """Start worker processes in the background unless workers are running already"""
+    worker_module = import_module_from_path(
+        "worker",
+        tool_path / "scripts" / "worker.py"
+    )
+    if not worker_module:
+        raise ImportError("Could not import worker module")
+    worker_module.ensure_workers(queue, stale_seconds=WORKER_STALE_SECONDS)
+
+def show_jobs():
+    """Show recent jobs of the queue"""
+    try:
+        queue = get_job_queue()
+        jobs = queue.jobs(limit=10)
+    except Exception as e:
+        log_error(f"Job list error: {str(e)}")
+        st.info("Warteschlange nicht verfuegbar")
+        return
+    
+    if not jobs:
+        st.info("Noch keine Auftraege vorhanden")
+        return
+    
+    for job in jobs:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            detail = job["error"] if job["status"] == "failed" else job["message"] or ""
+            st.text(f"#{job['id']} {job['status']} {job['url']} {detail}")
+        with col2:
+            if job["status"] == "done" and st.button("? ?ffnen", key=f"job_{job['id']}"):
+                load_job_results(job)
+                st.rerun()
+            elif job["status"] in ("queued", "running") and st.button("? Verfolgen", key=f"job_{job['id']}"):
+                st.session_state.job_id = job["id"]
+                st.rerun()
+
+def search_archive():
+    """Search panel: find quotes in all transcripts with video and timestamp"""
+    query = st.text_input(
+        "Suchbegriff",
+        key="search_query",
+        help='Alle Woerter muessen vorkommen; "in Anfuehrungszeichen" sucht die Phrase, Wort* den Wortanfang'
+    )
+    if not query:
+        return
+    
+    try:
+        search_module = import_module_from_path(
+            "search_index", 
+            tool_path / "scripts" / "search_index.py"
+        )
+        if not search_module:
+            raise ImportError("Could not import search_index module")
+        index = search_module.SearchIndex()
+        # Picks up transcripts written since the last search, unchanged files are skipped
+        index.update()
+        hits = index.search(query, limit=SEARCH_LIMIT)
+    except Exception as e:
+        st.error(f"? Suche fehlgeschlagen: {str(e)}")
+        log_error(f"Search error: {str(e)}")
+        return
+    
+    if not hits:
+        st.info("Keine Treffer")
+        return
+    
+    for hit in hits:
+        title = hit["title"] or Path(hit["path"]).name
+        link = search_module.video_link(hit["video_id"], hit["start_ms"])
+        position = search_module.format_ms(hit["start_ms"]) if hit["start_ms"] is not None else "Markdown"
+        if link:
+            st.markdown(f"**{title}** - [{position}]({link})")
+        else:
+            st.markdown(f"**{title}** - {position}")
+        st.caption(hit["snippet"])
 
 def create_directories():
     """Create necessary directories"""
@@ -192,66 +462,41 @@ def create_directories():
     for dir_path in dirs:
         Path(tool_path / dir_path).mkdir(parents=True, exist_ok=True)
 
-def download_audio(url):
-    """Download audio from YouTube video"""
+def get_backends():
+    """List the installed inference engines, default first"""
     try:
-        # Import module dynamically
         transcribe_module = import_module_from_path(
             "transcribe", 
             tool_path / "scripts" / "transcribe.py"
         )
         if transcribe_module:
-            return transcribe_module.download_youtube_audio(url)
+            return transcribe_module.available_backends()
         else:
             raise ImportError("Could not import transcribe module")
     except Exception as e:
-        log_error(f"Download error: {str(e)}")
-        return None
+        log_error(f"Backend lookup error: {str(e)}")
+        return ["whisper"]
 
-def transcribe_audio(audio_path, model):
-    """Transcribe audio using Whisper"""
+def choose_auto_model(url, budget_s, backend="whisper", precision=None):
+    """Pick the model that finishes within the budget for this video"""
     try:
         transcribe_module = import_module_from_path(
             "transcribe", 
             tool_path / "scripts" / "transcribe.py"
         )
         if transcribe_module:
-            return transcribe_module.transcribe_with_whisper(audio_path, model)
+            video_info = transcribe_module.get_video_info(url) or {}
+            model = transcribe_module.resolve_model(
+                "auto", video_info.get('duration'), budget_s,
+                backend=backend, precision=precision, device=transcribe_module.get_default_device()
+            )
+            st.info(f"Automatisch gewaehltes Modell: {model}")
+            return model
         else:
             raise ImportError("Could not import transcribe module")
     except Exception as e:
-        log_error(f"Transcription error: {str(e)}")
-        return None
-
-def fix_transcript(transcript_path):
-    """Fix names in transcript using glossary"""
-    try:
-        fix_names_module = import_module_from_path(
-            "fix_names", 
-            tool_path / "scripts" / "fix_names.py"
-        )
-        if fix_names_module:
-            return fix_names_module.fix_names_in_transcript(transcript_path)
-        else:
-            raise ImportError("Could not import fix_names module")
-    except Exception as e:
-        log_error(f"Fix names error: {str(e)}")
-        return transcript_path
-
-def create_markdown(transcript_path, url):
-    """Create markdown file from transcript"""
-    try:
-        postprocess_module = import_module_from_path(
-            "postprocess", 
-            tool_path / "scripts" / "postprocess.py"
-        )
-        if postprocess_module:
-            return postprocess_module.create_markdown_output(transcript_path, url)
-        else:
-            raise ImportError("Could not import postprocess module")
-    except Exception as e:
-        log_error(f"Markdown creation error: {str(e)}")
-        return transcript_path
+        log_error(f"Model selection error: {str(e)}")
+        return "base"
 
 def update_status(status, message):
     """Update processing status"""
@@ -268,6 +513,8 @@ def display_status():
     if isinstance(status, dict):
         status_icons = {
             "starting": "?",
+            "queued": "?",
+            "waiting": "?",
             "downloading": "?",
             "transcribing": "?",
             "fixing": "??",
@@ -278,11 +525,21 @@ def display_status():
         icon = status_icons.get(status["status"], "?")
         st.info(f"{icon} {status['message']} ({status['timestamp']})")
 
-def display_results():
-    """Display transcription results"""
+def display_results(live_segments=None):
+    """Display transcription results, or the transcript decoded so far while running"""
     st.markdown("---")
     st.subheader("? Ergebnisse")
     
+    if live_segments is not None:
+        # Rendered repeatedly within one run, so no widgets with keys here
+        lines = [
+            f"`{int(seg['start'] // 60):02d}:{int(seg['start'] % 60):02d}` {seg['text'].strip()}"
+            for seg in live_segments
+        ]
+        st.caption(f"Transkription in Arbeit... {len(live_segments)} Segmente bisher")
+        st.markdown("  \n".join(lines))
+        return
+    
     tab1, tab2, tab3 = st.tabs(["Original", "Korrigiert", "Markdown"])
     
     with tab1: